@@ -0,0 +1,294 @@
+## BENCHMARK DE LAS FUNCIONES DE 'utils' CON DATOS SINTÉTICOS DE DISTINTOS TAMAÑOS
+# Importaciones
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import time
+import tracemalloc
+import warnings
+
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+import cache_resultados
+import carga_datos
+import horas
+import pipeline_etl as etl
+import utils
+
+DIRECTORIO_DATOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'datos')
+RUTA_EXCEL = os.path.join(DIRECTORIO_DATOS, 'homicidios.xlsx')
+RUTA_LIMPIO = os.path.join(DIRECTORIO_DATOS, 'homicidios_limpio.csv')
+
+TAMAÑOS = [1_000, 10_000, 100_000]
+TAMAÑO_MAXIMO = 10 ** 7
+
+
+def carga_referencia(ruta_excel=RUTA_EXCEL, ruta_limpio=RUTA_LIMPIO):
+    '''
+    Carga los datos reales que se usan como referencia para generar los datos sintéticos.
+
+    Parameters:
+        ruta_excel (str): La ruta del Excel con las hojas HECHOS y VICTIMAS.
+        ruta_limpio (str): La ruta del CSV limpio.
+
+    Returns:
+        dict: Las hojas 'hechos' y 'victimas' (con las columnas normalizadas) y el conjunto 'limpio'.
+    '''
+    return {'hechos': etl.normaliza_columnas(carga_datos.lee_hoja(ruta_excel, 'HECHOS'), etl.RENOMBRES_HECHOS),
+            'victimas': etl.normaliza_columnas(carga_datos.lee_hoja(ruta_excel, 'VICTIMAS'), etl.RENOMBRES_VICTIMAS),
+            'limpio': pd.read_csv(ruta_limpio)}
+
+def genera_sinteticos(referencia, n_victimas, semilla=0):
+    '''
+    Genera hojas HECHOS y VICTIMAS y un conjunto limpio sintéticos del tamaño pedido.
+
+    Las filas se remuestrean de los datos reales, por lo que se conservan las distribuciones
+    de cada columna y las relaciones entre columnas (incluidos los 'SD' y los tipos mezclados
+    de las hojas originales). Los 'Id' se renumeran para que cada hecho sintético sea único y
+    las víctimas se asignan a los hechos sintéticos respetando la cantidad de víctimas por hecho.
+
+    Parameters:
+        referencia (dict): Los datos de 'carga_referencia'.
+        n_victimas (int): La cantidad de víctimas (filas de VICTIMAS y del conjunto limpio).
+        semilla (int): La semilla del generador de números aleatorios.
+
+    Returns:
+        dict: Los DataFrames sintéticos 'hechos', 'victimas' y 'limpio'.
+    '''
+    if n_victimas > TAMAÑO_MAXIMO:
+        raise ValueError(f'El tamaño máximo es {TAMAÑO_MAXIMO} víctimas')
+    rng = np.random.default_rng(semilla)
+    hechos_ref, victimas_ref, limpio_ref = referencia['hechos'], referencia['victimas'], referencia['limpio']
+
+    # Se eligen hechos hasta cubrir la cantidad de víctimas pedida
+    victimas_por_hecho = len(victimas_ref) / len(hechos_ref)
+    n_hechos = max(1, int(np.ceil(n_victimas / victimas_por_hecho)))
+    hechos = hechos_ref.iloc[rng.integers(0, len(hechos_ref), n_hechos)].reset_index(drop=True)
+    ids = pd.Series(np.char.add('S', np.char.zfill(np.arange(n_hechos).astype(str), 8)), dtype=str)
+    hechos['Id'] = ids
+
+    # Cada víctima se asigna a un hecho sintético, con más probabilidad a los de más víctimas
+    pesos = pd.to_numeric(hechos['Cantidad víctimas'], errors='coerce').fillna(1).to_numpy(dtype=float)
+    hecho_de_victima = np.sort(rng.choice(n_hechos, size=n_victimas, p=pesos / pesos.sum()))
+    victimas = victimas_ref.iloc[rng.integers(0, len(victimas_ref), n_victimas)].reset_index(drop=True)
+    victimas['Id'] = ids.to_numpy()[hecho_de_victima]
+
+    limpio = limpio_ref.iloc[rng.integers(0, len(limpio_ref), n_victimas)].reset_index(drop=True)
+    limpio['Id'] = ids.to_numpy()[hecho_de_victima]
+    return {'hechos': hechos, 'victimas': victimas, 'limpio': limpio}
+
+# Funciones medidas: nombre -> (conjunto de entrada, función que recibe ese DataFrame)
+FUNCIONES = {
+    'verifica_duplicados_por_columna': ('hechos', lambda df: utils.verifica_duplicados_por_columna(df, 'Id')),
+    'verificar_tipo_variable': ('hechos', utils.verificar_tipo_variable),
+    'verificar_tipo_datos_y_nulos': ('victimas', utils.verificar_tipo_datos_y_nulos),
+    'convertir_a_time': ('hechos', lambda df: df['Hora'].apply(utils.convertir_a_time)),
+    'convertir_columna_a_time': ('hechos', lambda df: utils.convertir_columna_a_time(df['Hora'])),
+    'parsea_horas': ('hechos', lambda df: horas.columnas_de_hora(*horas.parsea_horas(df['Hora']))),
+    'extrae_hora_entera': ('limpio', lambda df: utils.extrae_hora_entera(df['Hora'])),
+    'crea_categoria_momento_dia': ('hechos', lambda df: utils.convertir_columna_a_time(df['Hora']).dropna()
+                                   .apply(utils.crea_categoria_momento_dia)),
+    'categoriza_momento_dia': ('limpio', lambda df: utils.categoriza_momento_dia(df['Hora entera'])),
+    'imputa_valor_frecuente': ('victimas', lambda df: utils.imputa_valor_frecuente(df, 'Sexo')),
+    'imputa_edad_media_segun_sexo': ('victimas', lambda df: utils.imputa_edad_media_segun_sexo(
+                                     df.assign(Sexo=df['Sexo'].replace('SD', 'MASCULINO')))),
+    'cohen': ('limpio', lambda df: utils.cohen(df.loc[df['Sexo'] == 'MASCULINO', 'Edad'],
+                                               df.loc[df['Sexo'] == 'FEMENINO', 'Edad'])),
+    'accidentes_mensuales': ('limpio', utils.accidentes_mensuales),
+    'cantidad_victimas_mensuales': ('limpio', utils.cantidad_victimas_mensuales),
+    'cantidad_victimas_por_dia_semana': ('limpio', utils.cantidad_victimas_por_dia_semana),
+    'cantidad_accidentes_por_categoria_tiempo': ('limpio', utils.cantidad_accidentes_por_categoria_tiempo),
+    'cantidad_accidentes_por_horas_del_dia': ('limpio', utils.cantidad_accidentes_por_horas_del_dia),
+    'cantidad_accidentes_semana_fin_de_semana': ('limpio', utils.cantidad_accidentes_semana_fin_de_semana),
+    'distribucion_edad': ('limpio', utils.distribucion_edad),
+    'distribucion_edad_por_anio': ('limpio', utils.distribucion_edad_por_anio),
+    'cantidades_accidentes_por_anio_y_sexo': ('limpio', utils.cantidades_accidentes_por_anio_y_sexo),
+    'cohen_por_año': ('limpio', utils.cohen_por_año),
+    'edad_y_rol_victimas': ('limpio', utils.edad_y_rol_victimas),
+    'distribucion_edad_por_victima': ('limpio', utils.distribucion_edad_por_victima),
+    'cantidad_accidentes_sexo': ('limpio', utils.cantidad_accidentes_sexo),
+    'cantidad_victimas_sexo_rol_victima': ('limpio', utils.cantidad_victimas_sexo_rol_victima),
+    'cantidad_victimas_participantes': ('limpio', utils.cantidad_victimas_participantes),
+    'cantidad_acusados': ('limpio', utils.cantidad_acusados),
+    'accidentes_tipo_de_calle': ('limpio', utils.accidentes_tipo_de_calle),
+}
+
+def _ejecuta(funcion, df):
+    '''
+    Ejecuta una función sobre una copia de los datos, sin caché, impresiones ni figuras abiertas.
+    '''
+    cache_resultados.CACHE_EDA.limpia()
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        funcion(df)
+    plt.close('all')
+
+@contextlib.contextmanager
+def _backend_agg():
+    '''
+    Usa el backend no interactivo 'Agg' mientras se mide y luego restaura el de la sesión,
+    para que los 'plt.show()' de 'utils' no muestren figuras en un notebook.
+    '''
+    anterior = matplotlib.get_backend()
+    plt.switch_backend('Agg')
+    try:
+        yield
+    finally:
+        plt.switch_backend(anterior)
+
+def mide_funcion(funcion, df, repeticiones=3):
+    '''
+    Mide el tiempo y el pico de memoria de una función.
+
+    El tiempo es el mínimo de varias repeticiones. La memoria se mide en una ejecución
+    aparte con 'tracemalloc', para que su costo no afecte el tiempo.
+
+    Parameters:
+        funcion (callable): La función, que recibe el DataFrame.
+        df (pandas.DataFrame): Los datos (cada ejecución recibe una copia).
+        repeticiones (int): La cantidad de ejecuciones cronometradas.
+
+    Returns:
+        dict: Los segundos (mínimo y mediana) y el pico de memoria en bytes.
+    '''
+    tiempos = []
+    with _backend_agg():
+        for _ in range(repeticiones):
+            copia = df.copy()
+            gc.collect()
+            inicio = time.perf_counter()
+            _ejecuta(funcion, copia)
+            tiempos.append(time.perf_counter() - inicio)
+
+        copia = df.copy()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            _ejecuta(funcion, copia)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {'segundos': min(tiempos), 'segundos_mediana': float(np.median(tiempos)), 'pico_bytes': pico}
+
+def ejecuta_benchmark(tamaños=TAMAÑOS, funciones=None, repeticiones=3, referencia=None, semilla=0):
+    '''
+    Mide todas las funciones (o las indicadas) para cada tamaño de datos sintéticos.
+
+    Parameters:
+        tamaños (list): Las cantidades de víctimas de cada conjunto sintético.
+        funciones (list, optional): Los nombres de 'FUNCIONES' a medir. Por defecto, todas.
+        repeticiones (int): La cantidad de ejecuciones cronometradas por medición.
+        referencia (dict, optional): Los datos de 'carga_referencia'. Por defecto, se cargan.
+        semilla (int): La semilla para generar los datos.
+
+    Returns:
+        pandas.DataFrame: Una fila por función y tamaño con el tiempo y la memoria.
+    '''
+    referencia = carga_referencia() if referencia is None else referencia
+    funciones = list(FUNCIONES) if funciones is None else funciones
+    filas = []
+    for n in tamaños:
+        datos = genera_sinteticos(referencia, n, semilla)
+        for nombre in funciones:
+            entrada, funcion = FUNCIONES[nombre]
+            medicion = mide_funcion(funcion, datos[entrada], repeticiones)
+            filas.append({'funcion': nombre, 'n': n, 'filas_entrada': len(datos[entrada]), **medicion})
+        del datos
+    return pd.DataFrame(filas)
+
+def guarda_resultados(resultados, ruta):
+    '''
+    Guarda los resultados en JSON junto con los datos del entorno de ejecución.
+
+    Parameters:
+        resultados (pandas.DataFrame): Los resultados de 'ejecuta_benchmark'.
+        ruta (str): La ruta del archivo JSON.
+
+    Returns:
+        None
+    '''
+    contenido = {'entorno': {'python': platform.python_version(), 'pandas': pd.__version__,
+                             'numpy': np.__version__, 'plataforma': platform.platform(),
+                             'fecha': time.strftime('%Y-%m-%dT%H:%M:%S')},
+                 'resultados': resultados.to_dict(orient='records')}
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(contenido, archivo, ensure_ascii=False, indent=2)
+
+def carga_resultados(ruta):
+    '''
+    Carga los resultados guardados con 'guarda_resultados'.
+
+    Parameters:
+        ruta (str): La ruta del archivo JSON.
+
+    Returns:
+        pandas.DataFrame: Los resultados.
+    '''
+    with open(ruta, encoding='utf-8') as archivo:
+        return pd.DataFrame(json.load(archivo)['resultados'])
+
+def compara_con_base(resultados, base, umbral=0.25, minimo_segundos=0.005, minimo_bytes=1 << 20):
+    '''
+    Compara los resultados con una línea de base y marca las regresiones.
+
+    Parameters:
+        resultados (pandas.DataFrame): Los resultados actuales.
+        base (pandas.DataFrame): Los resultados de referencia.
+        umbral (float): El aumento relativo de tiempo o memoria a partir del cual se marca
+            una regresión (0.25 = 25 % más lento).
+        minimo_segundos (float): Los tiempos base menores a este valor no se marcan, porque
+            sus variaciones son ruido de medición.
+        minimo_bytes (int): Lo mismo para los picos de memoria base menores a este valor.
+
+    Returns:
+        pandas.DataFrame: Para cada función y tamaño, los valores base y actuales, las
+        razones actual / base, las columnas 'regresion_tiempo' y 'regresion_memoria', la
+        columna 'sin_base' (la medición no está en la línea de base) y el 'estado' de la
+        fila: 'regresion', 'sin base' u 'ok'.
+    '''
+    comparacion = resultados.merge(base, on=['funcion', 'n'], how='left', suffixes=('', '_base'))
+    comparacion['razon_tiempo'] = comparacion['segundos'] / comparacion['segundos_base']
+    comparacion['razon_memoria'] = comparacion['pico_bytes'] / comparacion['pico_bytes_base']
+    comparacion['regresion_tiempo'] = ((comparacion['razon_tiempo'] > 1 + umbral)
+                                       & (comparacion['segundos_base'] >= minimo_segundos))
+    comparacion['regresion_memoria'] = ((comparacion['razon_memoria'] > 1 + umbral)
+                                        & (comparacion['pico_bytes_base'] >= minimo_bytes))
+    comparacion['sin_base'] = comparacion['segundos_base'].isna()
+    comparacion['estado'] = np.select([comparacion['regresion_tiempo'] | comparacion['regresion_memoria'],
+                                       comparacion['sin_base']], ['regresion', 'sin base'], 'ok')
+    columnas = ['funcion', 'n', 'segundos_base', 'segundos', 'razon_tiempo', 'pico_bytes_base',
+                'pico_bytes', 'razon_memoria', 'regresion_tiempo', 'regresion_memoria', 'sin_base', 'estado']
+    return comparacion[columnas]
+
+
+if __name__ == '__main__':
+    matplotlib.use('Agg')
+    parser = argparse.ArgumentParser(description='Benchmark de las funciones de utils con datos sintéticos.')
+    parser.add_argument('--tamaños', type=int, nargs='+', default=TAMAÑOS)
+    parser.add_argument('--funciones', nargs='+', default=None)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--salida', default='benchmark_resultados.json')
+    parser.add_argument('--base', default=None, help='JSON de resultados de referencia')
+    parser.add_argument('--umbral', type=float, default=0.25)
+    argumentos = parser.parse_args()
+
+    resultados = ejecuta_benchmark(argumentos.tamaños, argumentos.funciones, argumentos.repeticiones)
+    guarda_resultados(resultados, argumentos.salida)
+    print(resultados.to_string(index=False))
+
+    if argumentos.base is not None:
+        comparacion = compara_con_base(resultados, carga_resultados(argumentos.base), argumentos.umbral)
+        regresiones = comparacion[comparacion['estado'] == 'regresion']
+        sin_base = comparacion[comparacion['sin_base']]
+        if len(sin_base):
+            print('Sin base (no se comparan):')
+            print(sin_base[['funcion', 'n', 'segundos', 'pico_bytes']].to_string(index=False))
+        print(regresiones.to_string(index=False) if len(regresiones) else 'Sin regresiones')
+        raise SystemExit(1 if len(regresiones) else 0)
@@ -0,0 +1,357 @@
+## CACHÉ DE LOS RESULTADOS DEL EDA SEGÚN LA HUELLA DE LOS DATOS
+# Importaciones
+import hashlib
+import os
+import pickle
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import calculos_eda
+
+# Cantidad de filas de cada bloque que se resume por separado en la huella
+FILAS_BLOQUE = 1 << 16
+
+# Hash de los arreglos de Arrow ya resumidos: id del arreglo -> (referencia débil, hash)
+_HASHES_ARROW = {}
+
+# Hash de las columnas de objetos ya resumidas: id del arreglo -> (referencia débil, hash de los punteros, hash)
+_HASHES_OBJETOS = {}
+
+
+def _hash_buffers(sha, arreglo):
+    '''
+    Agrega a un hash los buffers de un arreglo de Arrow, con su desplazamiento y largo.
+    '''
+    sha.update(f'{arreglo.type}|{arreglo.offset}|{len(arreglo)}'.encode())
+    for buffer in arreglo.buffers():
+        if buffer is not None:
+            sha.update(memoryview(buffer))
+
+def _hash_arrow(arreglo):
+    '''
+    Calcula el hash de un arreglo de Arrow, bloque (chunk) por bloque.
+
+    Los arreglos de Arrow son inmutables (al modificar una columna de texto, pandas crea un
+    arreglo nuevo), por lo que el hash de cada arreglo se recuerda mientras el arreglo exista.
+    '''
+    memorizable = isinstance(arreglo, pa.ChunkedArray)
+    if memorizable:
+        guardado = _HASHES_ARROW.get(id(arreglo))
+        if guardado is not None and guardado[0]() is arreglo:
+            return guardado[1]
+
+    sha = hashlib.sha256()
+    for bloque in (arreglo.chunks if memorizable else [arreglo]):
+        _hash_buffers(sha, bloque)
+    resultado = sha.hexdigest()
+
+    if memorizable:
+        clave = id(arreglo)
+        _HASHES_ARROW[clave] = (weakref.ref(arreglo, lambda _, clave=clave: _HASHES_ARROW.pop(clave, None)), resultado)
+    return resultado
+
+def _hash_objetos(serie):
+    '''
+    Calcula el hash de una columna de objetos, recordándolo mientras el arreglo no cambie.
+
+    Resumir el contenido de objetos de Python es lento, por lo que se guarda el hash de cada
+    arreglo junto con el hash de sus punteros (los bytes del arreglo de objetos). Reemplazar un
+    valor en el lugar cambia el puntero de esa celda, así que alcanza con volver a resumir los
+    punteros, que es tan rápido como resumir una columna numérica, para saber si el hash guardado
+    sigue valiendo.
+    '''
+    valores = serie.to_numpy()
+    punteros = hashlib.sha256(np.ascontiguousarray(valores).tobytes()).hexdigest()
+    # Cada selección de la columna es una vista nueva: se identifica por el arreglo dueño de la memoria
+    raiz = valores
+    while isinstance(raiz.base, np.ndarray):
+        raiz = raiz.base
+    clave = (id(raiz), valores.ctypes.data, valores.shape, valores.strides)
+    guardado = _HASHES_OBJETOS.get(clave)
+    if guardado is not None and guardado[0]() is raiz and guardado[1] == punteros:
+        return guardado[2]
+
+    resultado = hashlib.sha256(pd.util.hash_pandas_object(serie, index=False).to_numpy()).hexdigest()
+    _HASHES_OBJETOS[clave] = (weakref.ref(raiz, lambda _, clave=clave: _HASHES_OBJETOS.pop(clave, None)),
+                              punteros, resultado)
+    return resultado
+
+def _hash_indice(indice):
+    '''
+    Calcula el hash de un índice; un RangeIndex se resume por su inicio, fin y paso.
+    '''
+    if isinstance(indice, pd.RangeIndex):
+        return hashlib.sha256(f'{indice.start}|{indice.stop}|{indice.step}'.encode()).hexdigest()
+    return _hash_columna(pd.Series(indice, name='__indice__'))
+
+def _hash_columna(serie, filas_bloque=FILAS_BLOQUE):
+    '''
+    Calcula el hash del contenido de una columna, bloque por bloque de filas.
+
+    Las columnas numéricas, de fechas y categóricas se resumen directamente a partir de su
+    memoria y las de texto de Arrow a partir de sus buffers, sin pasar por Python. Sólo las
+    columnas de objetos mixtos se resumen con 'pandas.util.hash_pandas_object'.
+    '''
+    sha = hashlib.sha256()
+    sha.update(f'{serie.name}|{serie.dtype}'.encode())
+
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        sha.update(_hash_columna(pd.Series(serie.cat.categories)).encode())
+        valores = serie.cat.codes.to_numpy()
+    elif hasattr(serie.array, '__arrow_array__'):
+        sha.update(_hash_arrow(serie.array.__arrow_array__()).encode())
+        return sha.hexdigest()
+    elif serie.dtype.kind in 'biufcmM':
+        valores = serie.to_numpy()
+    else:
+        sha.update(_hash_objetos(serie).encode())
+        return sha.hexdigest()
+
+    valores = np.ascontiguousarray(valores)
+    for inicio in range(0, len(valores), filas_bloque):
+        sha.update(valores[inicio:inicio + filas_bloque].view(np.uint8))
+    return sha.hexdigest()
+
+def huella_dataframe(df, columnas=None, filas_bloque=FILAS_BLOQUE):
+    '''
+    Calcula una huella del contenido de un DataFrame: su esquema y el hash de cada columna.
+
+    Dos DataFrames con la misma huella tienen las mismas columnas, tipos, índice y valores,
+    por lo que cualquier modificación de los datos cambia la huella. Si se indican columnas,
+    sólo se resumen esas columnas (y el índice).
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame.
+        columnas (list, optional): Las columnas que se resumen. Por defecto, todas.
+        filas_bloque (int): La cantidad de filas de cada bloque que se resume.
+
+    Returns:
+        str: La huella en formato hexadecimal.
+    '''
+    if columnas is None:
+        columnas = [df.iloc[:, posicion] for posicion in range(df.shape[1])]
+    else:
+        columnas = [df[columna] for columna in columnas]
+
+    # El hash libera el GIL, por lo que las columnas se resumen en paralelo con hilos
+    if len(columnas) > 1:
+        with ThreadPoolExecutor() as ejecutor:
+            hashes = list(ejecutor.map(lambda serie: _hash_columna(serie, filas_bloque), columnas))
+    else:
+        hashes = [_hash_columna(serie, filas_bloque) for serie in columnas]
+
+    sha = hashlib.sha256(f'{len(df)}|{len(columnas)}'.encode())
+    sha.update(_hash_indice(df.index).encode())
+    for hash_columna in hashes:
+        sha.update(hash_columna.encode())
+    return sha.hexdigest()
+
+def _firma_funcion(funcion):
+    '''
+    Identifica una función por su nombre y su código, para invalidar la caché si cambia.
+    '''
+    codigo = getattr(funcion, '__code__', None)
+    contenido = b'' if codigo is None else codigo.co_code + repr(codigo.co_consts).encode()
+    return f'{funcion.__module__}.{funcion.__qualname__}:{hashlib.blake2b(contenido, digest_size=8).hexdigest()}'
+
+
+class CacheResultados:
+    '''
+    Caché de dos niveles para resultados de cálculos sobre DataFrames.
+
+    El primer nivel guarda los resultados en memoria y descarta los menos usados (LRU). El
+    segundo, opcional, los guarda en disco y, al superar el tamaño máximo, borra los archivos
+    usados hace más tiempo. La clave combina la función, sus argumentos y la huella del
+    DataFrame, por lo que un cambio en los datos invalida los resultados anteriores. Los
+    resultados devueltos desde memoria son compartidos con la caché y no deben modificarse.
+
+    Parameters:
+        max_entradas (int): La cantidad máxima de resultados en memoria.
+        directorio (str, optional): El directorio del nivel en disco. Si no se indica, sólo
+            se usa la memoria.
+        max_bytes_disco (int): El tamaño máximo del nivel en disco.
+    '''
+
+    def __init__(self, max_entradas=128, directorio=None, max_bytes_disco=512 * 2**20):
+        self.max_entradas = max_entradas
+        self.directorio = directorio
+        self.max_bytes_disco = max_bytes_disco
+        self.memoria = OrderedDict()
+        self.metricas = {'aciertos_memoria': 0, 'aciertos_disco': 0, 'fallos': 0,
+                         'desalojos_memoria': 0, 'desalojos_disco': 0}
+        if directorio is not None:
+            os.makedirs(directorio, exist_ok=True)
+
+    def clave(self, funcion, df, args=(), kwargs=None, columnas=None):
+        '''
+        Calcula la clave de una llamada a partir de la función, sus argumentos y la huella del DataFrame
+        (sólo de las columnas indicadas, si se indican).
+        '''
+        argumentos = pickle.dumps((args, sorted((kwargs or {}).items())), protocol=pickle.HIGHEST_PROTOCOL)
+        sha = hashlib.blake2b(digest_size=20)
+        sha.update(_firma_funcion(funcion).encode())
+        sha.update(argumentos)
+        sha.update(huella_dataframe(df, columnas).encode())
+        return sha.hexdigest()
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f'{clave}.pkl')
+
+    def obtiene(self, clave):
+        '''
+        Busca un resultado en memoria y luego en disco.
+
+        Returns:
+            tuple: Si se encontró el resultado y el resultado (o None).
+        '''
+        if clave in self.memoria:
+            self.memoria.move_to_end(clave)
+            self.metricas['aciertos_memoria'] += 1
+            return True, self.memoria[clave]
+
+        if self.directorio is not None and os.path.exists(self._ruta(clave)):
+            with open(self._ruta(clave), 'rb') as archivo:
+                valor = pickle.load(archivo)
+            # Se actualiza la fecha de uso para el desalojo por antigüedad
+            os.utime(self._ruta(clave))
+            self.metricas['aciertos_disco'] += 1
+            self._guarda_en_memoria(clave, valor)
+            return True, valor
+
+        self.metricas['fallos'] += 1
+        return False, None
+
+    def _guarda_en_memoria(self, clave, valor):
+        self.memoria[clave] = valor
+        self.memoria.move_to_end(clave)
+        while len(self.memoria) > self.max_entradas:
+            self.memoria.popitem(last=False)
+            self.metricas['desalojos_memoria'] += 1
+
+    def guarda(self, clave, valor):
+        '''
+        Guarda un resultado en memoria y, si corresponde, en disco.
+        '''
+        self._guarda_en_memoria(clave, valor)
+        if self.directorio is None:
+            return
+        # Se escribe en un archivo temporal y se renombra para no dejar archivos a medio escribir
+        temporal = self._ruta(clave) + '.tmp'
+        with open(temporal, 'wb') as archivo:
+            pickle.dump(valor, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, self._ruta(clave))
+        self._recorta_disco()
+
+    def _recorta_disco(self):
+        '''
+        Borra los archivos usados hace más tiempo hasta respetar el tamaño máximo en disco.
+        '''
+        archivos = []
+        for nombre in os.listdir(self.directorio):
+            if nombre.endswith('.pkl'):
+                estado = os.stat(os.path.join(self.directorio, nombre))
+                archivos.append((estado.st_mtime_ns, estado.st_size, nombre))
+        total = sum(tamaño for _, tamaño, _ in archivos)
+        for _, tamaño, nombre in sorted(archivos):
+            if total <= self.max_bytes_disco:
+                break
+            os.remove(os.path.join(self.directorio, nombre))
+            total -= tamaño
+            self.metricas['desalojos_disco'] += 1
+
+    def llama(self, funcion, df, *args, **kwargs):
+        '''
+        Ejecuta 'funcion(df, *args, **kwargs)' o devuelve el resultado guardado.
+        '''
+        return self.llama_columnas(funcion, df, None, args, kwargs)
+
+    def llama_columnas(self, funcion, df, columnas, args=(), kwargs=None):
+        '''
+        Ejecuta 'funcion(df[columnas], *args, **kwargs)' o devuelve el resultado guardado.
+
+        La huella sólo resume las columnas indicadas y la función recibe sólo esas columnas,
+        por lo que una columna no declarada produce un error en lugar de un resultado viejo.
+        Con 'columnas=None' se usa el DataFrame completo.
+        '''
+        kwargs = kwargs or {}
+        clave = self.clave(funcion, df, args, kwargs, columnas)
+        encontrado, valor = self.obtiene(clave)
+        if not encontrado:
+            valor = funcion(df if columnas is None else df[list(columnas)], *args, **kwargs)
+            self.guarda(clave, valor)
+        return valor
+
+    def resumen(self):
+        '''
+        Devuelve las métricas de aciertos y fallos y el tamaño de cada nivel.
+
+        Returns:
+            dict: Las métricas, la tasa de aciertos y la cantidad de entradas y bytes.
+        '''
+        metricas = dict(self.metricas)
+        consultas = metricas['aciertos_memoria'] + metricas['aciertos_disco'] + metricas['fallos']
+        metricas['tasa_aciertos'] = (consultas - metricas['fallos']) / consultas if consultas else 0.0
+        metricas['entradas_memoria'] = len(self.memoria)
+        if self.directorio is not None:
+            archivos = [os.path.join(self.directorio, n) for n in os.listdir(self.directorio) if n.endswith('.pkl')]
+            metricas['entradas_disco'] = len(archivos)
+            metricas['bytes_disco'] = sum(os.path.getsize(ruta) for ruta in archivos)
+        return metricas
+
+    def limpia(self):
+        '''
+        Vacía ambos niveles de la caché y reinicia las métricas.
+        '''
+        self.memoria.clear()
+        self.metricas = dict.fromkeys(self.metricas, 0)
+        if self.directorio is not None:
+            for nombre in os.listdir(self.directorio):
+                if nombre.endswith('.pkl'):
+                    os.remove(os.path.join(self.directorio, nombre))
+
+
+# Caché que usan por defecto las funciones del EDA (sólo en memoria)
+CACHE_EDA = CacheResultados()
+
+def memoriza(funcion, cache=None, columnas=None):
+    '''
+    Envuelve una función 'funcion(df, ...)' para que use la caché.
+
+    Parameters:
+        funcion (callable): La función, que recibe un DataFrame como primer argumento.
+        cache (CacheResultados, optional): La caché. Por defecto, 'CACHE_EDA'.
+        columnas (list, optional): Las columnas que lee la función. Si se indican, la huella
+            sólo resume esas columnas.
+
+    Returns:
+        callable: La función memorizada.
+    '''
+    def memorizada(df, *args, **kwargs):
+        return (CACHE_EDA if cache is None else cache).llama_columnas(funcion, df, columnas, args, kwargs)
+    memorizada.__name__ = funcion.__name__
+    memorizada.__doc__ = funcion.__doc__
+    memorizada.__wrapped__ = funcion
+    return memorizada
+
+def calcula(nombre, df, cache=None):
+    '''
+    Ejecuta un cálculo del EDA de 'calculos_eda.CALCULOS' usando la caché.
+
+    La huella sólo resume las columnas que lee el cálculo ('calculos_eda.COLUMNAS_CALCULO'), por
+    lo que un acierto cuesta mucho menos que volver a calcular.
+
+    Parameters:
+        nombre (str): El nombre del cálculo, por ejemplo 'victimas_participantes'.
+        df (pandas.DataFrame): Los datos.
+        cache (CacheResultados, optional): La caché. Por defecto, 'CACHE_EDA'.
+
+    Returns:
+        ResultadoEDA: El resultado del cálculo.
+    '''
+    return (CACHE_EDA if cache is None else cache).llama_columnas(calculos_eda.CALCULOS[nombre], df,
+                                                                   calculos_eda.COLUMNAS_CALCULO.get(nombre))
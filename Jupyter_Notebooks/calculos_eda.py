@@ -0,0 +1,391 @@
+## CÁLCULOS DEL EDA (SIN GRÁFICOS NI IMPRESIONES)
+# Importaciones
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+import efectos
+
+DIAS_SEMANA = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+
+
+@dataclass(frozen=True)
+class ResultadoEDA:
+    '''
+    Resultado de un cálculo del EDA, listo para graficar o reutilizar.
+
+    Attributes:
+        nombre (str): El nombre del cálculo (coincide con la clave en 'CALCULOS').
+        datos (pandas.DataFrame, pandas.Series o dict): Los datos agregados que se grafican.
+        resumen (dict): Los valores resumen que se informan junto al gráfico.
+    '''
+    nombre: str
+    datos: object
+    resumen: dict = field(default_factory=dict)
+
+
+def extrae_hora_entera(serie):
+    '''
+    Extrae la hora (0 a 23) de una columna de horas de forma vectorizada.
+
+    Acepta columnas con objetos time (como las que deja 'convertir_columna_a_time'),
+    textos con formato "HH:MM:SS" (como los que se leen del archivo limpio), columnas
+    de tipo datetime o de tipo timedelta (como las del esquema compacto).
+
+    Parameters:
+        serie (pandas.Series): La columna de horas.
+
+    Returns:
+        pandas.Series: Una serie de enteros con la hora de cada registro (NaN si falta la hora).
+    '''
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.dt.hour
+    if pd.api.types.is_timedelta64_dtype(serie):
+        horas = serie.dt.components.hours
+        return horas if horas.isna().any() else horas.astype(int)
+    # El texto de un objeto time siempre comienza con la hora en dos dígitos
+    horas = pd.to_numeric(serie.astype(str).str.slice(0, 2), errors='coerce')
+    # Sólo si hay horas faltantes el resultado queda como float con NaN
+    return horas if horas.isna().any() else horas.astype(int)
+
+def categoriza_momento_dia(horas):
+    '''
+    Versión vectorizada de 'crea_categoria_momento_dia' para una columna completa.
+
+    Clasifica las horas enteras en las mismas franjas horarias utilizando 'pd.cut'.
+
+    Parameters:
+        horas (pandas.Series): Las horas enteras (0 a 23) a clasificar.
+
+    Returns:
+        pandas.Series: Una serie con la categoría de tiempo de cada hora.
+    '''
+    categorias = pd.cut(horas, bins=[-1, 5, 10, 13, 18, 23],
+                        labels=['Madrugada', 'Mañana', 'Medio día', 'Tarde', 'Noche'])
+    return categorias.astype(object)
+
+def categoriza_tipo_dia(dia_semana):
+    '''
+    Clasifica el día de la semana (0 = lunes, 6 = domingo) en 'Semana' o 'Fin de Semana'.
+
+    Parameters:
+        dia_semana (pandas.Series): El número de día de la semana.
+
+    Returns:
+        numpy.ndarray: Un arreglo con el tipo de día de cada registro.
+    '''
+    return np.where(dia_semana >= 5, 'Fin de Semana', 'Semana')
+
+def cohen(group1, group2):
+    '''
+    Calcula el tamaño del efecto de Cohen d para dos grupos.
+
+    Parameters:
+        grupo1: El primer grupo.
+        grupo2: El segundo grupo.
+
+    Returns:
+        El tamaño del efecto de Cohen d.
+    '''
+    diff = group1.mean() - group2.mean()
+    var1, var2 = group1.var(), group2.var()
+    n1, n2 = len(group1), len(group2)
+    pooled_var = (n1 * var1 + n2 * var2) / (n1 + n2)
+    d = diff / np.sqrt(pooled_var)
+    return d
+
+def _dia_semana(df):
+    '''
+    Devuelve el día de la semana (0 = lunes, 6 = domingo) de cada registro.
+    '''
+    return pd.to_datetime(df['Fecha']).dt.dayofweek
+
+def _conteo(serie, columna_conteo='count'):
+    '''
+    Cuenta los valores de una columna en orden de aparición, como lo hace 'sns.countplot'.
+    '''
+    conteo = serie.value_counts(sort=False)
+    orden = pd.unique(serie.dropna())
+    return conteo.reindex(orden).rename(columna_conteo).rename_axis(serie.name).reset_index()
+
+def calcula_accidentes_mensuales(df):
+    '''
+    Calcula la cantidad de víctimas por mes para cada año.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame que contiene los datos de accidentes.
+
+    Returns:
+        ResultadoEDA: 'datos' es un diccionario con un DataFrame (víctimas por mes) por año.
+    '''
+    # Se agrupa una única vez por año y mes
+    agrupado = df.groupby(['Año', 'Mes'])[['Cantidad víctimas']].sum()
+    datos = {year: agrupado.loc[year] for year in df['Año'].unique()}
+    return ResultadoEDA('accidentes_mensuales', datos)
+
+def calcula_victimas_mensuales(df):
+    '''
+    Calcula la cantidad total de víctimas por mes.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame que contiene los datos de accidentes.
+
+    Returns:
+        ResultadoEDA: Las víctimas por mes y el mínimo y máximo mensual.
+    '''
+    data = df.groupby('Mes').agg({'Cantidad víctimas':'sum'}).reset_index()
+    resumen = {'minimo': data['Cantidad víctimas'].min(), 'maximo': data['Cantidad víctimas'].max()}
+    return ResultadoEDA('victimas_mensuales', data, resumen)
+
+def calcula_victimas_por_dia_semana(df):
+    '''
+    Calcula la cantidad de víctimas por día de la semana.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame que contiene los datos de accidentes.
+
+    Returns:
+        ResultadoEDA: Las víctimas por día, el mínimo, el máximo y su diferencia porcentual.
+    '''
+    nombre_dia = pd.Series(np.array(DIAS_SEMANA, dtype=object)[_dia_semana(df).to_numpy()],
+                           index=df.index, name='Nombre día')
+    data = df.groupby(nombre_dia).agg({'Cantidad víctimas':'sum'}).reset_index()
+    minimo, maximo = data['Cantidad víctimas'].min(), data['Cantidad víctimas'].max()
+    resumen = {'minimo': minimo, 'maximo': maximo,
+               'diferencia_%': round((maximo - minimo) / minimo * 100, 2)}
+    return ResultadoEDA('victimas_por_dia_semana', data, resumen)
+
+def calcula_accidentes_por_categoria_tiempo(df):
+    '''
+    Calcula la cantidad y el porcentaje de accidentes por categoría de tiempo.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame que contiene la columna 'Hora'.
+
+    Returns:
+        ResultadoEDA: La cantidad y el porcentaje de accidentes por categoría.
+    '''
+    categorias = categoriza_momento_dia(extrae_hora_entera(df['Hora']))
+    data = categorias.value_counts().reset_index()
+    data.columns = ['Categoria tiempo', 'Cantidad accidentes']
+    data['Porcentaje'] = (data['Cantidad accidentes'] / data['Cantidad accidentes'].sum()) * 100
+    return ResultadoEDA('accidentes_por_categoria_tiempo', data)
+
+def calcula_accidentes_por_horas_del_dia(df):
+    '''
+    Calcula la cantidad de accidentes por hora del día.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame que contiene la columna 'Hora'.
+
+    Returns:
+        ResultadoEDA: La cantidad de accidentes por hora, ordenada por hora.
+    '''
+    data = extrae_hora_entera(df['Hora']).value_counts().reset_index()
+    data.columns = ['Hora del día', 'Cantidad de accidentes']
+    data = data.sort_values(by='Hora del día')
+    return ResultadoEDA('accidentes_por_horas_del_dia', data)
+
+def calcula_accidentes_semana_fin_de_semana(df):
+    '''
+    Calcula la cantidad de accidentes por tipo de día (semana o fin de semana).
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame que contiene la columna 'Fecha'.
+
+    Returns:
+        ResultadoEDA: La cantidad de accidentes por tipo de día.
+    '''
+    data = pd.Series(categoriza_tipo_dia(_dia_semana(df))).value_counts().reset_index()
+    data.columns = ['Tipo de día', 'Cantidad de accidentes']
+    return ResultadoEDA('accidentes_semana_fin_de_semana', data)
+
+def calcula_distribucion_edad(df):
+    '''
+    Devuelve las edades de las víctimas para graficar su distribución.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame que contiene la columna 'Edad'.
+
+    Returns:
+        ResultadoEDA: La serie de edades.
+    '''
+    return ResultadoEDA('distribucion_edad', df['Edad'])
+
+def calcula_distribucion_edad_por_anio(df):
+    '''
+    Devuelve las edades de las víctimas con su año.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame que contiene las columnas 'Año' y 'Edad'.
+
+    Returns:
+        ResultadoEDA: Las columnas 'Año' y 'Edad'.
+    '''
+    return ResultadoEDA('distribucion_edad_por_anio', df[['Año', 'Edad']])
+
+def calcula_accidentes_por_anio_y_sexo(df):
+    '''
+    Devuelve las edades de las víctimas con su año y sexo.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame que contiene las columnas 'Año', 'Edad' y 'Sexo'.
+
+    Returns:
+        ResultadoEDA: Las columnas 'Año', 'Edad' y 'Sexo'.
+    '''
+    return ResultadoEDA('accidentes_por_anio_y_sexo', df[['Año', 'Edad', 'Sexo']])
+
+def calcula_cohen_por_año(df):
+    '''
+    Calcula el tamaño del efecto de Cohen d entre las edades de víctimas masculinas y
+    femeninas para cada año.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame que se va a analizar.
+
+    Returns:
+        ResultadoEDA: Un DataFrame con el año y el estadístico de Cohen.
+    '''
+    # Se calculan los estadísticos de todos los años en una sola pasada
+    años_unicos = df['Año'].unique()
+    efectos_año = efectos.efecto_por_grupo(df, por='Año').reindex(años_unicos)
+    cohen_df = pd.DataFrame({'Año': años_unicos, 'Estadistico de Cohen': efectos_año['d'].to_numpy()})
+    return ResultadoEDA('cohen_por_año', cohen_df)
+
+def calcula_edad_y_rol_victimas(df):
+    '''
+    Devuelve las edades de las víctimas con su rol.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame que contiene las columnas 'Rol' y 'Edad'.
+
+    Returns:
+        ResultadoEDA: Las columnas 'Rol' y 'Edad'.
+    '''
+    return ResultadoEDA('edad_y_rol_victimas', df[['Rol', 'Edad']])
+
+def calcula_distribucion_edad_por_victima(df):
+    '''
+    Devuelve las edades de las víctimas con el tipo de vehículo que usaban.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame que contiene las columnas 'Víctima' y 'Edad'.
+
+    Returns:
+        ResultadoEDA: Las columnas 'Víctima' y 'Edad'.
+    '''
+    return ResultadoEDA('distribucion_edad_por_victima', df[['Víctima', 'Edad']])
+
+def calcula_victimas_sexo_rol_victima(df):
+    '''
+    Calcula la cantidad de víctimas por sexo, por rol y sexo y por tipo de vehículo y sexo.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame que se va a analizar.
+
+    Returns:
+        ResultadoEDA: 'datos' es un diccionario con las claves 'sexo', 'rol' y 'victima'.
+    '''
+    datos = {'sexo': _conteo(df['Sexo']),
+             'rol': df.groupby(['Rol', 'Sexo']).size().unstack(fill_value=0),
+             'victima': df.groupby(['Víctima', 'Sexo']).size().unstack(fill_value=0)}
+    return ResultadoEDA('victimas_sexo_rol_victima', datos)
+
+def calcula_victimas_participantes(df):
+    '''
+    Calcula la cantidad de víctimas por participantes, en orden descendente.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame que se va a analizar.
+
+    Returns:
+        ResultadoEDA: La cantidad ('count') por participantes.
+    '''
+    # Se ordena en forma estable para que los empates queden en orden de aparición
+    # también con columnas categóricas
+    ordenado = _conteo(df['Participantes']).sort_values(by='count', ascending=False, kind='stable')
+    return ResultadoEDA('victimas_participantes', ordenado)
+
+def calcula_acusados(df):
+    '''
+    Calcula la cantidad de acusados por tipo, en orden descendente.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame que se va a analizar.
+
+    Returns:
+        ResultadoEDA: La cantidad ('count') por acusado.
+    '''
+    # Se ordena en forma estable para que los empates queden en orden de aparición
+    # también con columnas categóricas
+    ordenado = _conteo(df['Acusado']).sort_values(by='count', ascending=False, kind='stable')
+    return ResultadoEDA('acusados', ordenado)
+
+def calcula_accidentes_tipo_de_calle(df):
+    '''
+    Calcula la cantidad de víctimas por tipo de calle y en cruces.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame que se va a analizar.
+
+    Returns:
+        ResultadoEDA: 'datos' es un diccionario con las claves 'tipo_de_calle' y 'cruce'.
+    '''
+    datos = {'tipo_de_calle': _conteo(df['Tipo de calle']), 'cruce': _conteo(df['Cruce'])}
+    return ResultadoEDA('accidentes_tipo_de_calle', datos)
+
+# Cálculos disponibles, por nombre (los mismos nombres que usan los gráficos)
+CALCULOS = {
+    'accidentes_mensuales': calcula_accidentes_mensuales,
+    'victimas_mensuales': calcula_victimas_mensuales,
+    'victimas_por_dia_semana': calcula_victimas_por_dia_semana,
+    'accidentes_por_categoria_tiempo': calcula_accidentes_por_categoria_tiempo,
+    'accidentes_por_horas_del_dia': calcula_accidentes_por_horas_del_dia,
+    'accidentes_semana_fin_de_semana': calcula_accidentes_semana_fin_de_semana,
+    'distribucion_edad': calcula_distribucion_edad,
+    'distribucion_edad_por_anio': calcula_distribucion_edad_por_anio,
+    'accidentes_por_anio_y_sexo': calcula_accidentes_por_anio_y_sexo,
+    'cohen_por_año': calcula_cohen_por_año,
+    'edad_y_rol_victimas': calcula_edad_y_rol_victimas,
+    'distribucion_edad_por_victima': calcula_distribucion_edad_por_victima,
+    'victimas_sexo_rol_victima': calcula_victimas_sexo_rol_victima,
+    'victimas_participantes': calcula_victimas_participantes,
+    'acusados': calcula_acusados,
+    'accidentes_tipo_de_calle': calcula_accidentes_tipo_de_calle,
+}
+
+# Columnas que lee cada cálculo: la caché de resultados sólo resume estas columnas en la huella
+COLUMNAS_CALCULO = {
+    'accidentes_mensuales': ['Año', 'Mes', 'Cantidad víctimas'],
+    'victimas_mensuales': ['Mes', 'Cantidad víctimas'],
+    'victimas_por_dia_semana': ['Fecha', 'Cantidad víctimas'],
+    'accidentes_por_categoria_tiempo': ['Hora'],
+    'accidentes_por_horas_del_dia': ['Hora'],
+    'accidentes_semana_fin_de_semana': ['Fecha'],
+    'distribucion_edad': ['Edad'],
+    'distribucion_edad_por_anio': ['Año', 'Edad'],
+    'accidentes_por_anio_y_sexo': ['Año', 'Edad', 'Sexo'],
+    'cohen_por_año': ['Año', 'Edad', 'Sexo'],
+    'edad_y_rol_victimas': ['Rol', 'Edad'],
+    'distribucion_edad_por_victima': ['Víctima', 'Edad'],
+    'victimas_sexo_rol_victima': ['Sexo', 'Rol', 'Víctima'],
+    'victimas_participantes': ['Participantes'],
+    'acusados': ['Acusado'],
+    'accidentes_tipo_de_calle': ['Tipo de calle', 'Cruce'],
+}
+
+def calcula_todos(df, nombres=None):
+    '''
+    Ejecuta todos los cálculos del EDA (o los indicados) sobre un DataFrame.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame limpio de homicidios.
+        nombres (list, optional): Los nombres de los cálculos. Por defecto, todos.
+
+    Returns:
+        dict: Los resultados (ResultadoEDA) por nombre.
+    '''
+    nombres = list(CALCULOS) if nombres is None else nombres
+    return {nombre: CALCULOS[nombre](df) for nombre in nombres}
@@ -0,0 +1,321 @@
+## REGLAS DE CALIDAD DE DATOS PARA HECHOS, VICTIMAS Y EL CONJUNTO LIMPIO
+# Importaciones
+import numpy as np
+import pandas as pd
+
+import coordenadas_caba
+import esquema
+import horas
+import indice_espacial
+import pipeline_etl as etl
+
+# Tipos de regla y los parámetros que usa cada uno:
+#   'requerida'  - el valor no puede faltar
+#   'unica'      - el valor no se puede repetir
+#   'tipo'       - el valor debe poder leerse como 'entero', 'numero', 'fecha' u 'hora'
+#   'rango'      - el valor numérico debe estar entre 'minimo' y 'maximo'
+#   'valores'    - el valor debe estar en 'valores'
+#   'patron'     - el texto debe cumplir la expresión regular 'patron'
+#   'igual'      - el valor debe coincidir con 'derivacion' ('año', 'mes', 'dia' u 'hora') de 'referencia'
+#   'marcador'   - avisa los valores de 'valores' que el ETL reemplaza o imputa
+# Todas aceptan 'permitidos' (valores que se aceptan tal cual, como 'SD' o '.'), 'severidad'
+# ('error' o 'aviso') y 'descripcion'. Los valores faltantes sólo los controla 'requerida'.
+TIPOS_REGLA = ['requerida', 'unica', 'tipo', 'rango', 'valores', 'patron', 'igual', 'marcador']
+
+LON_MIN, LAT_MIN, LON_MAX, LAT_MAX = indice_espacial.LIMITES_CABA
+
+# Categorías de las hojas originales
+VICTIMAS = ['MOTO', 'PEATON', 'AUTO', 'BICICLETA', 'CARGAS', 'PASAJEROS', 'MOVIL', 'OBJETO FIJO', 'PEATON_MOTO', 'SD']
+ACUSADOS = ['AUTO', 'PASAJEROS', 'CARGAS', 'OBJETO FIJO', 'MOTO', 'MULTIPLE', 'BICICLETA', 'OTRO', 'TREN', 'SD']
+
+REGLAS_HECHOS = [
+    {'nombre': 'id_requerido', 'columna': 'Id', 'tipo': 'requerida'},
+    {'nombre': 'id_unico', 'columna': 'Id', 'tipo': 'unica'},
+    {'nombre': 'id_formato', 'columna': 'Id', 'tipo': 'patron', 'patron': r'\d{4}-\d{4}'},
+    {'nombre': 'cantidad_victimas', 'columna': 'Cantidad víctimas', 'tipo': 'rango', 'minimo': 1, 'maximo': 20},
+    {'nombre': 'fecha', 'columna': 'Fecha', 'tipo': 'tipo', 'dato': 'fecha'},
+    {'nombre': 'año_fecha', 'columna': 'Año', 'tipo': 'igual', 'referencia': 'Fecha', 'derivacion': 'año'},
+    {'nombre': 'mes_fecha', 'columna': 'Mes', 'tipo': 'igual', 'referencia': 'Fecha', 'derivacion': 'mes'},
+    {'nombre': 'dia_fecha', 'columna': 'Día', 'tipo': 'igual', 'referencia': 'Fecha', 'derivacion': 'dia'},
+    {'nombre': 'hora', 'columna': 'Hora', 'tipo': 'tipo', 'dato': 'hora', 'permitidos': ['SD']},
+    {'nombre': 'hora_sd', 'columna': 'Hora', 'tipo': 'marcador', 'valores': ['SD'],
+     'descripcion': 'Se imputa la hora más frecuente'},
+    {'nombre': 'hora_entera', 'columna': 'Hora entera', 'tipo': 'rango', 'minimo': 0, 'maximo': 23, 'permitidos': ['SD']},
+    {'nombre': 'hora_entera_hora', 'columna': 'Hora entera', 'tipo': 'igual', 'referencia': 'Hora', 'derivacion': 'hora'},
+    {'nombre': 'tipo_de_calle', 'columna': 'Tipo de calle', 'tipo': 'valores',
+     'valores': ['AVENIDA', 'CALLE', 'AUTOPISTA', 'GRAL PAZ']},
+    {'nombre': 'comuna', 'columna': 'Comuna', 'tipo': 'rango', 'minimo': 1, 'maximo': 15, 'severidad': 'aviso'},
+    {'nombre': 'pos_x', 'columna': 'Pos x', 'tipo': 'rango', 'minimo': LON_MIN, 'maximo': LON_MAX, 'permitidos': ['.']},
+    {'nombre': 'pos_y', 'columna': 'Pos y', 'tipo': 'rango', 'minimo': LAT_MIN, 'maximo': LAT_MAX, 'permitidos': ['.']},
+    {'nombre': 'coordenadas_faltantes', 'columna': 'Pos x', 'tipo': 'marcador', 'valores': ['.'],
+     'descripcion': 'Se reemplazan por 0'},
+    {'nombre': 'xy_caba', 'columna': 'XY (CABA)', 'tipo': 'patron',
+     'patron': f'{coordenadas_caba.PATRON_PUNTO}|{coordenadas_caba.PATRON_PUNTO_FALTANTE}'},
+    {'nombre': 'participantes', 'columna': 'Participantes', 'tipo': 'patron', 'patron': r'[A-Z_ ]+-[A-Z_ ]+|MULTIPLE'},
+    {'nombre': 'victima', 'columna': 'Víctima', 'tipo': 'valores', 'valores': VICTIMAS},
+    {'nombre': 'victima_recodificada', 'columna': 'Víctima', 'tipo': 'marcador', 'valores': ['OBJETO FIJO', 'PEATON_MOTO'],
+     'descripcion': "Se agrupan en 'OTRO'"},
+    {'nombre': 'acusado', 'columna': 'Acusado', 'tipo': 'valores', 'valores': ACUSADOS},
+]
+
+REGLAS_VICTIMAS = [
+    {'nombre': 'id_requerido', 'columna': 'Id', 'tipo': 'requerida'},
+    {'nombre': 'id_formato', 'columna': 'Id', 'tipo': 'patron', 'patron': r'\d{4}-\d{4}'},
+    {'nombre': 'fecha', 'columna': 'Fecha', 'tipo': 'tipo', 'dato': 'fecha'},
+    {'nombre': 'año_fecha', 'columna': 'Año', 'tipo': 'igual', 'referencia': 'Fecha', 'derivacion': 'año'},
+    {'nombre': 'rol', 'columna': 'Rol', 'tipo': 'valores',
+     'valores': ['CONDUCTOR', 'PEATON', 'PASAJERO_ACOMPAÑANTE', 'CICLISTA', 'SD']},
+    {'nombre': 'victima', 'columna': 'Víctima', 'tipo': 'valores', 'valores': VICTIMAS},
+    {'nombre': 'sexo', 'columna': 'Sexo', 'tipo': 'valores', 'valores': ['MASCULINO', 'FEMENINO', 'SD']},
+    {'nombre': 'edad', 'columna': 'Edad', 'tipo': 'rango', 'minimo': 0, 'maximo': 110, 'permitidos': ['SD']},
+    {'nombre': 'edad_entera', 'columna': 'Edad', 'tipo': 'tipo', 'dato': 'entero', 'permitidos': ['SD']},
+    {'nombre': 'datos_sd', 'columna': ['Rol', 'Sexo', 'Edad'], 'tipo': 'marcador', 'valores': ['SD'],
+     'descripcion': 'Se imputan con la moda o la edad media según el sexo'},
+    {'nombre': 'fecha_fallecimiento', 'columna': 'Fecha fallecimiento', 'tipo': 'tipo', 'dato': 'fecha',
+     'permitidos': ['SD']},
+]
+
+REGLAS_LIMPIO = [
+    {'nombre': 'id_requerido', 'columna': 'Id', 'tipo': 'requerida'},
+    {'nombre': 'edad', 'columna': 'Edad', 'tipo': 'rango', 'minimo': 0, 'maximo': 110},
+    {'nombre': 'edad_requerida', 'columna': 'Edad', 'tipo': 'requerida'},
+    {'nombre': 'fecha', 'columna': 'Fecha', 'tipo': 'tipo', 'dato': 'fecha'},
+    {'nombre': 'año_fecha', 'columna': 'Año', 'tipo': 'igual', 'referencia': 'Fecha', 'derivacion': 'año'},
+    {'nombre': 'hora', 'columna': 'Hora', 'tipo': 'tipo', 'dato': 'hora'},
+    {'nombre': 'hora_entera_hora', 'columna': 'Hora entera', 'tipo': 'igual', 'referencia': 'Hora', 'derivacion': 'hora'},
+    {'nombre': 'sexo', 'columna': 'Sexo', 'tipo': 'valores', 'valores': ['MASCULINO', 'FEMENINO']},
+    {'nombre': 'victima', 'columna': 'Víctima', 'tipo': 'valores',
+     'valores': [v for v in VICTIMAS if v not in ('OBJETO FIJO', 'PEATON_MOTO')] + ['OTRO']},
+    {'nombre': 'pos_x', 'columna': 'Pos x', 'tipo': 'rango', 'minimo': LON_MIN, 'maximo': LON_MAX, 'permitidos': ['0', 0, '.']},
+    {'nombre': 'pos_y', 'columna': 'Pos y', 'tipo': 'rango', 'minimo': LAT_MIN, 'maximo': LAT_MAX, 'permitidos': ['0', 0, '.']},
+    {'nombre': 'categoria_tiempo', 'columna': 'Categoria tiempo', 'tipo': 'valores',
+     'valores': esquema.COLUMNAS_CATEGORICAS['Categoria tiempo']},
+    {'nombre': 'tipo_de_dia', 'columna': 'Tipo de día', 'tipo': 'valores', 'valores': esquema.COLUMNAS_CATEGORICAS['Tipo de día']},
+]
+
+# Funciones para obtener un valor derivado a partir de la fecha o de la hora en segundos
+DERIVACIONES = {
+    'año': ('fecha', lambda fechas: fechas.year),
+    'mes': ('fecha', lambda fechas: fechas.month),
+    'dia': ('fecha', lambda fechas: fechas.day),
+    'hora': ('hora', lambda segundos: segundos // 3600),
+}
+
+
+def _convierte(unicos, conversion):
+    '''
+    Convierte los valores únicos de una columna: 'texto', 'numero', 'fecha' u 'hora' (segundos desde la medianoche).
+    '''
+    valores = pd.Series(unicos, dtype=object)
+    if conversion == 'texto':
+        return valores.astype(str).to_numpy(dtype=object)
+    if conversion == 'numero':
+        return pd.to_numeric(valores, errors='coerce').to_numpy(dtype=float)
+    if conversion == 'fecha':
+        # Los números no se interpretan como fechas
+        fechas = pd.to_datetime(valores.where(pd.to_numeric(valores, errors='coerce').isna()), errors='coerce', format='mixed')
+        return pd.DatetimeIndex(fechas)
+    if conversion == 'hora':
+        segundos, fallidos = horas.parsea_horas(valores)
+        return np.where(fallidos, np.nan, segundos)
+    raise ValueError(f'Conversión no soportada: {conversion}')
+
+def _contexto(df):
+    '''
+    Crea el contexto de evaluación: cada columna se factoriza una vez y las conversiones se
+    calculan sobre sus valores únicos, compartidas por todas las reglas.
+    '''
+    return {'df': df, 'codigos': {}, 'conversiones': {}}
+
+def _codigos(contexto, columna):
+    '''
+    Devuelve los códigos y los valores únicos de una columna (los faltantes tienen código -1).
+    '''
+    if columna not in contexto['codigos']:
+        if columna not in contexto['df'].columns:
+            raise KeyError(f'La columna {columna} no está en los datos')
+        contexto['codigos'][columna] = pd.factorize(contexto['df'][columna])
+    return contexto['codigos'][columna]
+
+def _convertidos(contexto, columna, conversion):
+    '''
+    Devuelve la conversión de los valores únicos de una columna, calculada una sola vez.
+    '''
+    clave = (columna, conversion)
+    if clave not in contexto['conversiones']:
+        _, unicos = _codigos(contexto, columna)
+        contexto['conversiones'][clave] = _convierte(np.asarray(unicos, dtype=object), conversion)
+    return contexto['conversiones'][clave]
+
+def _en_valores(unicos, valores):
+    '''
+    Indica qué valores únicos están en la lista, comparando también su texto (por ejemplo, 0 y '0').
+    '''
+    unicos = pd.Series(np.asarray(unicos, dtype=object), dtype=object)
+    return (unicos.isin(valores) | unicos.astype(str).isin([str(valor) for valor in valores])).to_numpy()
+
+def _compila(regla):
+    '''
+    Convierte una regla en una función que recibe el contexto y devuelve el resultado para
+    cada valor único de la columna (True si el valor incumple la regla).
+    '''
+    tipo = regla['tipo']
+    if tipo in ('requerida', 'unica'):
+        # Se resuelven directamente con los códigos de la columna
+        return None
+    if tipo == 'tipo':
+        conversion = {'entero': 'numero', 'numero': 'numero', 'fecha': 'fecha', 'hora': 'hora'}[regla['dato']]
+        def incumple(contexto, columna, unicos):
+            convertidos = np.asarray(_convertidos(contexto, columna, conversion), dtype=float
+                                     if conversion != 'fecha' else 'datetime64[ns]')
+            invalidos = np.isnan(convertidos) if conversion != 'fecha' else np.isnat(convertidos)
+            if regla['dato'] == 'entero':
+                invalidos |= ~np.isnan(convertidos) & (convertidos != np.round(convertidos))
+            return invalidos
+        return incumple
+    if tipo == 'rango':
+        def incumple(contexto, columna, unicos):
+            numeros = _convertidos(contexto, columna, 'numero')
+            return ~((numeros >= regla.get('minimo', -np.inf)) & (numeros <= regla.get('maximo', np.inf)))
+        return incumple
+    if tipo == 'valores':
+        return lambda contexto, columna, unicos: ~_en_valores(unicos, regla['valores'])
+    if tipo == 'marcador':
+        return lambda contexto, columna, unicos: _en_valores(unicos, regla['valores'])
+    if tipo == 'patron':
+        def incumple(contexto, columna, unicos):
+            textos = pd.Series(_convertidos(contexto, columna, 'texto'), dtype=str)
+            return ~textos.str.fullmatch(regla['patron']).to_numpy(dtype=bool)
+        return incumple
+    if tipo == 'igual':
+        conversion, deriva = DERIVACIONES[regla['derivacion']]
+        def incumple(contexto, columna, unicos):
+            # Se compara por fila, porque depende de dos columnas; las filas sin valor no se evalúan
+            codigos, _ = _codigos(contexto, columna)
+            codigos_ref, _ = _codigos(contexto, regla['referencia'])
+            referencia = _convertidos(contexto, regla['referencia'], conversion)
+            esperado = np.asarray(deriva(referencia), dtype=float)[codigos_ref]
+            esperado[codigos_ref < 0] = np.nan
+            valor = _convertidos(contexto, columna, 'numero')[codigos]
+            valor[codigos < 0] = np.nan
+            return ~np.isnan(valor) & ~np.isnan(esperado) & (valor != esperado)
+        incumple.por_fila = True
+        return incumple
+    raise ValueError(f'Tipo de regla no soportado: {tipo}. Opciones: {TIPOS_REGLA}')
+
+def compila_reglas(reglas):
+    '''
+    Valida y compila una especificación de reglas.
+
+    Parameters:
+        reglas (list): Las reglas (diccionarios con 'nombre', 'columna', 'tipo' y sus parámetros).
+
+    Returns:
+        list: Las reglas compiladas, listas para 'evalua_reglas'.
+    '''
+    compiladas = []
+    for regla in reglas:
+        faltantes = {'nombre', 'columna', 'tipo'} - set(regla)
+        if faltantes:
+            raise ValueError(f'A la regla {regla} le faltan los campos {sorted(faltantes)}')
+        if regla.get('severidad', 'error') not in ('error', 'aviso'):
+            raise ValueError(f"Severidad no soportada en la regla {regla['nombre']}: {regla['severidad']}")
+        columnas = [regla['columna']] if isinstance(regla['columna'], str) else list(regla['columna'])
+        compiladas.append({**regla, 'columnas': columnas, 'funcion': _compila(regla),
+                           'severidad': regla.get('severidad', 'aviso' if regla['tipo'] == 'marcador' else 'error')})
+    return compiladas
+
+def _mascara(contexto, regla, columna):
+    '''
+    Evalúa una regla compilada sobre una columna y devuelve la máscara de filas que la incumplen.
+    '''
+    codigos, unicos = _codigos(contexto, columna)
+    if regla['tipo'] == 'requerida':
+        return codigos < 0
+    if regla['tipo'] == 'unica':
+        return (codigos >= 0) & (np.bincount(codigos[codigos >= 0], minlength=len(unicos)) > 1)[codigos]
+    incumple = regla['funcion'](contexto, columna, unicos)
+    if 'permitidos' in regla and not getattr(regla['funcion'], 'por_fila', False):
+        incumple &= ~_en_valores(unicos, regla['permitidos'])
+    if getattr(regla['funcion'], 'por_fila', False):
+        return incumple
+    # Se reparte el resultado de los valores únicos a las filas; los faltantes no incumplen
+    return np.append(incumple, False)[codigos]
+
+def evalua_reglas(df, reglas, muestras=5):
+    '''
+    Evalúa todas las reglas sobre un DataFrame.
+
+    Cada columna se factoriza una sola vez y las conversiones (a número, fecha, hora o texto)
+    se calculan sobre sus valores únicos y se comparten entre las reglas, por lo que el costo
+    depende casi sólo de la cantidad de valores distintos.
+
+    Parameters:
+        df (pandas.DataFrame): Los datos.
+        reglas (list): Las reglas, compiladas o no.
+        muestras (int): La cantidad de filas de ejemplo por regla.
+
+    Returns:
+        dict: 'resumen' (DataFrame con las violaciones por regla), 'muestras' (filas de ejemplo
+        por regla) e 'invalidas' (máscara de filas que incumplen alguna regla de severidad 'error').
+    '''
+    if reglas and 'funcion' not in reglas[0]:
+        reglas = compila_reglas(reglas)
+    contexto = _contexto(df)
+    filas, ejemplos = [], {}
+    invalidas = np.zeros(len(df), dtype=bool)
+    for regla in reglas:
+        mascara = np.zeros(len(df), dtype=bool)
+        for columna in regla['columnas']:
+            mascara |= _mascara(contexto, regla, columna)
+        violaciones = int(mascara.sum())
+        posiciones = np.flatnonzero(mascara)[:muestras]
+        if violaciones:
+            ejemplos[regla['nombre']] = df.iloc[posiciones][regla['columnas'] + [regla['referencia']]
+                                                            if 'referencia' in regla else regla['columnas']]
+        if regla['severidad'] == 'error':
+            invalidas |= mascara
+        filas.append({'regla': regla['nombre'], 'columna': ', '.join(regla['columnas']), 'tipo': regla['tipo'],
+                      'severidad': regla['severidad'], 'violaciones': violaciones,
+                      'porcentaje': round(100 * violaciones / len(df), 2) if len(df) else 0.0,
+                      'ejemplos': df.index[posiciones].tolist(), 'descripcion': regla.get('descripcion', '')})
+    return {'resumen': pd.DataFrame(filas).set_index('regla'), 'muestras': ejemplos,
+            'invalidas': pd.Series(invalidas, index=df.index)}
+
+def exige_calidad(df, reglas, tolerancia=0.0):
+    '''
+    Controla los datos antes de ingresarlos: falla si alguna regla de severidad 'error' se
+    incumple en más de 'tolerancia' (proporción de filas).
+
+    Parameters:
+        df (pandas.DataFrame): Los datos.
+        reglas (list): Las reglas, compiladas o no.
+        tolerancia (float): La proporción de filas que puede incumplir cada regla.
+
+    Returns:
+        dict: El resultado de 'evalua_reglas', si los datos pasan el control.
+    '''
+    resultado = evalua_reglas(df, reglas)
+    resumen = resultado['resumen']
+    fallidas = resumen[(resumen['severidad'] == 'error') & (resumen['violaciones'] > tolerancia * len(df))]
+    if not fallidas.empty:
+        detalle = ', '.join(f"{regla} ({fila['violaciones']} filas, p. ej. {fila['ejemplos']})"
+                            for regla, fila in fallidas.iterrows())
+        raise ValueError(f'Los datos no cumplen las reglas de calidad: {detalle}')
+    return resultado
+
+def valida_excel(ruta_excel, muestras=5):
+    '''
+    Evalúa las reglas de HECHOS y VICTIMAS sobre el libro de Excel original.
+
+    Parameters:
+        ruta_excel (str): La ruta del libro de Excel.
+        muestras (int): La cantidad de filas de ejemplo por regla.
+
+    Returns:
+        dict: El resultado de 'evalua_reglas' de cada hoja.
+    '''
+    hojas = {'HECHOS': (etl.RENOMBRES_HECHOS, REGLAS_HECHOS), 'VICTIMAS': (etl.RENOMBRES_VICTIMAS, REGLAS_VICTIMAS)}
+    datos = pd.read_excel(ruta_excel, sheet_name=list(hojas))
+    return {hoja: evalua_reglas(etl.normaliza_columnas(datos[hoja], renombres), reglas, muestras)
+            for hoja, (renombres, reglas) in hojas.items()}
@@ -0,0 +1,256 @@
+## FUNCIONES PARA LA CARGA DE LOS DATOS CON CACHÉ COLUMNAR
+# Importaciones
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# Prefijo de las columnas auxiliares que guardan el tipo de cada valor en columnas mixtas
+PREFIJO_TIPO = '__tipo__'
+
+# Códigos para los tipos de Python que aparecen mezclados en las hojas de Excel
+TIPO_NULO, TIPO_STR, TIPO_INT, TIPO_FLOAT, TIPO_DATETIME, TIPO_TIME = range(6)
+
+FORMATO_DATETIME = '%Y-%m-%d %H:%M:%S.%f'
+FORMATO_TIME = '%H:%M:%S.%f'
+
+
+def huella_archivo(ruta, tamaño_bloque=1 << 20):
+    '''
+    Calcula el hash SHA-256 del contenido de un archivo.
+
+    Parameters:
+        ruta (str): La ruta del archivo.
+        tamaño_bloque (int): La cantidad de bytes que se leen en cada paso.
+
+    Returns:
+        str: El hash del archivo en formato hexadecimal.
+    '''
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(tamaño_bloque), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+def _rutas_cache(ruta_excel, directorio_cache):
+    '''
+    Devuelve el directorio de caché y la ruta del manifiesto para un libro de Excel.
+    '''
+    if directorio_cache is None:
+        directorio_cache = os.path.join(os.path.dirname(os.path.abspath(ruta_excel)), '.cache')
+    nombre = os.path.splitext(os.path.basename(ruta_excel))[0]
+    return directorio_cache, os.path.join(directorio_cache, f'{nombre}.json')
+
+def _codifica_columna_mixta(serie):
+    '''
+    Separa una columna con tipos mezclados en un texto y un código de tipo por valor.
+
+    Las hojas de Excel mezclan, por ejemplo, objetos time con textos en 'HORA' o enteros
+    con 'SD' en 'EDAD'. Parquet y Arrow necesitan un tipo único por columna, por lo que
+    se guarda cada valor como texto junto con el tipo original para poder reconstruirlo.
+    '''
+    tipos = np.full(len(serie), TIPO_STR, dtype=np.int8)
+    textos = np.empty(len(serie), dtype=object)
+    for i, valor in enumerate(serie.to_numpy()):
+        if valor is None or (isinstance(valor, float) and np.isnan(valor)) or valor is pd.NaT:
+            tipos[i], textos[i] = TIPO_NULO, None
+        elif isinstance(valor, str):
+            textos[i] = valor
+        elif isinstance(valor, (bool, np.bool_)):
+            textos[i] = str(valor)
+        elif isinstance(valor, (int, np.integer)):
+            tipos[i], textos[i] = TIPO_INT, str(valor)
+        elif isinstance(valor, (float, np.floating)):
+            tipos[i], textos[i] = TIPO_FLOAT, repr(float(valor))
+        elif hasattr(valor, 'date') and hasattr(valor, 'hour'):
+            tipos[i], textos[i] = TIPO_DATETIME, valor.strftime(FORMATO_DATETIME)
+        elif hasattr(valor, 'hour'):
+            tipos[i], textos[i] = TIPO_TIME, valor.strftime(FORMATO_TIME)
+        else:
+            textos[i] = str(valor)
+    return pd.Series(textos, index=serie.index, dtype=object), tipos
+
+def _decodifica_columna_mixta(textos, tipos):
+    '''
+    Reconstruye los valores de Python de una columna mixta convirtiendo cada tipo en bloque.
+    '''
+    resultado = np.full(len(textos), None, dtype=object)
+    textos = pd.Series(textos, dtype=object)
+    for tipo in np.unique(tipos):
+        mascara = tipos == tipo
+        grupo = textos[mascara]
+        if tipo == TIPO_STR:
+            resultado[mascara] = grupo.to_numpy()
+        elif tipo == TIPO_INT:
+            resultado[mascara] = grupo.astype('int64').astype(object).to_numpy()
+        elif tipo == TIPO_FLOAT:
+            resultado[mascara] = grupo.astype('float64').astype(object).to_numpy()
+        elif tipo == TIPO_DATETIME:
+            resultado[mascara] = pd.to_datetime(grupo, format=FORMATO_DATETIME).dt.to_pydatetime()
+        elif tipo == TIPO_TIME:
+            resultado[mascara] = pd.to_datetime(grupo, format=FORMATO_TIME).dt.time.to_numpy()
+        else:
+            resultado[mascara] = np.nan
+    return resultado
+
+def _hoja_a_tabla(df):
+    '''
+    Convierte una hoja leída con pandas en una tabla de Arrow tipada.
+
+    Returns:
+        tuple: La tabla de Arrow y la lista de columnas que se guardaron como mixtas.
+    '''
+    columnas = {}
+    mixtas = []
+    for columna in df.columns:
+        serie = df[columna]
+        if serie.dtype == object:
+            tipos_presentes = set(serie.dropna().map(type))
+            if len(tipos_presentes) > 1:
+                textos, tipos = _codifica_columna_mixta(serie)
+                columnas[columna] = pa.array(textos, type=pa.string())
+                columnas[PREFIJO_TIPO + columna] = pa.array(tipos, type=pa.int8())
+                mixtas.append(columna)
+                continue
+        columnas[columna] = pa.array(serie)
+    return pa.table(columnas), mixtas
+
+def _manifiesto_vigente(ruta_excel, ruta_manifiesto):
+    '''
+    Devuelve el manifiesto de la caché si sigue correspondiendo al libro de Excel, o None.
+
+    Si el tamaño y la fecha de modificación coinciden no se vuelve a leer el archivo.
+    Si la fecha cambió pero el hash del contenido es el mismo (por ejemplo, tras copiar
+    el archivo) se actualiza la fecha en el manifiesto y se reutiliza la caché.
+    '''
+    if not os.path.exists(ruta_manifiesto):
+        return None
+    with open(ruta_manifiesto, encoding='utf-8') as archivo:
+        manifiesto = json.load(archivo)
+
+    estado = os.stat(ruta_excel)
+    if manifiesto['mtime_ns'] == estado.st_mtime_ns and manifiesto['tamaño'] == estado.st_size:
+        return manifiesto
+    if manifiesto['sha256'] != huella_archivo(ruta_excel):
+        return None
+
+    manifiesto['mtime_ns'] = estado.st_mtime_ns
+    manifiesto['tamaño'] = estado.st_size
+    with open(ruta_manifiesto, 'w', encoding='utf-8') as archivo:
+        json.dump(manifiesto, archivo, ensure_ascii=False, indent=1)
+    return manifiesto
+
+def genera_cache_excel(ruta_excel, directorio_cache=None):
+    '''
+    Convierte todas las hojas de un libro de Excel a archivos Arrow tipados.
+
+    El libro se lee una única vez con openpyxl y cada hoja se guarda en un archivo Arrow
+    (formato Feather v2, sin compresión) para poder abrirla luego con memoria mapeada.
+    Se escribe un manifiesto con el hash y la fecha de modificación del libro, que se
+    utilizan como clave de la caché.
+
+    Parameters:
+        ruta_excel (str): La ruta del libro de Excel.
+        directorio_cache (str, optional): El directorio de la caché. Por defecto es '.cache'
+            dentro del directorio del libro.
+
+    Returns:
+        dict: El manifiesto de la caché generada.
+    '''
+    directorio_cache, ruta_manifiesto = _rutas_cache(ruta_excel, directorio_cache)
+    os.makedirs(directorio_cache, exist_ok=True)
+    nombre = os.path.splitext(os.path.basename(ruta_excel))[0]
+
+    estado = os.stat(ruta_excel)
+    manifiesto = {'libro': os.path.abspath(ruta_excel),
+                  'sha256': huella_archivo(ruta_excel),
+                  'mtime_ns': estado.st_mtime_ns,
+                  'tamaño': estado.st_size,
+                  'hojas': {}}
+
+    # Se leen todas las hojas en una sola apertura del libro
+    hojas = pd.read_excel(ruta_excel, sheet_name=None)
+    for hoja, df in hojas.items():
+        tabla, mixtas = _hoja_a_tabla(df)
+        archivo = f'{nombre}.{hoja}.arrow'
+        feather.write_feather(tabla, os.path.join(directorio_cache, archivo), compression='uncompressed')
+        manifiesto['hojas'][hoja] = {'archivo': archivo,
+                                     'columnas': [str(c) for c in df.columns],
+                                     'mixtas': mixtas}
+
+    with open(ruta_manifiesto, 'w', encoding='utf-8') as archivo:
+        json.dump(manifiesto, archivo, ensure_ascii=False, indent=1)
+    return manifiesto
+
+def lee_hoja(ruta_excel, hoja, columnas=None, directorio_cache=None):
+    '''
+    Lee una hoja de un libro de Excel a través de la caché columnar.
+
+    La primera vez (o cuando el libro cambió) se genera la caché de todas las hojas con
+    'genera_cache_excel'. Las lecturas siguientes abren el archivo Arrow con memoria
+    mapeada y convierten a pandas sólo las columnas solicitadas. El resultado es el mismo
+    que 'pd.read_excel(ruta_excel, sheet_name=hoja)', incluidos los valores de tipos
+    mezclados como los de la columna 'HORA'.
+
+    Parameters:
+        ruta_excel (str): La ruta del libro de Excel.
+        hoja (str): El nombre de la hoja, por ejemplo 'HECHOS' o 'VICTIMAS'.
+        columnas (list, optional): Las columnas a leer. Por defecto se leen todas.
+        directorio_cache (str, optional): El directorio de la caché.
+
+    Returns:
+        pandas.DataFrame: Los datos de la hoja.
+    '''
+    directorio, ruta_manifiesto = _rutas_cache(ruta_excel, directorio_cache)
+    manifiesto = _manifiesto_vigente(ruta_excel, ruta_manifiesto)
+    if manifiesto is None or hoja not in manifiesto['hojas']:
+        manifiesto = genera_cache_excel(ruta_excel, directorio_cache)
+    if hoja not in manifiesto['hojas']:
+        raise ValueError(f"La hoja '{hoja}' no existe en {ruta_excel}")
+
+    info = manifiesto['hojas'][hoja]
+    if columnas is None:
+        columnas = info['columnas']
+    faltantes = [c for c in columnas if c not in info['columnas']]
+    if faltantes:
+        raise KeyError(f'Columnas inexistentes en la hoja {hoja}: {faltantes}')
+
+    # Se leen sólo las columnas pedidas (y los tipos de las columnas mixtas)
+    a_leer = list(columnas) + [PREFIJO_TIPO + c for c in columnas if c in info['mixtas']]
+    tabla = feather.read_table(os.path.join(directorio, info['archivo']), columns=a_leer, memory_map=True)
+
+    datos = {}
+    for columna in columnas:
+        if columna in info['mixtas']:
+            textos = tabla.column(columna).to_numpy(zero_copy_only=False)
+            tipos = tabla.column(PREFIJO_TIPO + columna).to_numpy()
+            datos[columna] = pd.Series(_decodifica_columna_mixta(textos, tipos), dtype=object)
+        else:
+            datos[columna] = tabla.column(columna).to_pandas()
+    return pd.DataFrame(datos)
+
+def invalida_cache(ruta_excel, directorio_cache=None):
+    '''
+    Elimina la caché columnar de un libro de Excel.
+
+    Parameters:
+        ruta_excel (str): La ruta del libro de Excel.
+        directorio_cache (str, optional): El directorio de la caché.
+
+    Returns:
+        None
+    '''
+    directorio, ruta_manifiesto = _rutas_cache(ruta_excel, directorio_cache)
+    if not os.path.exists(ruta_manifiesto):
+        return
+    with open(ruta_manifiesto, encoding='utf-8') as archivo:
+        manifiesto = json.load(archivo)
+    for info in manifiesto['hojas'].values():
+        ruta = os.path.join(directorio, info['archivo'])
+        if os.path.exists(ruta):
+            os.remove(ruta)
+    os.remove(ruta_manifiesto)
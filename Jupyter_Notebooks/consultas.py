@@ -0,0 +1,254 @@
+## CONSULTAS DIFERIDAS SOBRE EL CONJUNTO LIMPIO DE HOMICIDIOS
+# Importaciones
+import datetime
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Operadores de comparación permitidos en los filtros
+OPERADORES = {
+    '==': lambda campo, valor: campo == valor,
+    '!=': lambda campo, valor: campo != valor,
+    '<': lambda campo, valor: campo < valor,
+    '<=': lambda campo, valor: campo <= valor,
+    '>': lambda campo, valor: campo > valor,
+    '>=': lambda campo, valor: campo >= valor,
+    'in': lambda campo, valor: campo.isin(valor),
+    'not in': lambda campo, valor: ~campo.isin(valor),
+    'entre': lambda campo, valor: (campo >= valor[0]) & (campo <= valor[1]),
+    'nulo': lambda campo, valor: campo.is_null() if valor else ~campo.is_null(),
+}
+
+# Funciones de agregación que se resuelven en Arrow
+AGREGACIONES = ['sum', 'mean', 'min', 'max', 'count', 'count_distinct', 'stddev', 'variance']
+
+# Opciones de las agregaciones: el desvío y la varianza son muestrales (ddof=1), como en pandas
+OPCIONES_AGREGACION = {'stddev': pc.VarianceOptions(ddof=1), 'variance': pc.VarianceOptions(ddof=1)}
+
+
+def abre_datos(fuente):
+    '''
+    Abre la fuente de datos de una consulta sin leerla.
+
+    Parameters:
+        fuente (str or pandas.DataFrame): Un CSV, un Parquet (o un directorio de Parquet) o un DataFrame.
+
+    Returns:
+        pyarrow.dataset.Dataset: El conjunto de datos.
+    '''
+    if isinstance(fuente, pd.DataFrame):
+        return ds.dataset(pa.Table.from_pandas(fuente, preserve_index=False))
+    if os.path.isdir(fuente) or fuente.endswith('.parquet'):
+        return ds.dataset(fuente, format='parquet')
+    return ds.dataset(fuente, format='csv')
+
+def _valor_arrow(valor, tipo):
+    '''
+    Convierte el valor de un filtro al tipo de la columna (por ejemplo, una fecha o una hora en texto).
+    '''
+    if isinstance(valor, (list, tuple, set)):
+        return [_valor_arrow(v, tipo) for v in valor]
+    if pa.types.is_dictionary(tipo):
+        tipo = tipo.value_type
+    # Arrow no convierte textos a horas, por lo que se interpretan antes ('HH:MM:SS')
+    if pa.types.is_time(tipo) and isinstance(valor, str):
+        valor = datetime.time.fromisoformat(valor)
+    escalar = pa.scalar(valor)
+    return escalar if escalar.type == tipo else escalar.cast(tipo)
+
+
+class Consulta:
+    '''
+    Consulta diferida sobre el conjunto limpio de homicidios.
+
+    Cada método agrega un paso al plan y devuelve una consulta nueva, sin leer datos. Al
+    ejecutarla, los filtros y las columnas necesarias se pasan a la lectura del CSV o del
+    Parquet, que sólo lee esas columnas y descarta las filas por bloques (en Parquet, también
+    los grupos de filas completos según sus estadísticas). La agregación se hace en Arrow,
+    por lo que sólo se convierte a pandas el resultado final.
+
+    Ejemplo:
+        Consulta('homicidios_limpio.csv').filtra(Rol='PEATON', Comuna=1,
+            **{'Categoria tiempo': 'Noche', 'Tipo de calle': 'AVENIDA'}).donde('Edad', '>', 60)
+            .agrupa('Año').agrega(victimas=('Cantidad víctimas', 'sum')).ejecuta()
+
+    Parameters:
+        fuente (str or pandas.DataFrame): Un CSV, un Parquet o un DataFrame.
+    '''
+
+    def __init__(self, fuente, plan=None):
+        self.fuente = fuente
+        self.plan = plan or {'filtros': [], 'columnas': None, 'agrupar': [], 'agregaciones': {},
+                             'orden': [], 'limite': None}
+
+    def _con(self, **cambios):
+        return Consulta(self.fuente, {**self.plan, **cambios})
+
+    def donde(self, columna, operador, valor=True):
+        '''
+        Agrega un filtro 'columna operador valor', por ejemplo ('Edad', '>', 60) o
+        ('Comuna', 'in', [1, 3]). Con 'entre' el valor es (mínimo, máximo), inclusive.
+        '''
+        if operador not in OPERADORES:
+            raise ValueError(f'Operador no soportado: {operador}. Opciones: {list(OPERADORES)}')
+        return self._con(filtros=self.plan['filtros'] + [(columna, operador, valor)])
+
+    def filtra(self, **igualdades):
+        '''
+        Agrega filtros de igualdad; una lista de valores se interpreta como 'in'.
+        '''
+        consulta = self
+        for columna, valor in igualdades.items():
+            consulta = consulta.donde(columna, 'in' if isinstance(valor, (list, tuple, set)) else '==', valor)
+        return consulta
+
+    def selecciona(self, *columnas):
+        '''
+        Indica las columnas del resultado (sin agregación).
+        '''
+        return self._con(columnas=list(columnas))
+
+    def agrupa(self, *columnas):
+        '''
+        Indica las columnas por las que se agrupa antes de agregar.
+        '''
+        return self._con(agrupar=list(columnas))
+
+    def agrega(self, **agregaciones):
+        '''
+        Indica las agregaciones como nombre=(columna, función), por ejemplo
+        victimas=('Cantidad víctimas', 'sum'). Ver 'AGREGACIONES'; 'stddev' y 'variance' son
+        muestrales (ddof=1), como 'std' y 'var' de pandas.
+        '''
+        for columna, funcion in agregaciones.values():
+            if funcion not in AGREGACIONES:
+                raise ValueError(f'Agregación no soportada: {funcion}. Opciones: {AGREGACIONES}')
+        return self._con(agregaciones={**self.plan['agregaciones'], **agregaciones})
+
+    def ordena(self, *columnas, ascendente=True):
+        '''
+        Ordena el resultado por las columnas indicadas.
+        '''
+        return self._con(orden=[(columna, 'ascending' if ascendente else 'descending') for columna in columnas])
+
+    def limita(self, filas):
+        '''
+        Devuelve sólo las primeras filas del resultado.
+        '''
+        return self._con(limite=filas)
+
+    def columnas_leidas(self):
+        '''
+        Devuelve las columnas que hace falta leer de la fuente (las demás no se leen).
+        '''
+        columnas = [columna for columna, _, _ in self.plan['filtros']]
+        if self.plan['agregaciones']:
+            columnas += self.plan['agrupar'] + [columna for columna, _ in self.plan['agregaciones'].values()]
+        elif self.plan['columnas'] is not None:
+            columnas += self.plan['columnas'] + [columna for columna, _ in self.plan['orden']]
+        else:
+            return None
+        return list(dict.fromkeys(columnas))
+
+    def predicado(self, esquema):
+        '''
+        Arma la expresión de Arrow con todos los filtros, que se aplica durante la lectura.
+        '''
+        expresion = None
+        for columna, operador, valor in self.plan['filtros']:
+            if columna not in esquema.names:
+                raise KeyError(f'La columna {columna} no está en los datos')
+            if operador != 'nulo':
+                valor = _valor_arrow(valor, esquema.field(columna).type)
+            condicion = OPERADORES[operador](ds.field(columna), valor)
+            expresion = condicion if expresion is None else expresion & condicion
+        return expresion
+
+    def explica(self):
+        '''
+        Describe el plan de la consulta: lectura (con columnas y filtros), agregación, orden y límite.
+
+        Returns:
+            str: El plan.
+        '''
+        lectura = self.columnas_leidas()
+        pasos = [f"Lectura de {self.fuente if isinstance(self.fuente, str) else 'DataFrame'}",
+                 f"  columnas: {'todas' if lectura is None else lectura}",
+                 f"  filtros: {[' '.join(map(str, filtro)) for filtro in self.plan['filtros']] or 'ninguno'}"]
+        if self.plan['agregaciones']:
+            pasos.append(f"Agregación por {self.plan['agrupar'] or 'todo'}: {self.plan['agregaciones']}")
+        elif self.plan['columnas'] is not None:
+            pasos.append(f"Proyección: {self.plan['columnas']}")
+        if self.plan['orden']:
+            pasos.append(f"Orden: {self.plan['orden']}")
+        if self.plan['limite'] is not None:
+            pasos.append(f"Límite: {self.plan['limite']}")
+        return '\n'.join(pasos)
+
+    def ejecuta(self):
+        '''
+        Ejecuta la consulta y materializa el resultado.
+
+        Returns:
+            pandas.DataFrame: El resultado.
+        '''
+        if self.plan['agrupar'] and not self.plan['agregaciones']:
+            raise ValueError("Para agrupar hay que indicar las agregaciones con 'agrega'")
+        datos = abre_datos(self.fuente)
+        tabla = datos.to_table(columns=self.columnas_leidas(), filter=self.predicado(datos.schema))
+
+        if self.plan['agregaciones']:
+            # Cada par (columna, función) distinto se calcula una sola vez, aunque se pida con varios nombres
+            especificacion = list(dict.fromkeys(tuple(agregacion) for agregacion in self.plan['agregaciones'].values()))
+            if self.plan['agrupar']:
+                tabla = tabla.group_by(self.plan['agrupar'], use_threads=False).aggregate(
+                    [(columna, funcion, OPCIONES_AGREGACION.get(funcion)) for columna, funcion in especificacion])
+            else:
+                tabla = pa.table({f'{columna}_{funcion}': [getattr(pc, funcion)(tabla[columna],
+                                                                                 options=OPCIONES_AGREGACION.get(funcion)).as_py()]
+                                  for columna, funcion in especificacion})
+            # Arrow nombra las agregaciones 'columna_función'; se usan los nombres pedidos
+            columnas = {columna: tabla[columna] for columna in self.plan['agrupar']}
+            for nombre, (columna, funcion) in self.plan['agregaciones'].items():
+                columnas[nombre] = tabla[f'{columna}_{funcion}']
+            tabla = pa.table(columnas)
+        elif self.plan['columnas'] is not None:
+            tabla = tabla.select(self.plan['columnas'] + [c for c, _ in self.plan['orden']
+                                                          if c not in self.plan['columnas']])
+
+        if self.plan['orden']:
+            tabla = tabla.sort_by(self.plan['orden'])
+        if self.plan['limite'] is not None:
+            tabla = tabla.slice(0, self.plan['limite'])
+        resultado = tabla.to_pandas()
+        if self.plan['columnas'] is not None and not self.plan['agregaciones']:
+            resultado = resultado[self.plan['columnas']]
+        return resultado
+
+    def __repr__(self):
+        return f'Consulta(\n{self.explica()}\n)'
+
+def convierte_a_parquet(ruta_csv, ruta_parquet, filas_grupo=64_000):
+    '''
+    Convierte el CSV limpio a Parquet por bloques, para que las consultas lean sólo las
+    columnas y los grupos de filas necesarios.
+
+    Parameters:
+        ruta_csv (str): La ruta del CSV limpio.
+        ruta_parquet (str): La ruta del Parquet a generar.
+        filas_grupo (int): La cantidad máxima de filas por grupo de filas.
+
+    Returns:
+        int: La cantidad de filas escritas.
+    '''
+    datos = ds.dataset(ruta_csv, format='csv')
+    filas = 0
+    with pq.ParquetWriter(ruta_parquet, datos.schema) as escritor:
+        for bloque in datos.to_batches():
+            escritor.write_batch(bloque, row_group_size=filas_grupo)
+            filas += bloque.num_rows
+    return filas
@@ -0,0 +1,173 @@
+## LECTURA DE LOS PUNTOS WKT DE 'XY (CABA)' Y CONVERSIÓN ENTRE GAUSS-KRÜGER CABA Y WGS84
+# Importaciones
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Expresiones regulares (sintaxis RE2 de Arrow) para los puntos WKT
+_NUMERO = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+PATRON_PUNTO = r'^\s*(?i:point)\s*\(\s*(?P<x>' + _NUMERO + r')\s+(?P<y>' + _NUMERO + r')\s*\)\s*$'
+PATRON_PUNTO_FALTANTE = r'^\s*((?i:point)\s*\(\s*\.\s+\.\s*\)|0|0\.0|nan|none|<na>|)\s*$'
+
+# Proyección Gauss-Krüger de la Ciudad de Buenos Aires (meridiano central de la ciudad),
+# sobre el elipsoide WGS84 / GRS80
+GAUSS_KRUGER_CABA = {'lat_0': -34.629269, 'lon_0': -58.4633, 'k_0': 0.999998,
+                     'x_0': 100_000.0, 'y_0': 100_000.0,
+                     'a': 6_378_137.0, 'f': 1 / 298.257223563}
+
+
+def _a_arrow(serie):
+    '''
+    Obtiene la columna como arreglo de texto de Arrow (sin copia si ya es texto de Arrow).
+    '''
+    if isinstance(serie.dtype, pd.StringDtype):
+        arreglo = pa.array(serie)
+    else:
+        # Las columnas mixtas (por ejemplo, con el 0 que deja el ETL) se pasan a texto
+        arreglo = pa.array(serie.astype(str), from_pandas=True)
+    return arreglo.combine_chunks() if isinstance(arreglo, pa.ChunkedArray) else arreglo
+
+def parsea_puntos_wkt(serie):
+    '''
+    Convierte una columna de puntos WKT ('Point (x y)') en dos arreglos de coordenadas.
+
+    Toda la columna se procesa con una única expresión regular sobre el búfer de texto de
+    Arrow, sin recorrer las filas en Python. Los valores faltantes ('Point (. .)', el 0
+    que deja el ETL, vacíos o nulos) y los mal formados se informan por separado.
+
+    Parameters:
+        serie (pandas.Series): La columna con los puntos WKT, por ejemplo 'XY (CABA)'.
+
+    Returns:
+        tuple: Cuatro numpy.ndarray del largo de la serie:
+        - x (float64): La primera coordenada (NaN si no se pudo leer).
+        - y (float64): La segunda coordenada (NaN si no se pudo leer).
+        - faltantes (bool): Los registros sin coordenadas.
+        - mal_formados (bool): Los registros con un texto que no es un punto WKT.
+    '''
+    arreglo = _a_arrow(serie)
+    partes = pc.extract_regex(arreglo, PATRON_PUNTO)
+
+    # Las filas que no coinciden con el patrón quedan nulas
+    leidos = pc.is_valid(partes).to_numpy(zero_copy_only=False)
+    x = pc.cast(pc.struct_field(partes, 'x'), pa.float64()).to_numpy(zero_copy_only=False)
+    y = pc.cast(pc.struct_field(partes, 'y'), pa.float64()).to_numpy(zero_copy_only=False)
+
+    faltantes = pc.fill_null(pc.match_substring_regex(arreglo, PATRON_PUNTO_FALTANTE, ignore_case=True), True)
+    faltantes = faltantes.to_numpy(zero_copy_only=False)
+    mal_formados = ~leidos & ~faltantes
+    return x, y, faltantes, mal_formados
+
+def _constantes_elipsoide(proyeccion):
+    '''
+    Calcula la excentricidad y la longitud del arco de meridiano hasta la latitud de origen.
+    '''
+    e2 = proyeccion['f'] * (2 - proyeccion['f'])
+    return e2, e2 / (1 - e2), _arco_meridiano(np.radians(proyeccion['lat_0']), proyeccion['a'], e2)
+
+def _arco_meridiano(phi, a, e2):
+    '''
+    Calcula la longitud del arco de meridiano desde el ecuador hasta la latitud 'phi'.
+    '''
+    return a * ((1 - e2 / 4 - 3 * e2**2 / 64 - 5 * e2**3 / 256) * phi
+                - (3 * e2 / 8 + 3 * e2**2 / 32 + 45 * e2**3 / 1024) * np.sin(2 * phi)
+                + (15 * e2**2 / 256 + 45 * e2**3 / 1024) * np.sin(4 * phi)
+                - (35 * e2**3 / 3072) * np.sin(6 * phi))
+
+def wgs84_a_gauss_kruger(lon, lat, proyeccion=GAUSS_KRUGER_CABA):
+    '''
+    Proyecta longitudes y latitudes WGS84 ('Pos x', 'Pos y') a Gauss-Krüger CABA ('XY (CABA)').
+
+    Se usan las series de la proyección transversa de Mercator, calculadas sobre todos
+    los puntos a la vez.
+
+    Parameters:
+        lon (array-like): Las longitudes en grados.
+        lat (array-like): Las latitudes en grados.
+        proyeccion (dict): Los parámetros de la proyección.
+
+    Returns:
+        tuple: Las coordenadas x e y en metros (numpy.ndarray).
+    '''
+    e2, ep2, m_0 = _constantes_elipsoide(proyeccion)
+    a, k_0 = proyeccion['a'], proyeccion['k_0']
+    phi = np.radians(np.asarray(lat, dtype=float))
+    dlam = np.radians(np.asarray(lon, dtype=float) - proyeccion['lon_0'])
+
+    n = a / np.sqrt(1 - e2 * np.sin(phi)**2)
+    t = np.tan(phi)**2
+    c = ep2 * np.cos(phi)**2
+    A = dlam * np.cos(phi)
+
+    x = proyeccion['x_0'] + k_0 * n * (A + (1 - t + c) * A**3 / 6
+                                       + (5 - 18 * t + t**2 + 72 * c - 58 * ep2) * A**5 / 120)
+    y = proyeccion['y_0'] + k_0 * (_arco_meridiano(phi, a, e2) - m_0 + n * np.tan(phi)
+                                   * (A**2 / 2 + (5 - t + 9 * c + 4 * c**2) * A**4 / 24
+                                      + (61 - 58 * t + t**2 + 600 * c - 330 * ep2) * A**6 / 720))
+    return x, y
+
+def gauss_kruger_a_wgs84(x, y, proyeccion=GAUSS_KRUGER_CABA):
+    '''
+    Convierte coordenadas Gauss-Krüger CABA ('XY (CABA)') a longitud y latitud WGS84.
+
+    Parameters:
+        x (array-like): Las coordenadas x en metros.
+        y (array-like): Las coordenadas y en metros.
+        proyeccion (dict): Los parámetros de la proyección.
+
+    Returns:
+        tuple: La longitud y la latitud en grados (numpy.ndarray).
+    '''
+    e2, ep2, m_0 = _constantes_elipsoide(proyeccion)
+    a, k_0 = proyeccion['a'], proyeccion['k_0']
+    x = np.asarray(x, dtype=float) - proyeccion['x_0']
+    y = np.asarray(y, dtype=float) - proyeccion['y_0']
+
+    # Se calcula la latitud del pie de la perpendicular al meridiano central
+    e1 = (1 - np.sqrt(1 - e2)) / (1 + np.sqrt(1 - e2))
+    mu = (m_0 + y / k_0) / (a * (1 - e2 / 4 - 3 * e2**2 / 64 - 5 * e2**3 / 256))
+    phi_1 = (mu + (3 * e1 / 2 - 27 * e1**3 / 32) * np.sin(2 * mu)
+             + (21 * e1**2 / 16 - 55 * e1**4 / 32) * np.sin(4 * mu)
+             + (151 * e1**3 / 96) * np.sin(6 * mu)
+             + (1097 * e1**4 / 512) * np.sin(8 * mu))
+
+    c_1 = ep2 * np.cos(phi_1)**2
+    t_1 = np.tan(phi_1)**2
+    n_1 = a / np.sqrt(1 - e2 * np.sin(phi_1)**2)
+    r_1 = a * (1 - e2) / (1 - e2 * np.sin(phi_1)**2)**1.5
+    d = x / (n_1 * k_0)
+
+    phi = phi_1 - (n_1 * np.tan(phi_1) / r_1) * (
+        d**2 / 2 - (5 + 3 * t_1 + 10 * c_1 - 4 * c_1**2 - 9 * ep2) * d**4 / 24
+        + (61 + 90 * t_1 + 298 * c_1 + 45 * t_1**2 - 252 * ep2 - 3 * c_1**2) * d**6 / 720)
+    dlam = (d - (1 + 2 * t_1 + c_1) * d**3 / 6
+            + (5 - 2 * c_1 + 28 * t_1 - 3 * c_1**2 + 8 * ep2 + 24 * t_1**2) * d**5 / 120) / np.cos(phi_1)
+    return proyeccion['lon_0'] + np.degrees(dlam), np.degrees(phi)
+
+def valida_coordenadas(df, tolerancia_m=5.0, columna_wkt='XY (CABA)', columnas=('Pos x', 'Pos y')):
+    '''
+    Compara el punto 'XY (CABA)' con 'Pos x' / 'Pos y' proyectados a Gauss-Krüger CABA.
+
+    Parameters:
+        df (pandas.DataFrame): Los datos con las columnas de coordenadas.
+        tolerancia_m (float): La distancia máxima en metros para considerar que coinciden.
+        columna_wkt (str): La columna con los puntos WKT.
+        columnas (tuple): Las columnas de longitud y latitud.
+
+    Returns:
+        pandas.DataFrame: Para cada registro, las coordenadas leídas, la distancia entre ambas
+        representaciones y el estado: 'ok', 'discrepante', 'sin_xy', 'sin_pos' o 'mal_formado'.
+    '''
+    x, y, faltantes, mal_formados = parsea_puntos_wkt(df[columna_wkt])
+    lon = pd.to_numeric(df[columnas[0]], errors='coerce').to_numpy(dtype=float)
+    lat = pd.to_numeric(df[columnas[1]], errors='coerce').to_numpy(dtype=float)
+    sin_pos = ~np.isfinite(lon) | ~np.isfinite(lat) | (lon == 0) | (lat == 0)
+
+    x_pos, y_pos = wgs84_a_gauss_kruger(lon, lat)
+    distancia = np.hypot(x - x_pos, y - y_pos)
+    distancia[sin_pos | faltantes | mal_formados] = np.nan
+
+    estado = np.select([mal_formados, faltantes, sin_pos, distancia > tolerancia_m],
+                       ['mal_formado', 'sin_xy', 'sin_pos', 'discrepante'], default='ok')
+    return pd.DataFrame({'x': x, 'y': y, 'distancia_m': distancia, 'estado': estado}, index=df.index)
@@ -0,0 +1,224 @@
+## CUBO OLAP PRE-AGREGADO PARA LOS RESÚMENES DEL EDA
+# Importaciones
+import time
+
+import numpy as np
+import pandas as pd
+
+import utils
+
+# Dimensiones del cubo y medidas que se agregan
+DIMENSIONES = ['Año', 'Mes', 'Día semana', 'Hora del día', 'Sexo', 'Rol', 'Víctima',
+               'Acusado', 'Comuna', 'Tipo de calle', 'Participantes', 'Cruce']
+MEDIDAS = ['Cantidad víctimas', 'registros']
+
+# Agregados que se materializan al construir el cubo (los que usan los resúmenes del EDA)
+AGREGADOS_FRECUENTES = [('Mes',), ('Año', 'Mes'), ('Día semana',), ('Hora del día',),
+                        ('Sexo',), ('Rol', 'Sexo'), ('Víctima', 'Sexo'), ('Participantes',),
+                        ('Acusado',), ('Tipo de calle',), ('Cruce',), ('Año', 'Sexo')]
+
+DIAS_SEMANA = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+
+
+def construye_cubo(df, dimensiones=DIMENSIONES, materializar=AGREGADOS_FRECUENTES):
+    '''
+    Construye un cubo OLAP con la cantidad de víctimas y de registros por cada combinación
+    de dimensiones presente en los datos.
+
+    El cubo base se calcula con un único 'groupby' sobre los datos. Además se materializan
+    los agregados de menor dimensión más usados, de modo que las consultas sobre ellos no
+    necesitan volver a recorrer el cubo base. Las dimensiones 'Día semana' y 'Hora del día'
+    se derivan de 'Fecha' y 'Hora' si no están en el DataFrame.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame limpio de homicidios.
+        dimensiones (list): Las dimensiones del cubo.
+        materializar (list): Las combinaciones de dimensiones que se pre-calculan.
+
+    Returns:
+        dict: El cubo, con el agregado base y los agregados materializados.
+    '''
+    datos = pd.DataFrame(index=df.index)
+    for dimension in dimensiones:
+        if dimension in df.columns:
+            datos[dimension] = df[dimension]
+        elif dimension == 'Día semana':
+            datos[dimension] = pd.to_datetime(df['Fecha']).dt.dayofweek
+        elif dimension == 'Hora del día':
+            datos[dimension] = utils.extrae_hora_entera(df['Hora'])
+        else:
+            raise KeyError(f'La dimensión {dimension} no está en los datos')
+    datos['Cantidad víctimas'] = df['Cantidad víctimas']
+    datos['registros'] = 1
+
+    base = datos.groupby(list(dimensiones), dropna=False, observed=True)[MEDIDAS].sum().reset_index()
+    cubo = {'dimensiones': list(dimensiones), 'agregados': {tuple(dimensiones): base}, 'series': {}}
+    for combinacion in materializar:
+        for medida in MEDIDAS:
+            consulta(cubo, list(combinacion), medida=medida)
+    return cubo
+
+def _agregado_mas_chico(cubo, necesarias):
+    '''
+    Busca el agregado materializado más chico que contiene todas las dimensiones necesarias.
+    '''
+    candidatos = [(len(agregado), dims) for dims, agregado in cubo['agregados'].items()
+                  if necesarias.issubset(dims)]
+    return cubo['agregados'][min(candidatos)[1]]
+
+def consulta(cubo, dimensiones, filtros=None, medida='Cantidad víctimas'):
+    '''
+    Agrega (rollup) y filtra (slice) el cubo por las dimensiones indicadas.
+
+    La consulta se resuelve a partir del agregado materializado más chico que contenga las
+    dimensiones pedidas y las filtradas. Los resultados sin filtros se guardan en el cubo
+    para que las consultas repetidas sean inmediatas. La serie devuelta es compartida con
+    el cubo, por lo que no debe modificarse.
+
+    Parameters:
+        cubo (dict): El cubo generado con 'construye_cubo'.
+        dimensiones (list): Las dimensiones por las que se agrupa (puede ser vacía).
+        filtros (dict, optional): Un valor o una lista de valores por dimensión, por ejemplo
+            {'Año': 2021, 'Rol': ['PEATON', 'CONDUCTOR']}.
+        medida (str): 'Cantidad víctimas' o 'registros' (cantidad de filas de víctimas).
+
+    Returns:
+        pandas.Series: La medida agregada, indexada por las dimensiones pedidas.
+    '''
+    filtros = filtros or {}
+    dimensiones = list(dimensiones)
+    clave = tuple(dimensiones)
+    if not filtros and (clave, medida) in cubo['series']:
+        return cubo['series'][(clave, medida)]
+
+    fuente = _agregado_mas_chico(cubo, set(dimensiones) | set(filtros))
+    if filtros:
+        mascara = np.ones(len(fuente), dtype=bool)
+        for dimension, valores in filtros.items():
+            valores = valores if isinstance(valores, (list, tuple, set)) else [valores]
+            mascara &= fuente[dimension].isin(valores).to_numpy()
+        fuente = fuente[mascara]
+
+    if not dimensiones:
+        return fuente[MEDIDAS].sum()[medida]
+
+    agregado = fuente.groupby(dimensiones, dropna=False, observed=True)[MEDIDAS].sum().reset_index()
+    resultado = agregado.set_index(dimensiones)[medida]
+    if not filtros:
+        cubo['agregados'][clave] = agregado
+        cubo['series'][(clave, medida)] = resultado
+    return resultado
+
+def resumen_desde_cubo(cubo, nombre):
+    '''
+    Devuelve, a partir del cubo, los datos de uno de los resúmenes del EDA de 'utils'.
+
+    Parameters:
+        cubo (dict): El cubo generado con 'construye_cubo'.
+        nombre (str): El nombre del resumen. Ver 'RESUMENES' para los disponibles.
+
+    Returns:
+        pandas.Series o pandas.DataFrame: Los mismos valores que agrupa la función de 'utils'.
+    '''
+    return RESUMENES[nombre](cubo)
+
+def _victimas_por_dia_semana(cubo):
+    '''
+    Cantidad de víctimas por nombre del día de la semana.
+    '''
+    datos = consulta(cubo, ['Día semana'])
+    nombres = np.array(DIAS_SEMANA, dtype=object)[datos.index.to_numpy().astype(int)]
+    return pd.Series(datos.to_numpy(), index=pd.Index(nombres, name='Nombre día'), name=datos.name)
+
+def _accidentes_por_categoria_tiempo(cubo):
+    '''
+    Cantidad de víctimas (registros) por categoría de tiempo, de mayor a menor.
+    '''
+    datos = consulta(cubo, ['Hora del día'], medida='registros')
+    categorias = utils.categoriza_momento_dia(pd.Series(datos.index, dtype='float64'))
+    return datos.groupby(categorias.to_numpy()).sum().sort_values(ascending=False).rename_axis('Categoria tiempo')
+
+def _accidentes_semana_fin_de_semana(cubo):
+    '''
+    Cantidad de víctimas (registros) en días de semana y de fin de semana.
+    '''
+    datos = consulta(cubo, ['Día semana'], medida='registros')
+    return datos.groupby(utils.categoriza_tipo_dia(datos.index.to_numpy())).sum().rename_axis('Tipo de día')
+
+# Resúmenes del EDA que se pueden resolver desde el cubo
+RESUMENES = {
+    'victimas_mensuales': lambda cubo: consulta(cubo, ['Mes']),
+    'accidentes_mensuales': lambda cubo: consulta(cubo, ['Año', 'Mes']),
+    'victimas_por_dia_semana': _victimas_por_dia_semana,
+    'accidentes_por_categoria_tiempo': _accidentes_por_categoria_tiempo,
+    'accidentes_por_horas_del_dia': lambda cubo: consulta(cubo, ['Hora del día'], medida='registros'),
+    'accidentes_semana_fin_de_semana': _accidentes_semana_fin_de_semana,
+    'victimas_por_sexo': lambda cubo: consulta(cubo, ['Sexo'], medida='registros'),
+    'victimas_por_rol_y_sexo': lambda cubo: consulta(cubo, ['Rol', 'Sexo'], medida='registros').unstack(fill_value=0),
+    'victimas_por_victima_y_sexo': lambda cubo: consulta(cubo, ['Víctima', 'Sexo'], medida='registros').unstack(fill_value=0),
+    'victimas_por_participantes': lambda cubo: consulta(cubo, ['Participantes'], medida='registros').sort_values(ascending=False),
+    'acusados': lambda cubo: consulta(cubo, ['Acusado'], medida='registros').sort_values(ascending=False),
+    'victimas_por_tipo_de_calle': lambda cubo: consulta(cubo, ['Tipo de calle'], medida='registros'),
+    'victimas_por_cruce': lambda cubo: consulta(cubo, ['Cruce'], medida='registros'),
+    'accidentes_por_anio_y_sexo': lambda cubo: consulta(cubo, ['Año', 'Sexo'], medida='registros'),
+}
+
+# Los mismos resúmenes calculados directamente sobre los datos, como lo hace 'utils'
+RESUMENES_DIRECTOS = {
+    'victimas_mensuales': lambda df: df.groupby('Mes')['Cantidad víctimas'].sum(),
+    'accidentes_mensuales': lambda df: pd.concat({año: df[df['Año'] == año].groupby('Mes')['Cantidad víctimas'].sum()
+                                                  for año in df['Año'].unique()}),
+    'victimas_por_dia_semana': lambda df: df.groupby(pd.to_datetime(df['Fecha']).dt.dayofweek)['Cantidad víctimas'].sum(),
+    'accidentes_por_categoria_tiempo': lambda df: utils.categoriza_momento_dia(utils.extrae_hora_entera(df['Hora'])).value_counts(),
+    'accidentes_por_horas_del_dia': lambda df: utils.extrae_hora_entera(df['Hora']).value_counts().sort_index(),
+    'accidentes_semana_fin_de_semana': lambda df: pd.Series(utils.categoriza_tipo_dia(pd.to_datetime(df['Fecha']).dt.dayofweek)).value_counts(),
+    'victimas_por_sexo': lambda df: df['Sexo'].value_counts(),
+    'victimas_por_rol_y_sexo': lambda df: df.groupby(['Rol', 'Sexo']).size().unstack(fill_value=0),
+    'victimas_por_victima_y_sexo': lambda df: df.groupby(['Víctima', 'Sexo']).size().unstack(fill_value=0),
+    'victimas_por_participantes': lambda df: df['Participantes'].value_counts(),
+    'acusados': lambda df: df['Acusado'].value_counts(),
+    'victimas_por_tipo_de_calle': lambda df: df['Tipo de calle'].value_counts(),
+    'victimas_por_cruce': lambda df: df['Cruce'].value_counts(),
+    'accidentes_por_anio_y_sexo': lambda df: df.groupby(['Año', 'Sexo']).size(),
+}
+
+def _mide(funcion, argumento, repeticiones):
+    '''
+    Devuelve el tiempo mínimo (en milisegundos) de varias ejecuciones de una función.
+    '''
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(argumento)
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos) * 1000
+
+def compara_con_groupby(df, cubo=None, repeticiones=5):
+    '''
+    Compara el tiempo de cada resumen del EDA calculado con 'groupby' sobre los datos y
+    respondido desde el cubo.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame limpio de homicidios.
+        cubo (dict, optional): El cubo. Si no se indica, se construye (y se mide su construcción).
+        repeticiones (int): La cantidad de repeticiones por medición (se toma la mínima).
+
+    Returns:
+        pandas.DataFrame: Los tiempos en milisegundos y la aceleración de cada resumen.
+    '''
+    mi_dict = {"resumen": [], "groupby_ms": [], "cubo_ms": [], "aceleracion": []}
+    if cubo is None:
+        inicio = time.perf_counter()
+        cubo = construye_cubo(df)
+        print(f'El cubo se construyó en {round((time.perf_counter() - inicio) * 1000, 2)} ms '
+              f'y tiene {len(cubo["agregados"][tuple(cubo["dimensiones"])])} celdas')
+
+    for nombre, directo in RESUMENES_DIRECTOS.items():
+        tiempo_directo = _mide(directo, df, repeticiones)
+        tiempo_cubo = _mide(RESUMENES[nombre], cubo, repeticiones)
+        mi_dict["resumen"].append(nombre)
+        mi_dict["groupby_ms"].append(round(tiempo_directo, 3))
+        mi_dict["cubo_ms"].append(round(tiempo_cubo, 3))
+        mi_dict["aceleracion"].append(round(tiempo_directo / tiempo_cubo, 1))
+
+    return pd.DataFrame(mi_dict)
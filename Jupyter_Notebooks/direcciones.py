@@ -0,0 +1,383 @@
+## NORMALIZACIÓN DE DIRECCIONES E ÍNDICE DE CALLES E INTERSECCIONES
+# Importaciones
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from coordenadas_caba import wgs84_a_gauss_kruger
+from indice_espacial import coordenadas_validas
+
+# Formas equivalentes de las palabras frecuentes en los nombres de calles
+ABREVIATURAS = {'AVENIDA': 'AV', 'AVDA': 'AV', 'AUTOPISTA': 'AU', 'GENERAL': 'GRAL', 'PRESIDENTE': 'PRES',
+                'PTE': 'PRES', 'COMANDANTE': 'CMTE', 'DOCTOR': 'DR', 'TENIENTE': 'TTE', 'CORONEL': 'CNEL',
+                'INGENIERO': 'ING', 'INTENDENTE': 'INT', 'PASAJE': 'PJE', 'MARISCAL': 'MCAL',
+                'CAPITAN': 'CAP', 'SARGENTO': 'SGTO', 'GOBERNADOR': 'GDOR', 'ALMIRANTE': 'ALTE',
+                'SANTA': 'STA', 'SANTO': 'STO', 'BOULEVARD': 'BV', 'BOULEVAR': 'BV'}
+
+# Palabras que no distinguen una calle de otra y no se usan para compararlas
+PALABRAS_IGNORADAS = {'AV', 'AU', 'CALLE', 'COLECTORA', 'DE', 'DEL', 'LA', 'LAS', 'LOS', 'EL'}
+
+# Separador de las calles de una intersección ('y', 'e' delante de 'i', o 'altura')
+PATRON_INTERSECCION = r'\s+(?:Y|E|ALT|ALTURA)\s+'
+
+# Altura al final de la dirección y marcas de kilómetro de las autopistas
+PATRON_ALTURA = r'\s+(\d{1,5})$'
+PATRON_KILOMETRO = r'\s+(?:KM|PK|PKM|KILOMETRO)\s*\d.*$'
+
+# Puntaje mínimo (similitud coseno) para aceptar que dos nombres son la misma calle
+UMBRAL_PUNTAJE = 0.5
+
+
+def _corrige_codificacion(texto):
+    '''
+    Corrige un texto UTF-8 que se leyó como Windows-1252 (por ejemplo 'NUÃ‘EZ' -> 'NUÑEZ').
+    '''
+    try:
+        return texto.encode('cp1252').decode('utf-8')
+    except UnicodeError:
+        return texto
+
+def normaliza_texto(serie):
+    '''
+    Lleva los textos a una forma canónica: mayúsculas, sin tildes, sin puntuación y con un
+    único espacio entre palabras. Se aplica a toda la serie a la vez.
+
+    También se corrigen los caracteres mal codificados ('Ã‘') y las 'Ñ' reemplazadas por '?'
+    que aparecen en los datos originales, y '&' se toma como separador de intersección.
+
+    Parameters:
+        serie (pandas.Series): Los textos.
+
+    Returns:
+        pandas.Series: Los textos normalizados (los nulos quedan como texto vacío).
+    '''
+    texto = serie.fillna('').astype(str)
+    mal_codificados = texto.str.contains('Ã', regex=False)
+    if mal_codificados.any():
+        texto = texto.where(~mal_codificados, texto[mal_codificados].map(_corrige_codificacion))
+    texto = texto.str.replace(r'(\w)\?(\w)', r'\1N\2', regex=True).str.replace('&', ' Y ', regex=False)
+    texto = texto.str.upper().str.normalize('NFKD').str.replace('[\u0300-\u036f]', '', regex=True)
+    texto = texto.str.replace(r'[^\w\s/]|_', ' ', regex=True).str.replace('/', ' ', regex=False)
+    return texto.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+def separa_lugar(serie):
+    '''
+    Separa cada lugar en sus calles y su altura.
+
+    Se reconocen las intersecciones ('A Y B', 'A E B'), las direcciones con altura
+    ('A 1234') y las marcas de kilómetro de las autopistas, que se descartan.
+
+    Parameters:
+        serie (pandas.Series): Los lugares, por ejemplo 'Lugar del hecho' o 'Dirección normalizada'.
+
+    Returns:
+        pandas.DataFrame: Las columnas 'calle_1', 'calle_2' (vacía si no es una intersección)
+        y 'altura' (NaN si no tiene), normalizadas y con el mismo índice.
+    '''
+    texto = normaliza_texto(serie).str.replace(PATRON_KILOMETRO, '', regex=True)
+    partes = texto.str.split(PATRON_INTERSECCION, n=1, regex=True, expand=True).reindex(columns=[0, 1])
+    calle_1, calle_2 = partes[0].fillna(''), partes[1].fillna('')
+    altura = pd.to_numeric(calle_1.str.extract(PATRON_ALTURA, expand=False), errors='coerce')
+    # 'A ALTURA 2400' es una altura y no una intersección
+    solo_numero = calle_2.str.fullmatch(r'\d{1,5}')
+    altura = altura.where(~solo_numero, pd.to_numeric(calle_2.where(solo_numero), errors='coerce'))
+    calle_2 = calle_2.where(~solo_numero, '')
+    calle_1 = calle_1.str.replace(PATRON_ALTURA, '', regex=True)
+    # Se descarta la altura que a veces aparece después de la segunda calle
+    calle_2 = calle_2.str.replace(PATRON_ALTURA, '', regex=True)
+    # 'SD' es el marcador de dato faltante
+    calle_1 = calle_1.where(calle_1 != 'SD', '')
+    return pd.DataFrame({'calle_1': calle_1, 'calle_2': calle_2, 'altura': altura}, index=serie.index)
+
+def palabras_calle(nombre):
+    '''
+    Devuelve las palabras significativas de un nombre de calle ya normalizado, con las
+    abreviaturas unificadas y sin las palabras de 'PALABRAS_IGNORADAS'.
+    '''
+    palabras = (ABREVIATURAS.get(palabra, palabra) for palabra in nombre.split())
+    return [palabra for palabra in palabras if palabra not in PALABRAS_IGNORADAS]
+
+def _rasgos(nombre):
+    '''
+    Obtiene los rasgos de un nombre para compararlo: sus palabras y los trigramas de
+    caracteres de cada palabra, que toleran errores de tipeo.
+    '''
+    rasgos = []
+    for palabra in palabras_calle(nombre):
+        rasgos.append(palabra)
+        relleno = f' {palabra} '
+        rasgos += [relleno[i:i + 3] for i in range(len(relleno) - 2)]
+    return rasgos
+
+def _matriz_rasgos(nombres, vocabulario):
+    '''
+    Arma la matriz dispersa (nombres x rasgos) con la cantidad de veces de cada rasgo.
+    '''
+    filas, columnas = [], []
+    for fila, nombre in enumerate(nombres):
+        for rasgo in _rasgos(nombre):
+            columna = vocabulario.get(rasgo)
+            if columna is not None:
+                filas.append(fila)
+                columnas.append(columna)
+    datos = np.ones(len(filas))
+    return sparse.csr_matrix((datos, (filas, columnas)), shape=(len(nombres), len(vocabulario)))
+
+def _normaliza_filas(matriz, idf):
+    '''
+    Pondera los rasgos por su IDF y normaliza cada fila para que el producto sea la similitud coseno.
+    '''
+    matriz = matriz @ sparse.diags(idf)
+    normas = np.sqrt(np.asarray(matriz.multiply(matriz).sum(axis=1)).ravel())
+    normas[normas == 0] = 1
+    return sparse.diags(1 / normas) @ matriz
+
+def construye_indice_calles(nombres):
+    '''
+    Construye el índice invertido de calles: cada rasgo (palabra o trigrama) apunta a las
+    calles que lo contienen, en una matriz dispersa ponderada por IDF.
+
+    Los nombres que tienen las mismas palabras significativas (por ejemplo 'AV. GRAL. PAZ' y
+    'PAZ, GRAL. AV.') se unifican en una única calle, con el nombre más frecuente.
+
+    Parameters:
+        nombres (iterable): Los nombres de las calles, en cualquier formato.
+
+    Returns:
+        dict: Los nombres canónicos, la clave de cada calle, el vocabulario de rasgos, el IDF
+        y la matriz normalizada.
+    '''
+    nombres = pd.Series(list(nombres), dtype=object).dropna()
+    nombres = nombres[normaliza_texto(nombres).str.len() > 0]
+    claves = normaliza_texto(nombres).map(lambda nombre: ' '.join(sorted(palabras_calle(nombre))))
+    nombres, claves = nombres[claves != ''], claves[claves != '']
+
+    # Se elige el nombre más frecuente de cada calle
+    canonicos = {}
+    for clave, grupo in nombres.groupby(claves, sort=True):
+        canonicos[clave] = Counter(grupo).most_common(1)[0][0]
+    claves_calles = list(canonicos)
+
+    vocabulario = {}
+    for clave in claves_calles:
+        for rasgo in _rasgos(clave):
+            vocabulario.setdefault(rasgo, len(vocabulario))
+    conteos = _matriz_rasgos(claves_calles, vocabulario)
+    frecuencia = np.asarray((conteos > 0).sum(axis=0)).ravel()
+    idf = np.log((1 + len(claves_calles)) / (1 + frecuencia)) + 1
+    return {'nombres': np.array([canonicos[clave] for clave in claves_calles], dtype=object),
+            'claves': {clave: posicion for posicion, clave in enumerate(claves_calles)},
+            'vocabulario': vocabulario, 'idf': idf, 'matriz': _normaliza_filas(conteos, idf)}
+
+def empareja_calles(indice, calles, umbral=UMBRAL_PUNTAJE):
+    '''
+    Busca, para cada nombre de calle, la calle más parecida del índice.
+
+    Los nombres repetidos se comparan una sola vez y todos los nombres únicos se comparan
+    juntos con un único producto de matrices dispersas.
+
+    Parameters:
+        indice (dict): El índice de 'construye_indice_calles'.
+        calles (pandas.Series): Los nombres de las calles (ya normalizados con 'normaliza_texto').
+        umbral (float): El puntaje mínimo para aceptar la calle encontrada.
+
+    Returns:
+        pandas.DataFrame: La posición de la calle en el índice ('id_calle', -1 si no se
+        encontró), su nombre canónico y el puntaje, con el mismo índice que 'calles'.
+    '''
+    codigos, unicos = pd.factorize(calles)
+    unicos = np.asarray(unicos, dtype=object)
+    ids = np.full(len(unicos), -1, dtype=np.int64)
+    puntajes = np.zeros(len(unicos))
+
+    # Primero, las coincidencias exactas de palabras; el resto se compara por similitud
+    claves = [' '.join(sorted(palabras_calle(nombre))) for nombre in unicos]
+    exactos = np.array([indice['claves'].get(clave, -1) for clave in claves], dtype=np.int64)
+    ids[exactos >= 0], puntajes[exactos >= 0] = exactos[exactos >= 0], 1.0
+
+    pendientes = np.flatnonzero(exactos < 0)
+    if len(pendientes):
+        consultas = _normaliza_filas(_matriz_rasgos(unicos[pendientes], indice['vocabulario']), indice['idf'])
+        similitud = (consultas @ indice['matriz'].T).tocsr()
+        mejores = np.asarray(similitud.argmax(axis=1)).ravel()
+        mejores_puntajes = similitud.max(axis=1).toarray().ravel()
+        aceptados = mejores_puntajes >= umbral
+        ids[pendientes[aceptados]] = mejores[aceptados]
+        puntajes[pendientes] = mejores_puntajes
+
+    # Los nombres vacíos no son calles
+    vacios = np.array([nombre == '' for nombre in unicos], dtype=bool)
+    ids[vacios], puntajes[vacios] = -1, 0.0
+
+    id_calle = np.where(codigos >= 0, ids[codigos], -1)
+    nombre = np.where(id_calle >= 0, indice['nombres'][np.maximum(id_calle, 0)], None)
+    return pd.DataFrame({'id_calle': id_calle, 'calle': nombre,
+                         'puntaje': np.where(codigos >= 0, puntajes[codigos], 0.0)}, index=calles.index)
+
+def normaliza_lugares(indice, lugares, umbral=UMBRAL_PUNTAJE):
+    '''
+    Normaliza lugares escritos libremente (por ejemplo 'Lugar del hecho') a calles,
+    intersecciones y alturas del índice.
+
+    Parameters:
+        indice (dict): El índice de 'construye_indice_calles'.
+        lugares (pandas.Series): Los lugares.
+        umbral (float): El puntaje mínimo para aceptar cada calle.
+
+    Returns:
+        pandas.DataFrame: Las calles encontradas ('id_calle_1', 'calle_1', 'id_calle_2',
+        'calle_2'), la altura, el puntaje (el menor de las dos calles) y la dirección
+        normalizada ('A y B' en orden alfabético, o 'A 1234'), con el mismo índice.
+    '''
+    partes = separa_lugar(lugares)
+    primera = empareja_calles(indice, partes['calle_1'], umbral)
+    segunda = empareja_calles(indice, partes['calle_2'], umbral)
+    es_cruce = partes['calle_2'] != ''
+
+    resultado = pd.DataFrame({'id_calle_1': primera['id_calle'], 'calle_1': primera['calle'],
+                              'id_calle_2': segunda['id_calle'].where(es_cruce, -1),
+                              'calle_2': segunda['calle'].where(es_cruce, None),
+                              'altura': partes['altura'],
+                              'puntaje': np.where(es_cruce, np.minimum(primera['puntaje'], segunda['puntaje']),
+                                                  primera['puntaje'])}, index=lugares.index)
+
+    # Las intersecciones se escriben con las calles en orden alfabético, para que 'A y B' == 'B y A'
+    cruce_valido = (es_cruce & (resultado['id_calle_1'] >= 0) & (resultado['id_calle_2'] >= 0)).to_numpy()
+    primera_calle = resultado['calle_1'].to_numpy(dtype=object)
+    segunda_calle = resultado['calle_2'].to_numpy(dtype=object)
+    direccion = np.full(len(resultado), None, dtype=object)
+    a, b = primera_calle[cruce_valido], segunda_calle[cruce_valido]
+    invertir = a > b
+    menor, mayor = np.where(invertir, b, a), np.where(invertir, a, b)
+    direccion[cruce_valido] = (pd.Series(menor, dtype=str) + ' y ' + pd.Series(mayor, dtype=str)).to_numpy(dtype=object)
+
+    # Las direcciones sin cruce son la calle, con su altura si la tienen
+    sin_cruce = (~es_cruce & (resultado['id_calle_1'] >= 0)).to_numpy()
+    altura = resultado['altura'].to_numpy()
+    con_altura = sin_cruce & ~np.isnan(altura)
+    direccion[sin_cruce] = primera_calle[sin_cruce]
+    direccion[con_altura] = (pd.Series(primera_calle[con_altura], dtype=str) + ' '
+                             + pd.Series(altura[con_altura].astype(np.int64)).astype(str)).to_numpy(dtype=object)
+    resultado['direccion'] = direccion
+    return resultado
+
+def construye_catalogo(df, columna_calle='Calle', columna_direccion='Dirección normalizada',
+                       columnas=('Pos x', 'Pos y')):
+    '''
+    Construye el catálogo de calles, intersecciones y alturas a partir de los registros
+    con la dirección normalizada.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame limpio de homicidios (o un catálogo de calles).
+        columna_calle (str): La columna con el nombre de la calle.
+        columna_direccion (str): La columna con la dirección normalizada.
+        columnas (tuple): Las columnas de longitud y latitud.
+
+    Returns:
+        dict: El índice de calles y las coordenadas medias de cada intersección y de cada
+        altura conocida de cada calle.
+    '''
+    partes = separa_lugar(df[columna_direccion])
+    direcciones = df[columna_direccion].dropna().astype(str)
+    nombres = pd.concat([df[columna_calle].dropna().astype(str),
+                         direcciones.str.split(r'\s+[yYeE]\s+', n=1, regex=True, expand=True).stack()])
+    mal_codificados = nombres.str.contains('Ã', regex=False)
+    nombres = nombres.where(~mal_codificados, nombres[mal_codificados].map(_corrige_codificacion))
+    nombres = nombres.str.replace(r'\s+(?:KM\.?\s*)?[\d.,]+$', '', regex=True)
+    indice = construye_indice_calles(nombres[~nombres.isin(['SD', ''])])
+
+    lugares = normaliza_lugares(indice, df[columna_direccion])
+    lon, lat, validos = coordenadas_validas(df, columnas)
+    conocidos = pd.DataFrame({'direccion': lugares['direccion'], 'id_calle': lugares['id_calle_1'],
+                              'altura': partes['altura'], 'lon': lon, 'lat': lat})[validos & lugares['direccion'].notna()]
+
+    es_cruce = lugares.loc[conocidos.index, 'id_calle_2'] >= 0
+    intersecciones = conocidos[es_cruce].groupby('direccion')[['lon', 'lat']].mean()
+    alturas = (conocidos[~es_cruce & conocidos['altura'].notna()]
+               .groupby(['id_calle', 'altura'])[['lon', 'lat']].mean().sort_index())
+    return {'indice': indice, 'intersecciones': intersecciones, 'alturas': alturas}
+
+def ubica_lugares(catalogo, lugares, umbral=UMBRAL_PUNTAJE):
+    '''
+    Obtiene las coordenadas de lugares escritos libremente a partir del catálogo.
+
+    Las intersecciones se ubican en la posición conocida del cruce. Las direcciones con
+    altura se interpolan entre las alturas conocidas de la misma calle (o se toma la más
+    cercana si la altura queda fuera del rango conocido).
+
+    Parameters:
+        catalogo (dict): El catálogo de 'construye_catalogo'.
+        lugares (pandas.Series): Los lugares.
+        umbral (float): El puntaje mínimo para aceptar cada calle.
+
+    Returns:
+        pandas.DataFrame: El resultado de 'normaliza_lugares' con las columnas 'lon' y 'lat'
+        (NaN si no se pudo ubicar).
+    '''
+    resultado = normaliza_lugares(catalogo['indice'], lugares, umbral)
+    posicion = catalogo['intersecciones'].reindex(resultado['direccion'])
+    resultado['lon'], resultado['lat'] = posicion['lon'].to_numpy(), posicion['lat'].to_numpy()
+
+    alturas = catalogo['alturas']
+    con_altura = resultado['lon'].isna() & (resultado['id_calle_2'] < 0) & resultado['altura'].notna()
+    for id_calle, grupo in resultado[con_altura].groupby('id_calle_1'):
+        if id_calle not in alturas.index.get_level_values('id_calle'):
+            continue
+        conocidas = alturas.loc[id_calle]
+        for eje in ('lon', 'lat'):
+            resultado.loc[grupo.index, eje] = np.interp(grupo['altura'], conocidas.index.to_numpy(dtype=float),
+                                                        conocidas[eje].to_numpy())
+    return resultado
+
+def repara_coordenadas(df, catalogo=None, columna_lugar='Lugar del hecho', columnas=('Pos x', 'Pos y'),
+                       columna_wkt='XY (CABA)'):
+    '''
+    Completa las coordenadas faltantes ubicando el lugar del hecho en el catálogo.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame limpio de homicidios.
+        catalogo (dict, optional): El catálogo. Por defecto, se construye con 'df'.
+        columna_lugar (str): La columna con el lugar escrito libremente.
+        columnas (tuple): Las columnas de longitud y latitud.
+        columna_wkt (str, optional): La columna 'Point (x y)' en Gauss-Krüger que también se completa.
+
+    Returns:
+        tuple: Un nuevo DataFrame con las coordenadas completadas y la máscara de las filas reparadas.
+    '''
+    catalogo = construye_catalogo(df) if catalogo is None else catalogo
+    _, _, validos = coordenadas_validas(df, columnas)
+    faltantes = df.index[~validos]
+    ubicados = ubica_lugares(catalogo, df.loc[faltantes, columna_lugar]).dropna(subset=['lon', 'lat'])
+
+    df = df.copy()
+    for columna, eje in zip(columnas, ('lon', 'lat')):
+        valores = ubicados[eje]
+        if not pd.api.types.is_numeric_dtype(df[columna]):
+            valores = valores.map('{:.8f}'.format)
+        df.loc[ubicados.index, columna] = valores
+    if columna_wkt is not None and columna_wkt in df.columns:
+        x, y = wgs84_a_gauss_kruger(ubicados['lon'].to_numpy(), ubicados['lat'].to_numpy())
+        df.loc[ubicados.index, columna_wkt] = [f'Point ({a:.8f} {b:.8f})' for a, b in zip(x, y)]
+    return df, df.index.isin(ubicados.index)
+
+def agrupa_por_interseccion(df, catalogo=None, columna_lugar='Lugar del hecho', medida='Cantidad víctimas'):
+    '''
+    Suma la medida por intersección normalizada, uniendo las distintas formas de escribir un mismo cruce.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame limpio de homicidios.
+        catalogo (dict, optional): El catálogo. Por defecto, se construye con 'df'.
+        columna_lugar (str): La columna con el lugar escrito libremente.
+        medida (str): La columna que se suma.
+
+    Returns:
+        pandas.DataFrame: La medida y la cantidad de registros por intersección, ordenadas de mayor a menor.
+    '''
+    catalogo = construye_catalogo(df) if catalogo is None else catalogo
+    lugares = normaliza_lugares(catalogo['indice'], df[columna_lugar])
+    cruces = lugares['id_calle_2'] >= 0
+    agrupado = (df.loc[cruces, [medida]].assign(registros=1)
+                .groupby(lugares.loc[cruces, 'direccion'].rename('Intersección')).sum())
+    return agrupado.sort_values([medida, 'registros'], ascending=False, kind='stable')
@@ -0,0 +1,307 @@
+## DETECCIÓN DE DUPLICADOS FUERA DE MEMORIA
+# Importaciones
+import math
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+import coordenadas_caba
+import direcciones
+import indice_espacial
+import pipeline_etl as etl
+
+# Memoria por defecto para los bloques y las particiones (en bytes)
+MEMORIA = 256 * 2**20
+
+# Columnas que identifican el origen de cada fila
+COLUMNA_ARCHIVO = 'Archivo'
+COLUMNA_FILA = 'Fila'
+
+# Columna auxiliar con la clave por la que se particiona
+_CLAVE = '__clave'
+
+# Separador de los valores de una clave compuesta
+_SEPARADOR = '\x1f'
+
+# Primo de Mersenne 2^61 - 1 para las permutaciones de MinHash
+_PRIMO = (1 << 61) - 1
+
+
+def _fuentes(fuentes):
+    '''
+    Convierte las fuentes a una lista de pares (nombre, ruta o DataFrame).
+    '''
+    if isinstance(fuentes, (str, pd.DataFrame)):
+        fuentes = [fuentes]
+    return [(fuente if isinstance(fuente, str) else f'DataFrame {posicion}', fuente)
+            for posicion, fuente in enumerate(fuentes)]
+
+def planifica_memoria(fuentes, memoria=MEMORIA, filas_muestra=1_000):
+    '''
+    Estima las filas por bloque y la cantidad de particiones para no superar la memoria indicada.
+
+    Se mide la memoria por fila de una muestra de la primera fuente y se estima el total a
+    partir del tamaño de los archivos. Cada partición debe ocupar a lo sumo la mitad de la
+    memoria, para dejar lugar a la detección dentro de ella.
+
+    Parameters:
+        fuentes (list): Las rutas de los CSV o los DataFrames.
+        memoria (int): La memoria disponible en bytes.
+        filas_muestra (int): Las filas de la muestra.
+
+    Returns:
+        tuple: Las filas por bloque y la cantidad de particiones.
+    '''
+    bytes_fila, filas_totales = None, 0
+    for _, fuente in _fuentes(fuentes):
+        if isinstance(fuente, pd.DataFrame):
+            muestra = fuente.head(filas_muestra)
+            filas = len(fuente)
+        else:
+            muestra = pd.read_csv(fuente, nrows=filas_muestra, dtype=str)
+            bytes_archivo = os.path.getsize(fuente)
+            bytes_csv = max(len(muestra.to_csv(index=False).encode()) / max(len(muestra), 1), 1)
+            filas = bytes_archivo / bytes_csv
+        if bytes_fila is None and len(muestra):
+            bytes_fila = muestra.memory_usage(deep=True).sum() / len(muestra)
+        filas_totales += filas
+    bytes_fila = bytes_fila or 1
+    filas_bloque = max(int(memoria / (4 * bytes_fila)), 1_000)
+    particiones = max(math.ceil(2 * filas_totales * bytes_fila / memoria), 1)
+    return filas_bloque, particiones
+
+def lee_fuentes(fuentes, filas_bloque=100_000, columnas=None):
+    '''
+    Lee las fuentes por bloques, agregando el archivo de origen y el número de fila de cada registro.
+
+    Los CSV se leen como texto, para que las claves se comparen igual en todos los archivos.
+
+    Parameters:
+        fuentes (list): Las rutas de los CSV o los DataFrames.
+        filas_bloque (int): La cantidad máxima de filas por bloque.
+        columnas (list, optional): Las columnas a leer. Por defecto, todas.
+
+    Returns:
+        generator: Un generador de DataFrames.
+    '''
+    for nombre, fuente in _fuentes(fuentes):
+        if isinstance(fuente, pd.DataFrame):
+            datos = fuente if columnas is None else fuente[columnas]
+            bloques = (datos.iloc[inicio:inicio + filas_bloque] for inicio in range(0, len(datos), filas_bloque))
+        else:
+            bloques = pd.read_csv(fuente, dtype=str, usecols=columnas, chunksize=filas_bloque)
+        fila = 0
+        for bloque in bloques:
+            bloque = bloque.reset_index(drop=True)
+            bloque[COLUMNA_ARCHIVO] = nombre
+            bloque[COLUMNA_FILA] = np.arange(fila, fila + len(bloque))
+            fila += len(bloque)
+            yield bloque
+
+def _con_clave(bloques, columnas_clave):
+    '''
+    Agrega a cada bloque la columna auxiliar con la clave (compuesta) como texto.
+    '''
+    for bloque in bloques:
+        clave = bloque[columnas_clave[0]].astype(str)
+        for columna in columnas_clave[1:]:
+            clave = clave + _SEPARADOR + bloque[columna].astype(str)
+        yield bloque.assign(**{_CLAVE: clave})
+
+def _particiones(fuentes, columnas_clave, columnas, memoria, particiones, directorio):
+    '''
+    Particiona las fuentes en disco según el hash de la clave y devuelve la cantidad de particiones.
+    '''
+    filas_bloque, estimadas = planifica_memoria(fuentes, memoria)
+    particiones = particiones or estimadas
+    lectura = None if columnas is None else list(dict.fromkeys(list(columnas_clave) + list(columnas)))
+    etl.particiona_en_disco(_con_clave(lee_fuentes(fuentes, filas_bloque, lectura), columnas_clave),
+                            directorio, particiones, columna=_CLAVE)
+    return particiones
+
+def duplicados_exactos(fuentes, columna='Id', columnas=None, memoria=MEMORIA, particiones=None,
+                       directorio_temporal=None):
+    '''
+    Busca las filas con la misma clave en uno o varios archivos, sin cargarlos completos en memoria.
+
+    Las filas se reparten en disco por el hash de la clave, de modo que las filas duplicadas
+    quedan en la misma partición; luego se recorre una partición por vez. Es equivalente a
+    'utils.verifica_duplicados_por_columna' sobre todos los archivos unidos.
+
+    Parameters:
+        fuentes (str or list): Las rutas de los CSV limpios o DataFrames.
+        columna (str or list): La columna o las columnas de la clave.
+        columnas (list, optional): Otras columnas a devolver. Por defecto, todas.
+        memoria (int): La memoria disponible en bytes, que define los bloques y las particiones.
+        particiones (int, optional): La cantidad de particiones. Por defecto, se estima con 'memoria'.
+        directorio_temporal (str, optional): El directorio para las particiones.
+
+    Returns:
+        generator: Un DataFrame por partición con los grupos de duplicados ordenados por la clave,
+        con las columnas 'Grupo', 'Archivo' y 'Fila'.
+    '''
+    columnas_clave = [columna] if isinstance(columna, str) else list(columna)
+    directorio = tempfile.mkdtemp(prefix='duplicados_', dir=directorio_temporal)
+    try:
+        particiones = _particiones(fuentes, columnas_clave, columnas, memoria, particiones, directorio)
+        grupos = 0
+        for particion in range(particiones):
+            datos = etl._lee_particion(directorio, particion)
+            if datos is None:
+                continue
+            datos = datos[datos.duplicated(_CLAVE, keep=False)]
+            if datos.empty:
+                continue
+            datos = datos.sort_values([_CLAVE, COLUMNA_ARCHIVO, COLUMNA_FILA], ignore_index=True)
+            datos.insert(0, 'Grupo', grupos + pd.factorize(datos[_CLAVE])[0])
+            grupos = datos['Grupo'].iloc[-1] + 1
+            yield datos.drop(columns=_CLAVE)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+def firmas_minhash(textos, permutaciones=32, semilla=0):
+    '''
+    Calcula las firmas MinHash de los trigramas de cada texto normalizado.
+
+    La proporción de componentes iguales entre dos firmas estima la similitud de Jaccard
+    de sus conjuntos de trigramas. Los textos vacíos tienen una firma sin valores (-1).
+
+    Parameters:
+        textos (pandas.Series): Los textos.
+        permutaciones (int): La cantidad de funciones de hash (componentes de la firma).
+        semilla (int): La semilla de las funciones de hash.
+
+    Returns:
+        numpy.ndarray: Las firmas (filas x permutaciones), de tipo int64.
+    '''
+    codigos, unicos = pd.factorize(direcciones.normaliza_texto(pd.Series(textos)))
+    trigramas, duenos = [], []
+    for posicion, texto in enumerate(unicos):
+        relleno = f' {texto} '
+        conjunto = {relleno[i:i + 3] for i in range(len(relleno) - 2)} if texto else set()
+        trigramas.extend(conjunto)
+        duenos.extend([posicion] * len(conjunto))
+
+    firmas = np.full((len(unicos), permutaciones), -1, dtype=np.int64)
+    if trigramas:
+        hashes = pd.util.hash_array(np.array(trigramas, dtype=object)) & np.uint64(0xFFFFFFFF)
+        duenos = np.asarray(duenos)
+        con_trigramas, inicios = np.unique(duenos, return_index=True)
+        generador = np.random.default_rng(semilla)
+        a = generador.integers(1, 1 << 32, permutaciones, dtype=np.uint64)
+        b = generador.integers(0, 1 << 32, permutaciones, dtype=np.uint64)
+        for k in range(permutaciones):
+            valores = (a[k] * hashes + b[k]) % np.uint64(_PRIMO)
+            firmas[con_trigramas, k] = np.minimum.reduceat(valores, inicios).astype(np.int64)
+    return firmas[codigos] if len(codigos) else firmas[:0]
+
+def _pares_por_texto(firmas, bloques, similitud, filas_banda):
+    '''
+    Busca pares del mismo bloque con firmas parecidas, agrupando por bandas de la firma (LSH).
+    '''
+    con_texto = np.flatnonzero(firmas[:, 0] >= 0)
+    pares = []
+    for inicio in range(0, firmas.shape[1] - filas_banda + 1, filas_banda):
+        banda = pd.util.hash_pandas_object(pd.DataFrame(firmas[con_texto, inicio:inicio + filas_banda]), index=False)
+        claves = pd.DataFrame({'bloque': bloques[con_texto], 'banda': banda.to_numpy(), 'fila': con_texto})
+        candidatos = claves.merge(claves, on=['bloque', 'banda'])
+        candidatos = candidatos[candidatos['fila_x'] < candidatos['fila_y']]
+        pares.append(candidatos[['fila_x', 'fila_y']].to_numpy())
+    pares = np.unique(np.concatenate(pares), axis=0) if pares else np.empty((0, 2), dtype=np.int64)
+    # Se confirma la similitud estimada por la firma completa
+    iguales = (firmas[pares[:, 0]] == firmas[pares[:, 1]]).mean(axis=1)
+    return pares[iguales >= similitud]
+
+def _pares_por_posicion(lon, lat, validos, bloques, tolerancia_m):
+    '''
+    Busca pares del mismo bloque a menos de 'tolerancia_m' metros.
+    '''
+    filas = np.flatnonzero(validos)
+    if len(filas) < 2:
+        return np.empty((0, 2), dtype=np.int64)
+    x, y = coordenadas_caba.wgs84_a_gauss_kruger(lon[filas], lat[filas])
+    # Los bloques se separan en una tercera coordenada, muy lejos entre sí
+    separacion = 10 * (tolerancia_m + 1)
+    arbol = cKDTree(np.column_stack([x, y, bloques[filas] * separacion]))
+    pares = arbol.query_pairs(tolerancia_m, output_type='ndarray')
+    return filas[pares]
+
+def casi_duplicados(fuentes, columna_id='Id', columnas_bloque=('Fecha', 'Hora'), columnas_posicion=('Pos x', 'Pos y'),
+                    columna_texto='Lugar del hecho', tolerancia_m=50.0, similitud=0.6, permutaciones=32,
+                    filas_banda=4, columnas=None, memoria=MEMORIA, particiones=None, directorio_temporal=None):
+    '''
+    Busca hechos registrados con distinto 'Id' que parecen ser el mismo.
+
+    Las filas se reparten en disco por el bloque ('Fecha' y 'Hora'), de modo que sólo se
+    comparan las filas del mismo bloque. Dentro de cada partición, dos hechos son candidatos
+    si están a menos de 'tolerancia_m' metros o, cuando al menos uno de los dos no tiene
+    coordenadas válidas, si la similitud estimada con MinHash de su 'Lugar del hecho' es al
+    menos 'similitud'. Dos hechos con coordenadas a más de 'tolerancia_m' metros nunca se
+    consideran el mismo, aunque sus textos coincidan. Los pares
+    se unen en grupos por componentes conexas. Se considera la primera fila de cada 'Id'.
+
+    Parameters:
+        fuentes (str or list): Las rutas de los CSV limpios o DataFrames.
+        columna_id (str): La columna del identificador del hecho.
+        columnas_bloque (tuple): Las columnas que deben coincidir.
+        columnas_posicion (tuple): Las columnas de longitud y latitud.
+        columna_texto (str, optional): La columna de texto a comparar con MinHash (None para no usarla).
+        tolerancia_m (float): La distancia máxima en metros.
+        similitud (float): La similitud de Jaccard mínima estimada entre los textos.
+        permutaciones (int): Los componentes de las firmas MinHash.
+        filas_banda (int): Los componentes por banda al buscar candidatos.
+        columnas (list, optional): Otras columnas a devolver. Por defecto, todas.
+        memoria (int): La memoria disponible en bytes.
+        particiones (int, optional): La cantidad de particiones. Por defecto, se estima con 'memoria'.
+        directorio_temporal (str, optional): El directorio para las particiones.
+
+    Returns:
+        generator: Un DataFrame por partición con los grupos de casi duplicados, con las
+        columnas 'Grupo', 'Archivo' y 'Fila'.
+    '''
+    columnas_bloque = list(columnas_bloque)
+    if columnas is not None:
+        columnas = [columna_id] + list(columnas_posicion) + ([columna_texto] if columna_texto else []) + list(columnas)
+    directorio = tempfile.mkdtemp(prefix='casi_duplicados_', dir=directorio_temporal)
+    try:
+        particiones = _particiones(fuentes, columnas_bloque, columnas, memoria, particiones, directorio)
+        grupos = 0
+        for particion in range(particiones):
+            datos = etl._lee_particion(directorio, particion)
+            if datos is None:
+                continue
+            datos = datos.drop_duplicates([_CLAVE, columna_id]).reset_index(drop=True)
+            bloques = pd.factorize(datos[_CLAVE])[0]
+            if len(datos) == len(np.unique(bloques)):
+                continue
+
+            lon, lat, validos = indice_espacial.coordenadas_validas(datos, columnas_posicion)
+            pares = [_pares_por_posicion(lon, lat, validos, bloques, tolerancia_m)]
+            if columna_texto:
+                firmas = firmas_minhash(datos[columna_texto], permutaciones)
+                por_texto = _pares_por_texto(firmas, bloques, similitud, filas_banda)
+                # Si ambos registros tienen coordenadas decide la distancia, no el texto
+                pares.append(por_texto[~(validos[por_texto[:, 0]] & validos[por_texto[:, 1]])])
+            pares = np.concatenate(pares)
+            ids = datos[columna_id].to_numpy()
+            pares = pares[ids[pares[:, 0]] != ids[pares[:, 1]]]
+            if len(pares) == 0:
+                continue
+
+            # Se unen los pares en grupos (componentes conexas del grafo de pares)
+            grafo = coo_matrix((np.ones(len(pares)), (pares[:, 0], pares[:, 1])), shape=(len(datos), len(datos)))
+            _, componente = connected_components(grafo, directed=False)
+            tamaño = np.bincount(componente)
+            datos = datos[tamaño[componente] > 1].assign(Grupo=componente[tamaño[componente] > 1])
+            datos = datos.sort_values(['Grupo', COLUMNA_ARCHIVO, COLUMNA_FILA], ignore_index=True)
+            datos['Grupo'] = grupos + pd.factorize(datos['Grupo'])[0]
+            grupos = datos['Grupo'].iloc[-1] + 1
+            yield datos[['Grupo'] + [c for c in datos.columns if c not in ('Grupo', _CLAVE)]]
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
@@ -0,0 +1,209 @@
+## TAMAÑO DEL EFECTO (COHEN Y HEDGES) PARA CUALQUIER AGRUPAMIENTO
+# Importaciones
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Estadísticos suficientes que se acumulan por grupo
+ESTADISTICOS = ['n', 'suma', 'suma_cuadrados']
+
+# Cantidad máxima de valores remuestreados que se generan juntos en una tarea de bootstrap
+MAXIMO_ELEMENTOS_LOTE = 4_000_000
+
+
+def estadisticos_suficientes(df, por='Año', grupo='Sexo', valor='Edad', niveles=('MASCULINO', 'FEMENINO')):
+    '''
+    Calcula, en un único groupby, la cantidad, la suma y la suma de cuadrados del valor
+    para cada combinación de agrupamiento y nivel.
+
+    Los estadísticos de distintos bloques de datos se pueden combinar con
+    'combina_estadisticos', por lo que no hace falta tener todos los datos en memoria.
+
+    Parameters:
+        df (pandas.DataFrame): Los datos.
+        por (str or list): La o las columnas por las que se agrupa (por ejemplo 'Año', 'Comuna', 'Rol').
+        grupo (str): La columna que define los dos grupos que se comparan.
+        valor (str): La columna numérica que se compara.
+        niveles (tuple): Los dos valores de 'grupo' que se comparan.
+
+    Returns:
+        pandas.DataFrame: Los estadísticos, indexados por las columnas de 'por' y 'grupo'.
+    '''
+    por = [por] if isinstance(por, str) else list(por)
+    datos = df.loc[df[grupo].isin(niveles), por + [grupo]]
+    valores = pd.to_numeric(df.loc[datos.index, valor], errors='coerce').astype(float)
+    datos = datos.assign(suma=valores, suma_cuadrados=valores ** 2, n=valores.notna().astype(np.int64))
+    estadisticos = datos.groupby(por + [grupo], sort=False, observed=True)[ESTADISTICOS].sum()
+    return estadisticos
+
+def combina_estadisticos(*parciales):
+    '''
+    Combina los estadísticos suficientes calculados sobre distintos bloques de datos.
+
+    Parameters:
+        *parciales (pandas.DataFrame): Los estadísticos de cada bloque, de 'estadisticos_suficientes'.
+
+    Returns:
+        pandas.DataFrame: Los estadísticos del conjunto de los bloques.
+    '''
+    combinados = pd.concat(parciales)
+    return combinados.groupby(level=list(range(combinados.index.nlevels)), sort=False)[ESTADISTICOS].sum()
+
+def _efecto(n_1, suma_1, sc_1, n_2, suma_2, sc_2):
+    '''
+    Calcula los tamaños del efecto a partir de los estadísticos suficientes de dos grupos.
+
+    Funciona con escalares o arreglos de cualquier forma (por ejemplo, lotes de réplicas).
+    '''
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media_1, media_2 = suma_1 / n_1, suma_2 / n_2
+        # Varianzas muestrales (ddof=1), como 'pandas.Series.var'
+        var_1 = (sc_1 - n_1 * media_1 ** 2) / (n_1 - 1)
+        var_2 = (sc_2 - n_2 * media_2 ** 2) / (n_2 - 1)
+        diferencia = media_1 - media_2
+
+        # Varianza agrupada de 'cohen' (ponderada por n) y la insesgada (ponderada por n - 1)
+        varianza_agrupada = (n_1 * var_1 + n_2 * var_2) / (n_1 + n_2)
+        varianza_insesgada = ((n_1 - 1) * var_1 + (n_2 - 1) * var_2) / (n_1 + n_2 - 2)
+
+        d = diferencia / np.sqrt(varianza_agrupada)
+        # Corrección de Hedges por sesgo en muestras chicas
+        g = diferencia / np.sqrt(varianza_insesgada) * (1 - 3 / (4 * (n_1 + n_2) - 9))
+    return {'media_1': media_1, 'media_2': media_2, 'var_1': var_1, 'var_2': var_2,
+            'varianza_agrupada': varianza_agrupada, 'varianza_insesgada': varianza_insesgada,
+            'd': d, 'g': g}
+
+def tamaño_efecto(estadisticos, niveles=('MASCULINO', 'FEMENINO')):
+    '''
+    Calcula el tamaño del efecto entre dos niveles para cada grupo, a partir de sus
+    estadísticos suficientes.
+
+    'd' es el estadístico de Cohen con la misma varianza agrupada que la función 'cohen'
+    (ponderada por n) y 'g' es el de Hedges, con la varianza agrupada insesgada y la
+    corrección por muestras chicas.
+
+    Parameters:
+        estadisticos (pandas.DataFrame): Los estadísticos de 'estadisticos_suficientes'.
+        niveles (tuple): El primer y el segundo nivel que se comparan.
+
+    Returns:
+        pandas.DataFrame: Para cada grupo, las cantidades, medias, varianzas, varianzas
+        agrupadas, 'd' y 'g'. Los grupos donde falta uno de los niveles quedan con NaN.
+    '''
+    tabla = estadisticos.unstack(level=-1)
+    columnas = pd.MultiIndex.from_product([ESTADISTICOS, list(niveles)])
+    tabla = tabla.reindex(columns=columnas)
+    tabla[[('n', nivel) for nivel in niveles]] = tabla[[('n', nivel) for nivel in niveles]].fillna(0)
+
+    a = [tabla[(estadistico, niveles[0])].to_numpy(dtype=float) for estadistico in ESTADISTICOS]
+    b = [tabla[(estadistico, niveles[1])].to_numpy(dtype=float) for estadistico in ESTADISTICOS]
+    resultado = pd.DataFrame(_efecto(*a, *b), index=tabla.index)
+    resultado.insert(0, 'n_1', a[0].astype(np.int64))
+    resultado.insert(1, 'n_2', b[0].astype(np.int64))
+    return resultado
+
+def efecto_por_grupo(df, por='Año', grupo='Sexo', valor='Edad', niveles=('MASCULINO', 'FEMENINO')):
+    '''
+    Calcula el tamaño del efecto de Cohen y de Hedges para cada grupo en una sola pasada.
+
+    Parameters:
+        df (pandas.DataFrame): Los datos.
+        por (str or list): La o las columnas por las que se agrupa.
+        grupo (str): La columna que define los dos grupos que se comparan.
+        valor (str): La columna numérica que se compara.
+        niveles (tuple): Los dos valores de 'grupo' que se comparan.
+
+    Returns:
+        pandas.DataFrame: El resultado de 'tamaño_efecto' para cada grupo.
+    '''
+    return tamaño_efecto(estadisticos_suficientes(df, por, grupo, valor, niveles), niveles)
+
+def _lote_bootstrap(valores_1, valores_2, repeticiones, semilla):
+    '''
+    Calcula 'd' y 'g' para un lote de réplicas bootstrap de dos muestras.
+
+    Todas las réplicas del lote se remuestrean y se resumen juntas con operaciones matriciales.
+    '''
+    rng = np.random.default_rng(semilla)
+    estadisticos = []
+    for valores in (valores_1, valores_2):
+        muestra = valores[rng.integers(0, len(valores), size=(repeticiones, len(valores)))]
+        estadisticos += [np.full(repeticiones, float(len(valores))), muestra.sum(axis=1), (muestra ** 2).sum(axis=1)]
+    efecto = _efecto(*estadisticos)
+    return efecto['d'], efecto['g']
+
+def intervalos_bootstrap(df, por='Año', grupo='Sexo', valor='Edad', niveles=('MASCULINO', 'FEMENINO'),
+                         repeticiones=2000, confianza=0.95, tamaño_lote=250, procesos=None, semilla=0):
+    '''
+    Calcula intervalos de confianza bootstrap (percentiles) para 'd' y 'g' en cada grupo.
+
+    Las muestras de cada nivel se remuestrean por separado dentro de cada grupo. Las
+    réplicas se calculan en lotes vectorizados que se reparten en un conjunto de procesos.
+    El resultado es reproducible para una misma semilla, sin importar la cantidad de procesos.
+
+    Parameters:
+        df (pandas.DataFrame): Los datos.
+        por (str or list): La o las columnas por las que se agrupa.
+        grupo (str): La columna que define los dos grupos que se comparan.
+        valor (str): La columna numérica que se compara.
+        niveles (tuple): Los dos valores de 'grupo' que se comparan.
+        repeticiones (int): La cantidad de réplicas bootstrap por grupo.
+        confianza (float): El nivel de confianza de los intervalos.
+        tamaño_lote (int): La cantidad de réplicas que se calculan juntas en cada tarea.
+        procesos (int, optional): La cantidad de procesos. Con 1 se calcula en el proceso actual.
+        semilla (int): La semilla del generador de números aleatorios.
+
+    Returns:
+        pandas.DataFrame: El resultado de 'efecto_por_grupo' con los límites de los intervalos
+        ('d_inf', 'd_sup', 'g_inf', 'g_sup').
+    '''
+    por = [por] if isinstance(por, str) else list(por)
+    efectos = efecto_por_grupo(df, por, grupo, valor, niveles)
+
+    # Se separan los valores de cada nivel en cada grupo
+    datos = df.loc[df[grupo].isin(niveles), por + [grupo]]
+    datos = datos.assign(**{valor: pd.to_numeric(df.loc[datos.index, valor], errors='coerce')}).dropna(subset=[valor])
+    muestras = {clave: valores[valor].to_numpy(dtype=float)
+                for clave, valores in datos.groupby(por + [grupo], sort=False, observed=True)}
+
+    # Se arman las tareas (grupo, lote) con una semilla independiente para cada una
+    tareas = []
+    for clave in efectos.index:
+        clave_tupla = clave if isinstance(clave, tuple) else (clave,)
+        valores_1 = muestras.get(clave_tupla + (niveles[0],))
+        valores_2 = muestras.get(clave_tupla + (niveles[1],))
+        if valores_1 is None or valores_2 is None:
+            continue
+        # Se achica el lote en los grupos grandes para acotar la memoria de cada tarea
+        lote = max(1, min(tamaño_lote, MAXIMO_ELEMENTOS_LOTE // max(len(valores_1), len(valores_2))))
+        for inicio in range(0, repeticiones, lote):
+            tareas.append((clave, valores_1, valores_2, min(lote, repeticiones - inicio)))
+    semillas = np.random.SeedSequence(semilla).spawn(len(tareas))
+
+    argumentos = [(v1, v2, r, s) for (_, v1, v2, r), s in zip(tareas, semillas)]
+    if procesos == 1 or not argumentos:
+        lotes = [_lote_bootstrap(*a) for a in argumentos]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            lotes = list(ejecutor.map(_lote_bootstrap, *zip(*argumentos)))
+
+    # Se juntan los lotes de cada grupo y se calculan los percentiles
+    replicas = {}
+    for (clave, *_), (d, g) in zip(tareas, lotes):
+        replicas.setdefault(clave, ([], []))
+        replicas[clave][0].append(d)
+        replicas[clave][1].append(g)
+
+    alfa = (1 - confianza) / 2 * 100
+    limites = {}
+    with warnings.catch_warnings():
+        # Los grupos con un único valor en un nivel no tienen varianza y quedan con NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for clave, (d, g) in replicas.items():
+            d, g = np.concatenate(d), np.concatenate(g)
+            limites[clave] = np.concatenate([np.nanpercentile(d, [alfa, 100 - alfa]),
+                                             np.nanpercentile(g, [alfa, 100 - alfa])])
+    limites = pd.DataFrame.from_dict(limites, orient='index', columns=['d_inf', 'd_sup', 'g_inf', 'g_sup'])
+    return efectos.join(limites.reindex(efectos.index))
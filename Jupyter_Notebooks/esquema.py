@@ -0,0 +1,116 @@
+## ESQUEMA COMPACTO PARA EL CONJUNTO LIMPIO DE HOMICIDIOS
+# Importaciones
+import pandas as pd
+
+from calculos_eda import DIAS_SEMANA
+
+# Columnas de texto con pocos valores distintos y, si se conocen, sus categorías
+COLUMNAS_CATEGORICAS = {
+    'Rol': None,
+    'Sexo': None,
+    'Tipo de calle': None,
+    'Cruce': None,
+    'Participantes': None,
+    'Víctima': None,
+    'Acusado': None,
+    'Nombre día': DIAS_SEMANA,
+    'Categoria tiempo': ['Madrugada', 'Mañana', 'Medio día', 'Tarde', 'Noche'],
+    'Tipo de día': ['Semana', 'Fin de Semana'],
+}
+
+# Columnas enteras que se reducen al tipo entero más chico que las contiene
+COLUMNAS_ENTERAS = ['Edad', 'Cantidad víctimas', 'Año', 'Mes', 'Día', 'Hora entera', 'Comuna', 'Día semana']
+
+# Columnas derivadas repetidas y la columna equivalente que se conserva
+COLUMNAS_DUPLICADAS = {'Dia semana': 'Día semana', 'Hora del día': 'Hora entera'}
+
+
+def tipo_categorico(columna):
+    '''
+    Devuelve el tipo categórico declarado para una columna.
+
+    Parameters:
+        columna (str): El nombre de la columna.
+
+    Returns:
+        pandas.CategoricalDtype or str: El tipo con las categorías declaradas, o 'category'
+        si las categorías se toman de los datos.
+    '''
+    categorias = COLUMNAS_CATEGORICAS[columna]
+    return 'category' if categorias is None else pd.CategoricalDtype(categorias)
+
+def compacta(df, eliminar_duplicadas=True):
+    '''
+    Convierte el DataFrame limpio al esquema compacto.
+
+    Las columnas de texto con pocos valores pasan a categóricas, los enteros se reducen al
+    tipo más chico posible, 'Fecha' pasa a datetime, 'Hora' a timedelta (tiempo desde la
+    medianoche) y se eliminan las columnas derivadas repetidas. Las funciones de 'utils'
+    vuelven a crear las columnas derivadas que necesitan.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame limpio de homicidios.
+        eliminar_duplicadas (bool): Si se eliminan las columnas de 'COLUMNAS_DUPLICADAS'.
+
+    Returns:
+        pandas.DataFrame: Un nuevo DataFrame con el esquema compacto.
+    '''
+    df = df.copy()
+    if eliminar_duplicadas:
+        df = df.drop(columns=[c for c in COLUMNAS_DUPLICADAS if c in df.columns])
+
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna in df.columns:
+            df[columna] = df[columna].astype(tipo_categorico(columna))
+
+    for columna in COLUMNAS_ENTERAS:
+        if columna in df.columns and pd.api.types.is_integer_dtype(df[columna]):
+            df[columna] = pd.to_numeric(df[columna], downcast='integer')
+
+    if 'Fecha' in df.columns:
+        df['Fecha'] = pd.to_datetime(df['Fecha'])
+    if 'Hora' in df.columns and not pd.api.types.is_timedelta64_dtype(df['Hora']):
+        df['Hora'] = pd.to_timedelta(df['Hora'].astype(str), errors='coerce')
+    return df
+
+def carga_compacta(ruta, eliminar_duplicadas=True, **kwargs):
+    '''
+    Lee el CSV limpio directamente con el esquema compacto.
+
+    Las columnas categóricas se leen ya como categóricas y las columnas duplicadas no se
+    leen, por lo que el pico de memoria es menor que al leer y convertir después.
+
+    Parameters:
+        ruta (str): La ruta del CSV limpio (por ejemplo, 'homicidios_limpio.csv').
+        eliminar_duplicadas (bool): Si se omiten las columnas de 'COLUMNAS_DUPLICADAS'.
+        **kwargs: Otros argumentos para 'pd.read_csv'.
+
+    Returns:
+        pandas.DataFrame: El DataFrame con el esquema compacto.
+    '''
+    omitidas = set(COLUMNAS_DUPLICADAS) if eliminar_duplicadas else set()
+    tipos = {columna: tipo_categorico(columna) for columna in COLUMNAS_CATEGORICAS}
+    df = pd.read_csv(ruta, dtype=tipos, usecols=lambda columna: columna not in omitidas, **kwargs)
+    return compacta(df, eliminar_duplicadas)
+
+def reporte_memoria(antes, despues):
+    '''
+    Compara el uso de memoria de cada columna entre dos versiones de un DataFrame.
+
+    Parameters:
+        antes (pandas.DataFrame): El DataFrame original.
+        despues (pandas.DataFrame): El DataFrame compacto.
+
+    Returns:
+        pandas.DataFrame: El tipo y los bytes de cada columna antes y después, con una fila
+        'Total' y la reducción porcentual.
+    '''
+    reporte = pd.DataFrame({'tipo_antes': antes.dtypes.astype(str),
+                            'bytes_antes': antes.memory_usage(deep=True, index=False),
+                            'tipo_despues': despues.dtypes.astype(str),
+                            'bytes_despues': despues.memory_usage(deep=True, index=False)})
+    reporte = reporte.reindex(antes.columns.union(despues.columns, sort=False))
+    reporte[['bytes_antes', 'bytes_despues']] = reporte[['bytes_antes', 'bytes_despues']].fillna(0).astype(int)
+    reporte.loc['Total'] = ['', reporte['bytes_antes'].sum(), '', reporte['bytes_despues'].sum()]
+    reporte['reduccion_%'] = (1 - reporte['bytes_despues'] / reporte['bytes_antes']).mul(100).round(2)
+    return reporte
@@ -0,0 +1,229 @@
+## ETL INCREMENTAL: SÓLO SE REPROCESAN LOS HECHOS NUEVOS O MODIFICADOS
+# Importaciones
+import os
+
+import numpy as np
+import pandas as pd
+
+import pipeline_etl as etl
+import horas
+
+# Archivos que conforman el estado del ETL incremental
+ARCHIVO_MANIFIESTO = 'manifiesto.pkl'
+ARCHIVO_CONTEOS = 'conteos.pkl'
+ARCHIVO_HECHOS = 'hechos_crudos.pkl'
+ARCHIVO_VICTIMAS = 'victimas_crudos.pkl'
+ARCHIVO_LIMPIO = 'limpio.pkl'
+
+
+def hash_por_id(df, columna='Id'):
+    '''
+    Calcula un hash del contenido de todas las filas de cada 'Id'.
+
+    Se calcula el hash de cada fila en forma vectorizada y se combinan las filas de un
+    mismo 'Id' ponderándolas por su posición dentro del grupo, de modo que también se
+    detectan los cambios de orden.
+
+    Parameters:
+        df (pandas.DataFrame): Los datos (con las columnas normalizadas).
+        columna (str): La columna identificadora.
+
+    Returns:
+        pandas.Series: El hash (uint64) de cada 'Id'.
+    '''
+    hashes = pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy()
+    posicion = df.groupby(columna, sort=False).cumcount().to_numpy().astype(np.uint64)
+    with np.errstate(over='ignore'):
+        ponderados = hashes * (posicion * np.uint64(2) + np.uint64(1))
+    return pd.Series(ponderados, index=df[columna].to_numpy()).groupby(level=0, sort=False).sum()
+
+def _hora_imputada(hechos):
+    '''
+    Devuelve una máscara con los registros de HECHOS cuya 'Hora' u 'Hora entera' se imputan.
+    '''
+    _, fallidos = horas.parsea_horas(hechos['Hora'])
+    return pd.Series(fallidos, index=hechos.index) | (hechos['Hora entera'] == 'SD')
+
+def _marca_imputaciones(hechos, victimas):
+    '''
+    Indica, para cada 'Id', si su limpieza depende de la hora más frecuente o de las
+    estadísticas de las víctimas (sexo y rol más frecuentes y edad media por sexo).
+    '''
+    imputa_hora = _hora_imputada(hechos).groupby(hechos['Id'].to_numpy()).any()
+
+    imputa_victima = (victimas['Sexo'].isna() | (victimas['Sexo'] == 'SD') | (victimas['Rol'] == 'SD')
+                      | victimas['Rol'].isna() | (victimas['Edad'] == 'SD') | victimas['Edad'].isna())
+    imputa_victima = imputa_victima.groupby(victimas['Id'].to_numpy()).any()
+    return imputa_hora, imputa_victima
+
+def _resta_conteos(conteos, quitar):
+    '''
+    Resta a los conteos acumulados la contribución de los registros que se quitan.
+    '''
+    resultado = {}
+    for clave, valor in conteos.items():
+        restado = valor.sub(quitar[clave], fill_value=0)
+        if isinstance(restado, pd.DataFrame):
+            resultado[clave] = restado[restado['count'] > 0]
+        else:
+            resultado[clave] = restado[restado > 0]
+    return resultado
+
+def _suma_conteos(conteos, agregar):
+    '''
+    Suma a los conteos acumulados la contribución de los registros nuevos.
+    '''
+    return {clave: valor.add(agregar[clave], fill_value=0) for clave, valor in conteos.items()}
+
+def carga_estado(directorio_estado):
+    '''
+    Carga el estado del ETL incremental (o un estado vacío si todavía no existe).
+
+    Parameters:
+        directorio_estado (str): El directorio donde se guarda el estado.
+
+    Returns:
+        dict: El manifiesto, los conteos de imputación, los registros crudos y los limpios.
+    '''
+    ruta = os.path.join(directorio_estado, ARCHIVO_MANIFIESTO)
+    if not os.path.exists(ruta):
+        return None
+    return {'manifiesto': pd.read_pickle(ruta),
+            'conteos': pd.read_pickle(os.path.join(directorio_estado, ARCHIVO_CONTEOS)),
+            'hechos': pd.read_pickle(os.path.join(directorio_estado, ARCHIVO_HECHOS)),
+            'victimas': pd.read_pickle(os.path.join(directorio_estado, ARCHIVO_VICTIMAS)),
+            'limpio': pd.read_pickle(os.path.join(directorio_estado, ARCHIVO_LIMPIO))}
+
+def guarda_estado(estado, directorio_estado):
+    '''
+    Guarda el estado del ETL incremental.
+
+    Parameters:
+        estado (dict): El estado generado por 'actualiza_incremental'.
+        directorio_estado (str): El directorio donde se guarda el estado.
+
+    Returns:
+        None
+    '''
+    os.makedirs(directorio_estado, exist_ok=True)
+    pd.to_pickle(estado['manifiesto'], os.path.join(directorio_estado, ARCHIVO_MANIFIESTO))
+    pd.to_pickle(estado['conteos'], os.path.join(directorio_estado, ARCHIVO_CONTEOS))
+    estado['hechos'].to_pickle(os.path.join(directorio_estado, ARCHIVO_HECHOS))
+    estado['victimas'].to_pickle(os.path.join(directorio_estado, ARCHIVO_VICTIMAS))
+    estado['limpio'].to_pickle(os.path.join(directorio_estado, ARCHIVO_LIMPIO))
+
+def _limpia_ids(hechos, victimas, estadisticas, columnas_derivadas):
+    '''
+    Limpia y une los registros crudos de un conjunto de 'Id'.
+    '''
+    hechos_limpios = etl.limpia_bloque_hechos(hechos, estadisticas)
+    victimas_limpias = etl.limpia_bloque_victimas(victimas, estadisticas)
+    unido = victimas_limpias.merge(hechos_limpios, on='Id', how='left')
+    if columnas_derivadas:
+        unido = etl.agrega_columnas_derivadas(unido)
+    return unido
+
+def _hashes_distintos(actuales, anteriores):
+    '''
+    Compara dos columnas de hashes; un 'Id' ausente en una hoja en ambas versiones no es un cambio.
+    '''
+    iguales = actuales.eq(anteriores).fillna(False) | (actuales.isna() & anteriores.isna())
+    return ~iguales.to_numpy(dtype=bool)
+
+def actualiza_incremental(hechos, victimas, directorio_estado, ruta_salida=None, columnas_derivadas=True):
+    '''
+    Actualiza el conjunto limpio procesando sólo los 'Id' nuevos, modificados o eliminados.
+
+    Se mantiene un manifiesto con el hash del contenido de cada 'Id' en HECHOS y VICTIMAS.
+    Los conteos que usan las imputaciones (horas, sexo, rol y edad por sexo) se actualizan
+    restando la contribución de los registros anteriores y sumando la de los nuevos, sin
+    volver a recorrer todo el conjunto. Si alguna estadística cambia, se vuelven a limpiar
+    también los 'Id' cuyos valores fueron imputados con ella. El resultado es el mismo que
+    el de ejecutar el ETL completo sobre los datos recibidos.
+
+    Parameters:
+        hechos (pandas.DataFrame): La hoja HECHOS completa, tal como se lee del Excel.
+        victimas (pandas.DataFrame): La hoja VICTIMAS completa, tal como se lee del Excel.
+        directorio_estado (str): El directorio donde se guarda el estado entre ejecuciones.
+        ruta_salida (str, optional): Si se indica, se escribe el conjunto limpio en este CSV.
+        columnas_derivadas (bool): Si se agregan las columnas derivadas del EDA.
+
+    Returns:
+        dict: La cantidad de 'Id' nuevos, modificados, eliminados y reimputados.
+    '''
+    hechos = etl.normaliza_columnas(hechos, etl.RENOMBRES_HECHOS)
+    victimas = etl.normaliza_columnas(victimas, etl.RENOMBRES_VICTIMAS)
+
+    # Se calcula el hash de cada 'Id' en ambas hojas; un 'Id' que falta en una de ellas queda
+    # como nulo, con un entero nulable para no perder precisión en los hashes
+    manifiesto = pd.DataFrame({'hash_hechos': hash_por_id(hechos).astype('UInt64'),
+                               'hash_victimas': hash_por_id(victimas).astype('UInt64')})
+    imputa_hora, imputa_victima = _marca_imputaciones(hechos, victimas)
+    manifiesto['imputa_hora'] = imputa_hora.reindex(manifiesto.index, fill_value=False)
+    manifiesto['imputa_victima'] = imputa_victima.reindex(manifiesto.index, fill_value=False)
+
+    estado = carga_estado(directorio_estado)
+    if estado is None:
+        anterior = pd.DataFrame(columns=manifiesto.columns)
+        conteos = etl.acumula_conteos_imputacion([hechos.iloc[:0]], [victimas.iloc[:0]])
+        estado = {'hechos': hechos.iloc[:0], 'victimas': victimas.iloc[:0], 'limpio': None}
+        estadisticas_previas = None
+    else:
+        anterior = estado['manifiesto']
+        conteos = estado['conteos']
+        estadisticas_previas = etl.finaliza_estadisticas_imputacion(conteos)
+
+    # Se clasifican los 'Id' comparando los hashes con el manifiesto anterior
+    comunes = manifiesto.index.intersection(anterior.index)
+    distintos = (_hashes_distintos(manifiesto.loc[comunes, 'hash_hechos'], anterior.loc[comunes, 'hash_hechos'])
+                 | _hashes_distintos(manifiesto.loc[comunes, 'hash_victimas'], anterior.loc[comunes, 'hash_victimas']))
+    nuevos = manifiesto.index.difference(anterior.index)
+    modificados = comunes[distintos]
+    eliminados = anterior.index.difference(manifiesto.index)
+    salientes = modificados.union(eliminados)
+    entrantes = nuevos.union(modificados)
+
+    # Se actualizan los conteos de imputación sólo con los registros que cambian
+    hechos_previos, victimas_previas = estado['hechos'], estado['victimas']
+    quitar = etl.acumula_conteos_imputacion([hechos_previos[hechos_previos['Id'].isin(salientes)]],
+                                            [victimas_previas[victimas_previas['Id'].isin(salientes)]])
+    hechos_entrantes = hechos[hechos['Id'].isin(entrantes)]
+    victimas_entrantes = victimas[victimas['Id'].isin(entrantes)]
+    agregar = etl.acumula_conteos_imputacion([hechos_entrantes], [victimas_entrantes])
+    conteos = _suma_conteos(_resta_conteos(conteos, quitar), agregar)
+    estadisticas = etl.finaliza_estadisticas_imputacion(conteos)
+
+    # Si cambió alguna estadística, se reimputan los 'Id' que dependen de ella
+    reprocesar = entrantes
+    reimputados = pd.Index([])
+    if estadisticas_previas is not None:
+        if estadisticas['hora_moda'] != estadisticas_previas['hora_moda']:
+            reimputados = reimputados.union(manifiesto.index[manifiesto['imputa_hora'].astype(bool)])
+        if any(estadisticas[clave] != estadisticas_previas[clave]
+               for clave in ['moda_Sexo', 'moda_Rol', 'edad_media_sexo']):
+            reimputados = reimputados.union(manifiesto.index[manifiesto['imputa_victima'].astype(bool)])
+        reimputados = reimputados.difference(entrantes)
+        reprocesar = reprocesar.union(reimputados)
+
+    # Se limpian sólo los 'Id' a reprocesar y se actualiza el conjunto limpio
+    procesados = _limpia_ids(hechos[hechos['Id'].isin(reprocesar)],
+                             victimas[victimas['Id'].isin(reprocesar)],
+                             estadisticas, columnas_derivadas)
+    if estado['limpio'] is None:
+        limpio = procesados
+    else:
+        limpio = estado['limpio']
+        limpio = pd.concat([limpio[~limpio['Id'].isin(reprocesar.union(eliminados))], procesados])
+
+    # Se conserva el orden de la hoja VICTIMAS, como en el ETL completo
+    orden = pd.Series(np.arange(len(victimas)), index=victimas['Id'].to_numpy())
+    orden = orden[~orden.index.duplicated()]
+    limpio = limpio.iloc[np.argsort(limpio['Id'].map(orden).to_numpy(), kind='stable')].reset_index(drop=True)
+
+    estado = {'manifiesto': manifiesto, 'conteos': conteos, 'hechos': hechos, 'victimas': victimas, 'limpio': limpio}
+    guarda_estado(estado, directorio_estado)
+    if ruta_salida is not None:
+        limpio.to_csv(ruta_salida, index=False, encoding='utf-8')
+
+    return {'nuevos': len(nuevos), 'modificados': len(modificados),
+            'eliminados': len(eliminados), 'reimputados': len(reimputados)}
@@ -0,0 +1,180 @@
+## ETL EN PARALELO DE VARIOS LIBROS (POR AÑO Y POR JURISDICCIÓN)
+# Importaciones
+import glob
+import os
+import shutil
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import pipeline_etl as etl
+
+# Columna con el nombre del archivo que se agrega cuando los libros se toman de un directorio
+COLUMNA_ARCHIVO = 'Archivo'
+
+# Cantidad de filas por bloque al unir los resultados de cada libro
+FILAS_BLOQUE_UNION = 100_000
+
+
+def lista_libros(origen):
+    '''
+    Arma la lista de libros a procesar a partir de un directorio o de un manifiesto.
+
+    Un directorio se recorre en orden alfabético y a cada libro se le asigna la columna
+    'Archivo' con su nombre sin extensión. Un manifiesto es un CSV con la columna 'ruta'
+    (relativa al manifiesto o absoluta) y, opcionalmente, otras columnas (por ejemplo
+    'Jurisdicción' o 'Año del libro') cuyos valores se agregan a todas las filas de ese libro.
+
+    Parameters:
+        origen (str or list): El directorio, la ruta del manifiesto o una lista de rutas.
+
+    Returns:
+        list: Un diccionario por libro con su 'ruta' y sus columnas de 'identificacion'.
+    '''
+    if isinstance(origen, (list, tuple)):
+        rutas = list(origen)
+    elif os.path.isdir(origen):
+        rutas = sorted(glob.glob(os.path.join(origen, '*.xlsx')))
+    else:
+        manifiesto = pd.read_csv(origen, dtype=str, keep_default_na=False)
+        if 'ruta' not in manifiesto.columns:
+            raise ValueError("El manifiesto debe tener la columna 'ruta'")
+        base = os.path.dirname(os.path.abspath(origen))
+        return [{'ruta': os.path.join(base, fila.pop('ruta')), 'identificacion': fila}
+                for fila in manifiesto.to_dict(orient='records')]
+
+    return [{'ruta': ruta, 'identificacion': {COLUMNA_ARCHIVO: os.path.splitext(os.path.basename(ruta))[0]}}
+            for ruta in rutas]
+
+def _procesa_libro(posicion, libro, directorio, opciones):
+    '''
+    Ejecuta el ETL de un libro en un proceso del conjunto y guarda su resultado parcial.
+
+    Los errores se capturan y se devuelven en el resultado, para que la falla de un libro
+    no detenga el procesamiento de los demás.
+    '''
+    inicio = time.perf_counter()
+    ruta_salida = os.path.join(directorio, f'{posicion:06d}.csv')
+    resultado = {'posicion': posicion, 'ruta': libro['ruta'], 'salida': ruta_salida}
+    try:
+        resultado['filas'] = etl.procesa_homicidios(libro['ruta'], ruta_salida, directorio_temporal=directorio,
+                                                    **opciones)
+        resultado['estado'] = 'ok'
+    except Exception as error:
+        resultado.update(estado='error', filas=0, error=f'{type(error).__name__}: {error}',
+                         detalle=traceback.format_exc())
+    resultado['segundos'] = time.perf_counter() - inicio
+    return resultado
+
+def reporta_progreso(completados, total, resultado):
+    '''
+    Imprime una línea con el avance y el resultado de un libro.
+
+    Parameters:
+        completados (int): La cantidad de libros terminados.
+        total (int): La cantidad total de libros.
+        resultado (dict): El resultado del libro que terminó.
+
+    Returns:
+        None
+    '''
+    if resultado['estado'] == 'ok':
+        detalle = f"{resultado['filas']} filas en {resultado['segundos']:.1f} s"
+    else:
+        detalle = f"ERROR {resultado['error']}"
+    print(f"[{completados}/{total}] {os.path.basename(resultado['ruta'])}: {detalle}")
+
+def une_resultados(libros, resultados, ruta_salida):
+    '''
+    Une los CSV parciales de los libros procesados en un único CSV, en el orden de la lista.
+
+    Los valores se copian como texto, por lo que el resultado es idéntico al de procesar
+    cada libro por separado, con las columnas de identificación agregadas al final.
+
+    Parameters:
+        libros (list): Los libros de 'lista_libros'.
+        resultados (list): Los resultados de cada libro, en el mismo orden.
+        ruta_salida (str): La ruta del CSV unido.
+
+    Returns:
+        int: La cantidad de filas escritas.
+    '''
+    columnas = None
+    for resultado in resultados:
+        if resultado['estado'] == 'ok' and resultado['filas'] > 0:
+            columnas = list(pd.read_csv(resultado['salida'], nrows=0).columns)
+            break
+    if columnas is None:
+        return 0
+
+    def bloques():
+        for libro, resultado in zip(libros, resultados):
+            if resultado['estado'] != 'ok' or resultado['filas'] == 0:
+                continue
+            for bloque in pd.read_csv(resultado['salida'], dtype=str, keep_default_na=False,
+                                      chunksize=FILAS_BLOQUE_UNION):
+                # Se alinean las columnas con las del primer libro para que el CSV sea consistente
+                bloque = bloque.assign(**libro['identificacion'])
+                extra = [c for c in bloque.columns if c not in columnas]
+                yield bloque.reindex(columns=columnas + extra, fill_value='')
+
+    return etl.escribe_csv(bloques(), ruta_salida)
+
+def procesa_libros(origen, ruta_salida, procesos=None, progreso=reporta_progreso, directorio_temporal=None,
+                   **opciones):
+    '''
+    Ejecuta el ETL de HECHOS y VICTIMAS de varios libros en paralelo y une los resultados.
+
+    Cada libro se procesa completo (con sus propias estadísticas de imputación) en un
+    proceso del conjunto, que escribe un CSV parcial. Al terminar, los parciales se unen
+    en el orden de 'lista_libros', por lo que el resultado no depende del orden en que
+    terminan los procesos. Los libros que fallan se informan y se omiten de la unión.
+
+    Parameters:
+        origen (str or list): El directorio, el manifiesto o la lista de libros (ver 'lista_libros').
+        ruta_salida (str): La ruta del CSV limpio unido.
+        procesos (int, optional): La cantidad de procesos. Por defecto, la cantidad de núcleos.
+            Con 1 se procesa en el proceso actual.
+        progreso (callable, optional): Se llama con (completados, total, resultado) al terminar
+            cada libro. Con None no se informa el avance.
+        directorio_temporal (str, optional): El directorio para los resultados parciales.
+        **opciones: Otros argumentos para 'pipeline_etl.procesa_homicidios'.
+
+    Returns:
+        pandas.DataFrame: Un reporte con el estado, las filas, los segundos y el error de
+        cada libro, en el orden de la lista.
+    '''
+    libros = lista_libros(origen)
+    procesos = procesos or os.cpu_count() or 1
+    directorio = tempfile.mkdtemp(prefix='etl_libros_', dir=directorio_temporal)
+    resultados = [None] * len(libros)
+    try:
+        if procesos == 1 or len(libros) <= 1:
+            for posicion, libro in enumerate(libros):
+                resultados[posicion] = _procesa_libro(posicion, libro, directorio, opciones)
+                if progreso is not None:
+                    progreso(posicion + 1, len(libros), resultados[posicion])
+        else:
+            with ProcessPoolExecutor(max_workers=min(procesos, len(libros))) as ejecutor:
+                futuros = {ejecutor.submit(_procesa_libro, posicion, libro, directorio, opciones): posicion
+                           for posicion, libro in enumerate(libros)}
+                for completados, futuro in enumerate(as_completed(futuros), start=1):
+                    posicion = futuros[futuro]
+                    try:
+                        resultados[posicion] = futuro.result()
+                    except Exception as error:
+                        # Falla del proceso en sí (por ejemplo, falta de memoria)
+                        resultados[posicion] = {'posicion': posicion, 'ruta': libros[posicion]['ruta'],
+                                                'estado': 'error', 'filas': 0, 'segundos': float('nan'),
+                                                'error': f'{type(error).__name__}: {error}'}
+                    if progreso is not None:
+                        progreso(completados, len(libros), resultados[posicion])
+
+        une_resultados(libros, resultados, ruta_salida)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    return pd.DataFrame(resultados, columns=['ruta', 'estado', 'filas', 'segundos', 'error'])
@@ -0,0 +1,402 @@
+## GRÁFICOS DEL EDA A PARTIR DE LOS RESULTADOS DE 'calculos_eda'
+# Importaciones
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+import calculos_eda
+
+
+def dibuja_accidentes_mensuales(resultado):
+    '''
+    Crea gráficos de línea con la cantidad de víctimas por mes, uno por año, en una
+    cuadrícula de dos columnas.
+
+    Parameters:
+        resultado (ResultadoEDA): El resultado de 'calcula_accidentes_mensuales'.
+
+    Returns:
+        matplotlib.figure.Figure: La figura creada.
+    '''
+    # Se define el número de filas y columnas para la cuadrícula de subgráficos
+    n_columnas = 2
+    n_filas = max(3, math.ceil(len(resultado.datos) / n_columnas))
+
+    fig, axes = plt.subplots(n_filas, n_columnas, figsize=(14, 8), squeeze=False)
+
+    # Se crea un gráfico por año
+    for i, (year, data_mensual) in enumerate(resultado.datos.items()):
+        ax = axes[i // n_columnas, i % n_columnas]
+        data_mensual.plot(ax=ax, kind='line')
+        ax.set_title('Año ' + str(year)) ; ax.set_xlabel('Mes') ; ax.set_ylabel('Cantidad de Víctimas')
+        ax.legend_ = None
+
+    plt.tight_layout()
+    return fig
+
+def dibuja_victimas_mensuales(resultado):
+    '''
+    Crea un gráfico de barras con la cantidad de víctimas por mes.
+
+    Parameters:
+        resultado (ResultadoEDA): El resultado de 'calcula_victimas_mensuales'.
+
+    Returns:
+        matplotlib.figure.Figure: La figura creada.
+    '''
+    fig = plt.figure(figsize=(6,4))
+    ax = sns.barplot(x='Mes', y='Cantidad víctimas', data=resultado.datos)
+    ax.set_title('Cantidad de víctimas por Mes')
+    ax.set_xlabel('Mes') ; ax.set_ylabel('Cantidad de Accidentes')
+    return fig
+
+def dibuja_victimas_por_dia_semana(resultado):
+    '''
+    Crea un gráfico de barras con la cantidad de víctimas por día de la semana.
+
+    Parameters:
+        resultado (ResultadoEDA): El resultado de 'calcula_victimas_por_dia_semana'.
+
+    Returns:
+        matplotlib.figure.Figure: La figura creada.
+    '''
+    fig = plt.figure(figsize=(6, 3))
+    ax = sns.barplot(x='Nombre día', y='Cantidad víctimas', data=resultado.datos, order=calculos_eda.DIAS_SEMANA)
+    ax.set_title('Cantidad de Accidentes por Día de la Semana') ; ax.set_xlabel('Día de la Semana') ; ax.set_ylabel('Cantidad de Accidentes')
+    plt.xticks(rotation=45)
+    return fig
+
+def dibuja_accidentes_por_categoria_tiempo(resultado):
+    '''
+    Crea un gráfico de barras con la cantidad de accidentes por categoría de tiempo.
+
+    Parameters:
+        resultado (ResultadoEDA): El resultado de 'calcula_accidentes_por_categoria_tiempo'.
+
+    Returns:
+        matplotlib.figure.Figure: La figura creada.
+    '''
+    data = resultado.datos
+    fig = plt.figure(figsize=(6, 4))
+    ax = sns.barplot(x='Categoria tiempo', y='Cantidad accidentes', data=data)
+    ax.set_title('Cantidad de Accidentes por Categoría de Tiempo') ; ax.set_xlabel('Categoría de Tiempo') ; ax.set_ylabel('Cantidad de Accidentes')
+
+    # Se agrega las cantidades en las barras
+    for index, row in data.iterrows():
+        ax.annotate(f'{row["Cantidad accidentes"]}', (index, row["Cantidad accidentes"]), ha='center', va='bottom')
+    return fig
+
+def dibuja_accidentes_por_horas_del_dia(resultado):
+    '''
+    Crea un gráfico de barras con la cantidad de accidentes por hora del día.
+
+    Parameters:
+        resultado (ResultadoEDA): El resultado de 'calcula_accidentes_por_horas_del_dia'.
+
+    Returns:
+        matplotlib.figure.Figure: La figura creada.
+    '''
+    data = resultado.datos
+    fig = plt.figure(figsize=(12, 4))
+    ax = sns.barplot(x='Hora del día', y='Cantidad de accidentes', data=data)
+    ax.set_title('Cantidad de Accidentes por Hora del Día') ; ax.set_xlabel('Hora del día') ; ax.set_ylabel('Cantidad de accidentes')
+
+    # Se agrega las cantidades en las barras
+    for index, row in data.iterrows():
+        ax.annotate(f'{row["Cantidad de accidentes"]}', (row["Hora del día"], row["Cantidad de accidentes"]), ha='center', va='bottom')
+    return fig
+
+def dibuja_accidentes_semana_fin_de_semana(resultado):
+    '''
+    Crea un gráfico de barras con la cantidad de accidentes por tipo de día.
+
+    Parameters:
+        resultado (ResultadoEDA): El resultado de 'calcula_accidentes_semana_fin_de_semana'.
+
+    Returns:
+        matplotlib.figure.Figure: La figura creada.
+    '''
+    data = resultado.datos
+    fig = plt.figure(figsize=(6, 4))
+    ax = sns.barplot(x='Tipo de día', y='Cantidad de accidentes', data=data)
+    ax.set_title('Cantidad de accidentes por tipo de día') ; ax.set_xlabel('Tipo de día') ; ax.set_ylabel('Cantidad de accidentes')
+
+    # Se agrega las cantidades en las barras
+    for index, row in data.iterrows():
+        ax.annotate(f'{row["Cantidad de accidentes"]}', (index, row["Cantidad de accidentes"]), ha='center', va='bottom')
+    return fig
+
+def dibuja_distribucion_edad(resultado):
+    '''
+    Crea un histograma y un boxplot de la edad de las víctimas.
+
+    Parameters:
+        resultado (ResultadoEDA): El resultado de 'calcula_distribucion_edad'.
+
+    Returns:
+        matplotlib.figure.Figure: La figura creada.
+    '''
+    fig, ax = plt.subplots(2, 1, figsize=(12, 6), sharex=True)
+
+    sns.histplot(resultado.datos, kde=True, ax=ax[0])
+    ax[0].set_title('Histograma de Edad') ; ax[0].set_ylabel('Frecuencia')
+
+    sns.boxplot(x=resultado.datos, ax=ax[1])
+    ax[1].set_title('Boxplot de Edad') ; ax[1].set_xlabel('Edad')
+
+    plt.tight_layout()
+    return fig
+
+def dibuja_distribucion_edad_por_anio(resultado):
+    '''
+    Crea un boxplot de la edad de las víctimas por año.
+
+    Parameters:
+        resultado (ResultadoEDA): El resultado de 'calcula_distribucion_edad_por_anio'.
+
+    Returns:
+        matplotlib.figure.Figure: La figura creada.
+    '''
+    fig = plt.figure(figsize=(12, 6))
+    sns.boxplot(x='Año', y='Edad', data=resultado.datos)
+    plt.title('Boxplot de Edades de Víctimas por Año') ; plt.xlabel('Año') ; plt.ylabel('Edad de las Víctimas')
+    return fig
+
+def dibuja_accidentes_por_anio_y_sexo(resultado):
+    '''
+    Crea un gráfico de barras de la edad de las víctimas por año y sexo.
+
+    Parameters:
+        resultado (ResultadoEDA): El resultado de 'calcula_accidentes_por_anio_y_sexo'.
+
+    Returns:
+        matplotlib.figure.Figure: La figura creada.
+    '''
+    fig = plt.figure(figsize=(12, 4))
+    sns.barplot(x='Año', y='Edad', hue='Sexo', data=resultado.datos,)
+    plt.title('Cantidad de Accidentes por Año y Sexo')
+    plt.xlabel('Año') ; plt.ylabel('Edad de las víctimas') ; plt.legend(title='Sexo')
+    return fig
+
+def dibuja_cohen_por_año(resultado):
+    '''
+    Crea un gráfico de barras con el estadístico de Cohen por año.
+
+    Parameters:
+        resultado (ResultadoEDA): El resultado de 'calcula_cohen_por_año'.
+
+    Returns:
+        matplotlib.figure.Figure: La figura creada.
+    '''
+    cohen_df = resultado.datos
+    fig = plt.figure(figsize=(8, 4))
+    plt.bar(cohen_df['Año'], cohen_df['Estadistico de Cohen'], color='skyblue')
+    plt.xlabel('Año') ; plt.ylabel('Estadístico de Cohen') ; plt.title('Estadístico de Cohen por Año')
+    plt.xticks(cohen_df['Año'])
+    return fig
+
+def dibuja_edad_y_rol_victimas(resultado):
+    '''
+    Crea un boxplot de la edad de las víctimas por rol.
+
+    Parameters:
+        resultado (ResultadoEDA): El resultado de 'calcula_edad_y_rol_victimas'.
+
+    Returns:
+        matplotlib.figure.Figure: La figura creada.
+    '''
+    fig = plt.figure(figsize=(8, 4))
+    sns.boxplot(y='Rol', x='Edad', data=resultado.datos)
+    plt.title('Edades por Condición')
+    return fig
+
+def dibuja_distribucion_edad_por_victima(resultado):
+    '''
+    Crea un boxplot de la edad de las víctimas por tipo de vehículo.
+
+    Parameters:
+        resultado (ResultadoEDA): El resultado de 'calcula_distribucion_edad_por_victima'.
+
+    Returns:
+        matplotlib.figure.Figure: La figura creada.
+    '''
+    fig = plt.figure(figsize=(14, 6))
+    sns.boxplot(x='Víctima', y='Edad', data=resultado.datos)
+    plt.title('Boxplot de Edades de Víctimas por tipo de vehículo que usaba') ; plt.xlabel('Tipo de vehiculo') ; plt.ylabel('Edad de las Víctimas')
+    return fig
+
+def dibuja_victimas_sexo_rol_victima(resultado):
+    '''
+    Crea los gráficos de barras de víctimas por sexo, por rol y por tipo de vehículo.
+
+    Parameters:
+        resultado (ResultadoEDA): El resultado de 'calcula_victimas_sexo_rol_victima'.
+
+    Returns:
+        matplotlib.figure.Figure: La figura creada.
+    '''
+    datos = resultado.datos
+    fig, axes = plt.subplots(1, 3, figsize=(15, 4))
+
+    # Gráfico 1: Sexo
+    sns.barplot(data=datos['sexo'], x='Sexo', y='count', ax=axes[0])
+    axes[0].set_title('Cantidad de víctimas por sexo') ; axes[0].set_ylabel('Cantidad de víctimas')
+
+    # Se define una paleta de colores personalizada (invierte los colores)
+    colores_por_defecto = sns.color_palette()
+    colores_invertidos = [colores_por_defecto[1], colores_por_defecto[0]]
+
+    # Gráfico 2: Rol
+    datos['rol'].plot(kind='bar', stacked=True, ax=axes[1], color=colores_invertidos)
+    axes[1].set_title('Cantidad de víctimas por rol') ; axes[1].set_ylabel('Cantidad de víctimas') ; axes[1].tick_params(axis='x', rotation=45)
+    axes[1].legend().set_visible(False)
+
+    # Gráfico 3: Tipo de vehículo
+    datos['victima'].plot(kind='bar', stacked=True, ax=axes[2], color=colores_invertidos)
+    axes[2].set_title('Cantidad de víctimas por tipo de vehículo') ; axes[2].set_ylabel('Cantidad de víctimas') ; axes[2].tick_params(axis='x', rotation=45)
+    axes[2].legend().set_visible(False)
+    return fig
+
+def dibuja_victimas_participantes(resultado):
+    '''
+    Crea un gráfico de barras con la cantidad de víctimas por participantes.
+
+    Parameters:
+        resultado (ResultadoEDA): El resultado de 'calcula_victimas_participantes'.
+
+    Returns:
+        matplotlib.figure.Figure: La figura creada.
+    '''
+    ordenado = resultado.datos
+    fig = plt.figure(figsize=(15, 4))
+    ax = sns.barplot(data=ordenado, x='Participantes', y='count', order=ordenado['Participantes'])
+    ax.set_title('Cantidad de víctimas por participantes')
+    ax.set_ylabel('Cantidad de víctimas')
+    ax.set_xticks(ax.get_xticks())
+    ax.set_xticklabels(ax.get_xticklabels(), rotation=45, horizontalalignment='right')
+    return fig
+
+def dibuja_acusados(resultado):
+    '''
+    Crea un gráfico de barras con la cantidad de acusados.
+
+    Parameters:
+        resultado (ResultadoEDA): El resultado de 'calcula_acusados'.
+
+    Returns:
+        matplotlib.figure.Figure: La figura creada.
+    '''
+    ordenado = resultado.datos
+    fig = plt.figure(figsize=(15, 4))
+    ax = sns.barplot(data=ordenado, x='Acusado', y='count', order=ordenado['Acusado'])
+    ax.set_title('Cantidad de acusados en los hechos') ; ax.set_ylabel('Cantidad de acusados')
+    ax.set_xticks(ax.get_xticks())
+    ax.set_xticklabels(ax.get_xticklabels(), rotation=45, horizontalalignment='right')
+    return fig
+
+def dibuja_accidentes_tipo_de_calle(resultado):
+    '''
+    Crea los gráficos de barras de víctimas por tipo de calle y en cruces.
+
+    Parameters:
+        resultado (ResultadoEDA): El resultado de 'calcula_accidentes_tipo_de_calle'.
+
+    Returns:
+        matplotlib.figure.Figure: La figura creada.
+    '''
+    fig, axes = plt.subplots(1, 2, figsize=(10, 4))
+
+    sns.barplot(data=resultado.datos['tipo_de_calle'], x='Tipo de calle', y='count', ax=axes[0])
+    axes[0].set_title('Cantidad de víctimas por tipo de calle') ; axes[0].set_ylabel('Cantidad de víctimas')
+
+    sns.barplot(data=resultado.datos['cruce'], x='Cruce', y='count', ax=axes[1])
+    axes[1].set_title('Cantidad de víctimas en cruces') ; axes[1].set_ylabel('Cantidad de víctimas')
+    return fig
+
+# Gráficos disponibles, por nombre (los mismos nombres que usan los cálculos)
+GRAFICOS = {
+    'accidentes_mensuales': dibuja_accidentes_mensuales,
+    'victimas_mensuales': dibuja_victimas_mensuales,
+    'victimas_por_dia_semana': dibuja_victimas_por_dia_semana,
+    'accidentes_por_categoria_tiempo': dibuja_accidentes_por_categoria_tiempo,
+    'accidentes_por_horas_del_dia': dibuja_accidentes_por_horas_del_dia,
+    'accidentes_semana_fin_de_semana': dibuja_accidentes_semana_fin_de_semana,
+    'distribucion_edad': dibuja_distribucion_edad,
+    'distribucion_edad_por_anio': dibuja_distribucion_edad_por_anio,
+    'accidentes_por_anio_y_sexo': dibuja_accidentes_por_anio_y_sexo,
+    'cohen_por_año': dibuja_cohen_por_año,
+    'edad_y_rol_victimas': dibuja_edad_y_rol_victimas,
+    'distribucion_edad_por_victima': dibuja_distribucion_edad_por_victima,
+    'victimas_sexo_rol_victima': dibuja_victimas_sexo_rol_victima,
+    'victimas_participantes': dibuja_victimas_participantes,
+    'acusados': dibuja_acusados,
+    'accidentes_tipo_de_calle': dibuja_accidentes_tipo_de_calle,
+}
+
+def _inicializa_proceso():
+    '''
+    Configura cada proceso de dibujo con el backend no interactivo 'Agg'.
+    '''
+    matplotlib.use('Agg', force=True)
+
+def guarda_grafico(resultado, directorio, formatos=('png',), dpi=100):
+    '''
+    Dibuja un resultado y guarda la figura en los formatos indicados.
+
+    Parameters:
+        resultado (ResultadoEDA): El resultado a dibujar.
+        directorio (str): El directorio de salida.
+        formatos (tuple): Los formatos de archivo, por ejemplo ('png', 'svg').
+        dpi (int): La resolución de las imágenes rasterizadas.
+
+    Returns:
+        list: Las rutas de los archivos generados.
+    '''
+    fig = GRAFICOS[resultado.nombre](resultado)
+    rutas = []
+    for formato in formatos:
+        ruta = os.path.join(directorio, f'{resultado.nombre}.{formato}')
+        fig.savefig(ruta, format=formato, dpi=dpi, bbox_inches='tight')
+        rutas.append(ruta)
+    plt.close(fig)
+    return rutas
+
+def renderiza_graficos(df, directorio, formatos=('png',), procesos=None, nombres=None, dpi=100):
+    '''
+    Calcula y guarda todos los gráficos del EDA en paralelo, sin mostrarlos.
+
+    Los cálculos se hacen una vez en el proceso principal y sólo los resultados (ya
+    agregados) se envían a un conjunto de procesos que dibujan con el backend 'Agg'.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame limpio de homicidios.
+        directorio (str): El directorio de salida.
+        formatos (tuple): Los formatos de archivo, por ejemplo ('png', 'svg').
+        procesos (int, optional): La cantidad de procesos. Por defecto, la cantidad de núcleos.
+            Con 1 se dibuja en el proceso actual, sin cambiar su backend de matplotlib.
+        nombres (list, optional): Los gráficos a generar. Por defecto, todos.
+        dpi (int): La resolución de las imágenes rasterizadas.
+
+    Returns:
+        dict: Las rutas de los archivos generados, por nombre de gráfico.
+    '''
+    os.makedirs(directorio, exist_ok=True)
+    resultados = calculos_eda.calcula_todos(df, nombres)
+
+    if procesos == 1:
+        # No se cambia el backend de la sesión (por ejemplo, el 'inline' de un notebook): se dibuja
+        # con el modo interactivo apagado y cada figura se cierra al guardarla, sin mostrarse
+        with plt.ioff():
+            return {nombre: guarda_grafico(resultado, directorio, formatos, dpi) for nombre, resultado in resultados.items()}
+
+    rutas = {}
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializa_proceso) as ejecutor:
+        futuros = {ejecutor.submit(guarda_grafico, resultado, directorio, formatos, dpi): nombre
+                   for nombre, resultado in resultados.items()}
+        for futuro in as_completed(futuros):
+            rutas[futuros[futuro]] = futuro.result()
+    return rutas
@@ -0,0 +1,171 @@
+## LECTURA POR LOTES DE LAS HORAS DE LAS CELDAS DE EXCEL
+# Importaciones
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from calculos_eda import categoriza_momento_dia
+
+SEGUNDOS_DIA = 86_400
+
+# Categoría de tiempo de cada hora entera (0 a 23), con las mismas franjas que 'categoriza_momento_dia'
+CATEGORIA_POR_HORA = categoriza_momento_dia(pd.Series(np.arange(24))).to_numpy(dtype=object)
+
+
+def _de_textos(textos):
+    '''
+    Convierte textos 'HH:MM:SS' (o 'H:MM', o una fecha seguida de la hora) a segundos.
+    '''
+    textos = pd.Series(textos, dtype=object).str.strip()
+    # El formato habitual se interpreta en un único llamado
+    tiempos = pd.to_datetime(textos, format='%H:%M:%S', errors='coerce')
+    segundos = (tiempos.dt.hour * 3600 + tiempos.dt.minute * 60 + tiempos.dt.second).to_numpy(dtype=float, copy=True)
+
+    # Los demás formatos se buscan con una expresión regular
+    otros = np.isnan(segundos)
+    if otros.any():
+        partes = textos[otros].str.extract(r'(?:^|[ T])(\d{1,2}):(\d{2})(?::(\d{2}))?(?:\.\d+)?$').astype(float)
+        validos = (partes[0] < 24) & (partes[1] < 60) & (partes[2].fillna(0) < 60)
+        segundos[otros] = (partes[0] * 3600 + partes[1] * 60 + partes[2].fillna(0)).where(validos).to_numpy()
+    return segundos
+
+def _de_numeros(numeros):
+    '''
+    Convierte números de Excel (fracción del día o fecha serial con hora) a segundos.
+    '''
+    numeros = np.asarray(numeros, dtype=float)
+    segundos = np.round((numeros % 1) * SEGUNDOS_DIA) % SEGUNDOS_DIA
+    return np.where(np.isfinite(numeros) & (numeros >= 0), segundos, np.nan)
+
+def _de_fechas(fechas):
+    '''
+    Obtiene los segundos desde la medianoche de objetos datetime o Timestamp.
+    '''
+    fechas = pd.DatetimeIndex(fechas)
+    return (fechas.hour * 3600 + fechas.minute * 60 + fechas.second).to_numpy(dtype=float)
+
+def _de_tiempos(tiempos):
+    '''
+    Obtiene los segundos desde la medianoche de objetos time.
+    '''
+    return np.array([t.hour * 3600 + t.minute * 60 + t.second for t in tiempos], dtype=float)
+
+def _de_duraciones(duraciones):
+    '''
+    Obtiene los segundos desde la medianoche de duraciones (timedelta).
+    '''
+    return pd.to_timedelta(duraciones).total_seconds().to_numpy() % SEGUNDOS_DIA
+
+def _conversor(tipo):
+    '''
+    Devuelve la función que convierte los valores de un tipo de Python (o None si no se puede).
+    '''
+    if issubclass(tipo, str):
+        return _de_textos
+    if issubclass(tipo, datetime.datetime):
+        return _de_fechas
+    if issubclass(tipo, datetime.time):
+        return _de_tiempos
+    if issubclass(tipo, datetime.timedelta):
+        return _de_duraciones
+    if issubclass(tipo, (int, float, np.number)) and not issubclass(tipo, (bool, np.bool_)):
+        return _de_numeros
+    return None
+
+def parsea_horas(serie):
+    '''
+    Convierte una columna de horas a segundos desde la medianoche, agrupando los valores por tipo.
+
+    Las celdas de la hoja HECHOS mezclan textos, objetos time, objetos datetime y números de
+    Excel. Se factoriza la columna, se obtiene el tipo de cada valor distinto una sola vez y
+    cada grupo de tipo se convierte con una operación vectorizada; el resultado se reparte a
+    las filas con los códigos. Las columnas datetime, timedelta o numéricas se convierten directamente.
+
+    Parameters:
+        serie (pandas.Series or array-like): La columna de horas.
+
+    Returns:
+        tuple: Los segundos (numpy.ndarray de int32, -1 en los valores que no se pudieron
+        interpretar) y la máscara de esos valores fallidos.
+    '''
+    serie = serie if isinstance(serie, pd.Series) else pd.Series(serie)
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        segundos = _de_fechas(serie)
+    elif pd.api.types.is_timedelta64_dtype(serie):
+        segundos = _de_duraciones(serie)
+    elif pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        segundos = _de_numeros(serie)
+    else:
+        # Una columna de horas tiene pocos valores distintos: se convierten sólo los únicos
+        codigos, unicos = pd.factorize(serie)
+        valores = np.asarray(unicos, dtype=object)
+        convertidos = np.full(len(valores) + 1, np.nan)
+        codigos_tipo, tipos = pd.factorize(np.fromiter(map(type, valores), dtype=object, count=len(valores)))
+        for codigo, tipo in enumerate(tipos):
+            conversor = _conversor(tipo)
+            if conversor is not None:
+                posiciones = np.flatnonzero(codigos_tipo == codigo)
+                convertidos[posiciones] = conversor(valores[posiciones])
+        # Los faltantes tienen código -1, que toma el último valor (NaN)
+        segundos = convertidos[codigos]
+
+    fallidos = np.isnan(segundos)
+    return np.where(fallidos, -1, segundos).astype(np.int32), fallidos
+
+def moda_segundos(segundos, fallidos):
+    '''
+    Devuelve la hora más frecuente en segundos (la menor si hay empate, como 'Series.mode').
+
+    Parameters:
+        segundos (numpy.ndarray): Los segundos de 'parsea_horas'.
+        fallidos (numpy.ndarray): La máscara de valores fallidos.
+
+    Returns:
+        int: Los segundos de la hora más frecuente.
+    '''
+    return int(np.argmax(np.bincount(segundos[~fallidos], minlength=SEGUNDOS_DIA)))
+
+def segundos_a_time(segundos, fallidos=None):
+    '''
+    Convierte segundos desde la medianoche a objetos time, creando un objeto por valor distinto.
+
+    Parameters:
+        segundos (numpy.ndarray): Los segundos.
+        fallidos (numpy.ndarray, optional): La máscara de valores fallidos, que quedan como None.
+
+    Returns:
+        numpy.ndarray: Los objetos time (de tipo object).
+    '''
+    unicos, posiciones = np.unique(segundos, return_inverse=True)
+    tiempos = np.array([datetime.time(s // 3600, s // 60 % 60, s % 60) if s >= 0 else None
+                        for s in unicos.tolist()] + [None], dtype=object)
+    if fallidos is not None:
+        posiciones = np.where(fallidos, len(unicos), posiciones)
+    return tiempos[posiciones]
+
+def columnas_de_hora(segundos, fallidos=None, imputacion=None):
+    '''
+    Obtiene 'Hora entera', 'Hora del día' y 'Categoria tiempo' a partir de los segundos.
+
+    La categoría se toma de una tabla de 24 horas, sin volver a recorrer la columna de horas.
+
+    Parameters:
+        segundos (numpy.ndarray): Los segundos de 'parsea_horas'.
+        fallidos (numpy.ndarray, optional): La máscara de valores fallidos.
+        imputacion (int, optional): Los segundos a usar en los valores fallidos. Si no se indican,
+            los fallidos quedan como NaN en las horas y None en la categoría.
+
+    Returns:
+        dict: Las tres columnas (numpy.ndarray), con la hora entera como int8 si no hay faltantes.
+    '''
+    segundos = np.asarray(segundos)
+    if fallidos is not None and imputacion is not None:
+        segundos = np.where(fallidos, imputacion, segundos)
+        fallidos = None
+    hora = (segundos // 3600).astype(np.int8)
+    categoria = CATEGORIA_POR_HORA[np.clip(hora, 0, 23)]
+    if fallidos is not None and fallidos.any():
+        hora = np.where(fallidos, np.nan, hora)
+        categoria[fallidos] = None
+    return {'Hora entera': hora, 'Hora del día': hora, 'Categoria tiempo': categoria}
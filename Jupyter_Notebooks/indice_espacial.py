@@ -0,0 +1,265 @@
+## ÍNDICE ESPACIAL DE LOS HECHOS PARA CONSULTAS POR RADIO, VECINOS, RECTÁNGULO Y PUNTOS CALIENTES
+# Importaciones
+import numpy as np
+import pandas as pd
+from scipy import ndimage
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+# Radio medio de la Tierra en metros
+RADIO_TIERRA = 6_371_008.8
+
+# Rectángulo (lon_min, lat_min, lon_max, lat_max) que contiene a la Ciudad de Buenos Aires, con margen
+LIMITES_CABA = (-58.56, -34.72, -58.33, -34.52)
+
+
+def coordenadas_validas(df, columnas=('Pos x', 'Pos y'), limites=LIMITES_CABA):
+    '''
+    Obtiene las coordenadas WGS84 de cada registro e indica cuáles son utilizables.
+
+    El ETL reemplaza las coordenadas faltantes ('.') por 0, por lo que se consideran
+    inválidos los valores 0, los nulos, los textos que no son números y, si se indican
+    límites, los puntos que quedan fuera de ellos.
+
+    Parameters:
+        df (pandas.DataFrame): Los datos con las columnas de longitud y latitud.
+        columnas (tuple): Los nombres de las columnas de longitud y latitud.
+        limites (tuple, optional): El rectángulo (lon_min, lat_min, lon_max, lat_max) válido.
+
+    Returns:
+        tuple: La longitud y la latitud (numpy.ndarray de float) y la máscara de registros válidos.
+    '''
+    lon = pd.to_numeric(df[columnas[0]], errors='coerce').to_numpy(dtype=float)
+    lat = pd.to_numeric(df[columnas[1]], errors='coerce').to_numpy(dtype=float)
+
+    # Se descartan los nulos y el marcador 0 que deja el ETL
+    validos = np.isfinite(lon) & np.isfinite(lat) & (lon != 0) & (lat != 0)
+    if limites is not None:
+        lon_min, lat_min, lon_max, lat_max = limites
+        validos &= (lon >= lon_min) & (lon <= lon_max) & (lat >= lat_min) & (lat <= lat_max)
+    return lon, lat, validos
+
+def proyecta_a_metros(lon, lat, origen):
+    '''
+    Proyecta longitudes y latitudes a metros con una proyección equirectangular local.
+
+    A la escala de una ciudad el error es despreciable y permite usar distancias euclídeas.
+
+    Parameters:
+        lon (numpy.ndarray): Las longitudes en grados.
+        lat (numpy.ndarray): Las latitudes en grados.
+        origen (tuple): La longitud y latitud del origen de la proyección.
+
+    Returns:
+        numpy.ndarray: Un arreglo de n x 2 con las coordenadas x, y en metros.
+    '''
+    lon0, lat0 = origen
+    x = np.radians(np.asarray(lon, dtype=float) - lon0) * RADIO_TIERRA * np.cos(np.radians(lat0))
+    y = np.radians(np.asarray(lat, dtype=float) - lat0) * RADIO_TIERRA
+    return np.column_stack([x, y])
+
+def metros_a_grados(xy, origen):
+    '''
+    Convierte coordenadas en metros de 'proyecta_a_metros' a longitud y latitud.
+
+    Parameters:
+        xy (numpy.ndarray): Un arreglo de n x 2 con las coordenadas x, y en metros.
+        origen (tuple): La longitud y latitud del origen de la proyección.
+
+    Returns:
+        tuple: La longitud y la latitud en grados.
+    '''
+    lon0, lat0 = origen
+    xy = np.atleast_2d(xy)
+    lon = lon0 + np.degrees(xy[:, 0] / (RADIO_TIERRA * np.cos(np.radians(lat0))))
+    lat = lat0 + np.degrees(xy[:, 1] / RADIO_TIERRA)
+    return lon, lat
+
+def construye_indice(df, columnas=('Pos x', 'Pos y'), limites=LIMITES_CABA):
+    '''
+    Construye un índice espacial (árbol KD) sobre las coordenadas válidas de los hechos.
+
+    Los registros sin coordenadas (nulos o con el 0 que deja el ETL) no se indexan y
+    quedan informados en 'sin_coordenadas'.
+
+    Parameters:
+        df (pandas.DataFrame): Los datos con las columnas de longitud y latitud.
+        columnas (tuple): Los nombres de las columnas de longitud y latitud.
+        limites (tuple, optional): El rectángulo (lon_min, lat_min, lon_max, lat_max) válido.
+
+    Returns:
+        dict: El índice, con las claves:
+        - 'arbol': El árbol KD (scipy.spatial.cKDTree) sobre las coordenadas en metros.
+        - 'etiquetas': Las etiquetas del índice de 'df' de cada punto indexado.
+        - 'origen': El origen (lon, lat) de la proyección a metros.
+        - 'xy': Las coordenadas en metros de cada punto indexado.
+        - 'orden_x': El orden de los puntos según x, para las consultas por rectángulo.
+        - 'x_ordenado': Las coordenadas x de los puntos en ese orden.
+        - 'sin_coordenadas': Las etiquetas de los registros que no se indexaron.
+    '''
+    lon, lat, validos = coordenadas_validas(df, columnas, limites)
+    if not validos.any():
+        raise ValueError('No hay registros con coordenadas válidas para indexar')
+
+    # Se proyecta a metros tomando como origen el centro de los puntos válidos
+    origen = (float(np.mean(lon[validos])), float(np.mean(lat[validos])))
+    xy = proyecta_a_metros(lon[validos], lat[validos], origen)
+    orden_x = np.argsort(xy[:, 0], kind='stable')
+
+    return {'arbol': cKDTree(xy),
+            'etiquetas': df.index.to_numpy()[validos],
+            'origen': origen,
+            'xy': xy,
+            'orden_x': orden_x,
+            'x_ordenado': xy[orden_x, 0],
+            'sin_coordenadas': df.index[~validos]}
+
+def busca_en_radio(indice, lon, lat, radio_m):
+    '''
+    Busca los hechos a menos de cierta distancia de un punto.
+
+    Parameters:
+        indice (dict): El índice generado por 'construye_indice'.
+        lon (float): La longitud del centro.
+        lat (float): La latitud del centro.
+        radio_m (float): El radio de búsqueda en metros.
+
+    Returns:
+        pandas.DataFrame: Las etiquetas ('indice') de los hechos y su distancia en metros,
+        ordenados por distancia.
+    '''
+    centro = proyecta_a_metros([lon], [lat], indice['origen'])[0]
+    posiciones = np.asarray(indice['arbol'].query_ball_point(centro, r=radio_m), dtype=int)
+    distancias = np.hypot(*(indice['xy'][posiciones] - centro).T)
+    orden = np.argsort(distancias, kind='stable')
+    return pd.DataFrame({'indice': indice['etiquetas'][posiciones[orden]],
+                         'distancia_m': distancias[orden]})
+
+def k_vecinos(indice, lon, lat, k=5):
+    '''
+    Busca los k hechos más cercanos a un punto.
+
+    Parameters:
+        indice (dict): El índice generado por 'construye_indice'.
+        lon (float): La longitud del punto.
+        lat (float): La latitud del punto.
+        k (int): La cantidad de vecinos.
+
+    Returns:
+        pandas.DataFrame: Las etiquetas ('indice') de los vecinos y su distancia en metros.
+    '''
+    k = min(k, len(indice['etiquetas']))
+    centro = proyecta_a_metros([lon], [lat], indice['origen'])[0]
+    distancias, posiciones = indice['arbol'].query(centro, k=k)
+    return pd.DataFrame({'indice': indice['etiquetas'][np.atleast_1d(posiciones)],
+                         'distancia_m': np.atleast_1d(distancias)})
+
+def busca_en_rectangulo(indice, lon_min, lat_min, lon_max, lat_max):
+    '''
+    Busca los hechos dentro de un rectángulo de longitudes y latitudes.
+
+    Se acota primero el rango de x con una búsqueda binaria sobre los puntos ordenados
+    y sólo sobre ese rango se filtra por y.
+
+    Parameters:
+        indice (dict): El índice generado por 'construye_indice'.
+        lon_min (float): La longitud mínima.
+        lat_min (float): La latitud mínima.
+        lon_max (float): La longitud máxima.
+        lat_max (float): La latitud máxima.
+
+    Returns:
+        numpy.ndarray: Las etiquetas de los hechos dentro del rectángulo.
+    '''
+    (x_min, y_min), (x_max, y_max) = proyecta_a_metros([lon_min, lon_max], [lat_min, lat_max], indice['origen'])
+    desde = np.searchsorted(indice['x_ordenado'], x_min, side='left')
+    hasta = np.searchsorted(indice['x_ordenado'], x_max, side='right')
+    candidatos = indice['orden_x'][desde:hasta]
+    y = indice['xy'][candidatos, 1]
+    dentro = candidatos[(y >= y_min) & (y <= y_max)]
+    return indice['etiquetas'][np.sort(dentro)]
+
+def detecta_puntos_calientes(indice, tamaño_celda_m=50, ancho_banda_m=250, top=10, pesos=None):
+    '''
+    Detecta los puntos calientes con una estimación de densidad de kernel sobre una grilla.
+
+    Los puntos se cuentan en celdas de una grilla (un único pasaje, O(n)) y la grilla se
+    suaviza con un kernel gaussiano, por lo que el costo no depende de la cantidad de
+    puntos sino del tamaño de la grilla. Los puntos calientes son los máximos locales de
+    la densidad.
+
+    Parameters:
+        indice (dict): El índice generado por 'construye_indice'.
+        tamaño_celda_m (float): El lado de cada celda de la grilla en metros.
+        ancho_banda_m (float): El desvío del kernel gaussiano en metros.
+        top (int): La cantidad de puntos calientes a devolver.
+        pesos (numpy.ndarray, optional): Un peso por punto indexado (por ejemplo, la cantidad de víctimas).
+
+    Returns:
+        pandas.DataFrame: Los puntos calientes ordenados por densidad, con su longitud, latitud,
+        la densidad (hechos por km²) y la cantidad de hechos a menos de un ancho de banda.
+    '''
+    xy = indice['xy']
+    minimo = xy.min(axis=0) - 3 * ancho_banda_m
+    n_celdas = np.ceil((xy.max(axis=0) + 3 * ancho_banda_m - minimo) / tamaño_celda_m).astype(int)
+
+    # Se cuentan los puntos por celda
+    celdas = ((xy - minimo) // tamaño_celda_m).astype(np.int64)
+    planos = celdas[:, 0] * n_celdas[1] + celdas[:, 1]
+    grilla = np.bincount(planos, weights=pesos, minlength=n_celdas[0] * n_celdas[1]).reshape(n_celdas)
+
+    # Se suaviza la grilla y se expresa como densidad por km²
+    densidad = ndimage.gaussian_filter(grilla.astype(float), sigma=ancho_banda_m / tamaño_celda_m, mode='constant')
+    densidad *= 1e6 / tamaño_celda_m ** 2
+
+    # Se buscan los máximos locales de la densidad
+    maximos = (densidad == ndimage.maximum_filter(densidad, size=3)) & (densidad > 0)
+    fila, columna = np.nonzero(maximos)
+    valores = densidad[fila, columna]
+    orden = np.argsort(-valores, kind='stable')[:top]
+    centros = (np.column_stack([fila[orden], columna[orden]]) + 0.5) * tamaño_celda_m + minimo
+
+    lon, lat = metros_a_grados(centros, indice['origen'])
+    cercanos = [len(p) for p in indice['arbol'].query_ball_point(centros, r=ancho_banda_m)]
+    return pd.DataFrame({'lon': lon, 'lat': lat, 'densidad_km2': valores[orden], 'hechos_cercanos': cercanos})
+
+def agrupa_por_densidad(indice, radio_m=100, minimo_vecinos=5):
+    '''
+    Agrupa los hechos en conglomerados con el criterio de DBSCAN.
+
+    Un punto es central si tiene al menos 'minimo_vecinos' puntos (incluido él mismo) a
+    menos de 'radio_m'. Los puntos centrales conectados forman un conglomerado, los puntos
+    no centrales se asignan al conglomerado de un punto central cercano y el resto es ruido.
+
+    Parameters:
+        indice (dict): El índice generado por 'construye_indice'.
+        radio_m (float): El radio de vecindad en metros.
+        minimo_vecinos (int): La cantidad mínima de vecinos de un punto central.
+
+    Returns:
+        pandas.Series: El conglomerado de cada hecho indexado (-1 para el ruido), con las
+        etiquetas de los hechos como índice.
+    '''
+    arbol = indice['arbol']
+    n = len(indice['etiquetas'])
+
+    # Se obtienen todos los pares de puntos vecinos de una sola vez
+    pares = arbol.query_pairs(r=radio_m, output_type='ndarray')
+    vecinos = np.bincount(pares.ravel(), minlength=n) + 1
+    central = vecinos >= minimo_vecinos
+
+    # Se unen los puntos centrales vecinos en componentes conexas
+    entre_centrales = pares[central[pares[:, 0]] & central[pares[:, 1]]]
+    grafo = coo_matrix((np.ones(len(entre_centrales), dtype=np.int8), (entre_centrales[:, 0], entre_centrales[:, 1])),
+                       shape=(n, n))
+    _, componentes = connected_components(grafo, directed=False)
+
+    # Se numeran los conglomerados y se asignan los puntos de borde
+    conglomerado = np.full(n, -1, dtype=np.int64)
+    _, conglomerado[central] = np.unique(componentes[central], return_inverse=True)
+    borde = pares[central[pares[:, 0]] != central[pares[:, 1]]]
+    borde = np.where(central[borde[:, :1]], borde, borde[:, ::-1])
+    conglomerado[borde[:, 1]] = conglomerado[borde[:, 0]]
+
+    return pd.Series(conglomerado, index=indice['etiquetas'], name='conglomerado')
@@ -0,0 +1,417 @@
+## INGESTA CONCURRENTE DE VARIAS FUENTES CON MEMORIA ACOTADA
+# Importaciones
+import asyncio
+import glob
+import math
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow.parquet as pq
+from openpyxl import load_workbook
+
+import pipeline_etl as etl
+
+# Formato de lectura según la extensión del archivo
+FORMATOS = {'.csv': 'csv', '.xlsx': 'excel', '.parquet': 'parquet'}
+
+# Codificaciones que se prueban en los CSV (la primera que decodifica el comienzo del archivo)
+CODIFICACIONES = ['utf-8-sig', 'cp1252']
+
+# Filas por bloque de lectura y filas leídas que pueden esperar en memoria a ser procesadas
+FILAS_BLOQUE = 50_000
+LIMITE_FILAS = 500_000
+
+
+def lista_fuentes(origen):
+    '''
+    Arma la lista de fuentes a leer a partir de un directorio, una ruta o una lista.
+
+    Se aceptan CSV, libros de Excel (una fuente por hoja) y Parquet. También se pueden
+    indicar diccionarios con 'ruta' y, opcionalmente, 'nombre', 'formato', 'hoja' y
+    'opciones' (argumentos para 'pd.read_csv').
+
+    Parameters:
+        origen (str or list): El directorio (se recorre en orden alfabético), un archivo o una lista.
+
+    Returns:
+        list: Un diccionario por fuente con 'nombre', 'ruta', 'formato', 'hoja' y 'opciones' (y,
+        en las hojas de Excel, las 'filas_estimadas' según la dimensión de la hoja).
+    '''
+    if isinstance(origen, (str, dict)):
+        origen = sorted(glob.glob(os.path.join(origen, '*'))) if isinstance(origen, str) and os.path.isdir(origen) \
+            else [origen]
+
+    fuentes = []
+    for fuente in origen:
+        fuente = {'ruta': fuente} if isinstance(fuente, str) else dict(fuente)
+        base, extension = os.path.splitext(os.path.basename(fuente['ruta']))
+        formato = fuente.get('formato') or FORMATOS.get(extension.lower())
+        if formato is None:
+            continue
+        hojas = {fuente.get('hoja'): None}
+        if formato == 'excel':
+            # Ya que se abre el libro, se toma la cantidad de filas de cada hoja de su dimensión
+            libro = load_workbook(fuente['ruta'], read_only=True)
+            nombres = libro.sheetnames if fuente.get('hoja') is None else [fuente['hoja']]
+            hojas = {hoja: max((libro[hoja].max_row or 1) - 1, 0) for hoja in nombres}
+            libro.close()
+        for hoja, filas in hojas.items():
+            nombre = fuente.get('nombre') or (f'{base}.{hoja}' if hoja is not None else base)
+            fuentes.append({'nombre': nombre, 'ruta': fuente['ruta'], 'formato': formato, 'hoja': hoja,
+                            'opciones': fuente.get('opciones', {})})
+            if filas is not None:
+                fuentes[-1]['filas_estimadas'] = filas
+    return fuentes
+
+def detecta_codificacion(ruta, bytes_muestra=1 << 16):
+    '''
+    Devuelve la primera codificación de 'CODIFICACIONES' que decodifica el comienzo del archivo.
+
+    Parameters:
+        ruta (str): La ruta del archivo.
+        bytes_muestra (int): Los bytes a leer.
+
+    Returns:
+        str: La codificación.
+    '''
+    with open(ruta, 'rb') as archivo:
+        muestra = archivo.read(bytes_muestra)
+    for codificacion in CODIFICACIONES:
+        try:
+            # Se descartan los últimos bytes, que pueden cortar un carácter a la mitad
+            muestra[:len(muestra) - 3 if len(muestra) == bytes_muestra else None].decode(codificacion)
+            return codificacion
+        except UnicodeDecodeError:
+            continue
+    return CODIFICACIONES[-1]
+
+def estima_filas(fuente, bytes_muestra=1 << 16):
+    '''
+    Estima la cantidad de filas de una fuente sin leerla completa.
+
+    En Parquet se toma de los metadatos, en Excel de la dimensión de la hoja y en CSV se
+    extrapola la cantidad de líneas de una muestra del comienzo del archivo.
+
+    Parameters:
+        fuente (dict): Una fuente de 'lista_fuentes'.
+        bytes_muestra (int): Los bytes de la muestra de los CSV.
+
+    Returns:
+        int: La cantidad estimada de filas.
+    '''
+    if 'filas_estimadas' in fuente:
+        return fuente['filas_estimadas']
+    if fuente['formato'] == 'parquet':
+        return pq.ParquetFile(fuente['ruta']).metadata.num_rows
+    if fuente['formato'] == 'excel':
+        libro = load_workbook(fuente['ruta'], read_only=True)
+        try:
+            return max((libro[fuente['hoja']].max_row or 1) - 1, 0)
+        finally:
+            libro.close()
+    tamaño = os.path.getsize(fuente['ruta'])
+    with open(fuente['ruta'], 'rb') as archivo:
+        muestra = archivo.read(bytes_muestra)
+    lineas = muestra.count(b'\n')
+    if len(muestra) < tamaño:
+        lineas = math.ceil(lineas * tamaño / len(muestra))
+    # Se descuenta el encabezado
+    return max(lineas - 1, 0)
+
+def abre_fuente(fuente, filas_bloque=FILAS_BLOQUE):
+    '''
+    Abre una fuente y devuelve un iterador de bloques (DataFrames) de a lo sumo 'filas_bloque' filas.
+
+    Parameters:
+        fuente (dict): Una fuente de 'lista_fuentes'.
+        filas_bloque (int): La cantidad máxima de filas por bloque.
+
+    Returns:
+        iterator: Los bloques de la fuente.
+    '''
+    if fuente['formato'] == 'csv':
+        opciones = {'encoding': detecta_codificacion(fuente['ruta']), **fuente['opciones']}
+        return iter(pd.read_csv(fuente['ruta'], chunksize=filas_bloque, **opciones))
+    if fuente['formato'] == 'excel':
+        return etl.lee_hoja_por_bloques(fuente['ruta'], fuente['hoja'], filas_bloque)
+    if fuente['formato'] == 'parquet':
+        return (lote.to_pandas() for lote in pq.ParquetFile(fuente['ruta']).iter_batches(batch_size=filas_bloque))
+    raise ValueError(f"Formato no soportado: {fuente['formato']}")
+
+def lee_fuente(fuente):
+    '''
+    Lee una fuente completa (se usa cuando la lectura se hace en otro proceso).
+    '''
+    bloques = list(abre_fuente(fuente))
+    return pd.concat(bloques, ignore_index=True) if bloques else pd.DataFrame()
+
+
+def reporta_progreso(completados, total, resultado):
+    '''
+    Imprime una línea con el avance y el resultado de una fuente.
+
+    Parameters:
+        completados (int): La cantidad de fuentes terminadas.
+        total (int): La cantidad total de fuentes.
+        resultado (dict): El resultado de la fuente que terminó.
+
+    Returns:
+        None
+    '''
+    if resultado['estado'] == 'ok':
+        detalle = f"{resultado['filas']} filas a los {resultado['segundos']:.1f} s"
+    else:
+        detalle = f"ERROR {resultado['error']}"
+    print(f"[{completados}/{total}] {resultado['nombre']}: {detalle}")
+
+
+class LimiteFilas:
+    '''
+    Cantidad de filas leídas que todavía no se procesaron, con espera cuando se supera el límite.
+
+    Los lectores reservan las filas de un bloque antes de leerlo y el consumidor las libera
+    al terminar de procesarlo, de modo que la lectura se detiene (contrapresión) mientras
+    haya 'limite' filas esperando. Un bloque se admite siempre que no haya otro en memoria,
+    para que un bloque más grande que el límite no bloquee la ingesta. Las lecturas en otro
+    proceso reservan una estimación y luego la ajustan a las filas leídas con 'ajusta'.
+
+    Parameters:
+        limite (int): La cantidad máxima de filas en memoria.
+    '''
+
+    def __init__(self, limite):
+        self.limite = limite
+        self.en_memoria = 0
+        self.maximo = 0
+        self._condicion = asyncio.Condition()
+
+    async def reserva(self, filas):
+        async with self._condicion:
+            await self._condicion.wait_for(lambda: self.en_memoria == 0 or self.en_memoria + filas <= self.limite)
+            self.en_memoria += filas
+            self.maximo = max(self.maximo, self.en_memoria)
+
+    async def libera(self, filas):
+        async with self._condicion:
+            self.en_memoria -= filas
+            self._condicion.notify_all()
+
+    async def ajusta(self, filas):
+        '''
+        Corrige una reserva ya hecha en 'filas' (positivas o negativas), sin esperar.
+        '''
+        async with self._condicion:
+            self.en_memoria += filas
+            self.maximo = max(self.maximo, self.en_memoria)
+            self._condicion.notify_all()
+
+
+async def _lee_en_hilos(fuente, cola, limite, ejecutor, filas_bloque):
+    '''
+    Lee una fuente bloque por bloque en un hilo y pasa cada bloque a la cola.
+    '''
+    bucle = asyncio.get_running_loop()
+    bloques = None
+    try:
+        bloques = await bucle.run_in_executor(ejecutor, abre_fuente, fuente, filas_bloque)
+        while True:
+            # Se reserva el tamaño máximo del bloque antes de leerlo y luego se ajusta
+            await limite.reserva(filas_bloque)
+            try:
+                bloque = await bucle.run_in_executor(ejecutor, next, bloques, None)
+            except BaseException:
+                await limite.libera(filas_bloque)
+                raise
+            if bloque is None:
+                await limite.libera(filas_bloque)
+                break
+            await limite.libera(filas_bloque - len(bloque))
+            await cola.put(('bloque', fuente, bloque))
+        await cola.put(('fin', fuente, None))
+    except Exception as error:
+        await cola.put(('error', fuente, error))
+    finally:
+        if hasattr(bloques, 'close'):
+            await bucle.run_in_executor(ejecutor, bloques.close)
+
+async def _lee_en_proceso(fuente, cola, limite, ejecutor):
+    '''
+    Lee una fuente completa en otro proceso y la pasa a la cola como un único bloque.
+
+    Antes de enviar la lectura se reservan las filas estimadas de la fuente, de modo que los
+    procesos no traen al proceso principal más filas que las que admite el límite; al terminar
+    la reserva se ajusta a las filas leídas.
+    '''
+    bucle = asyncio.get_running_loop()
+    try:
+        estimadas = estima_filas(fuente)
+        await limite.reserva(estimadas)
+        try:
+            datos = await bucle.run_in_executor(ejecutor, lee_fuente, fuente)
+        except BaseException:
+            await limite.libera(estimadas)
+            raise
+        await limite.ajusta(len(datos) - estimadas)
+        await cola.put(('bloque', fuente, datos))
+        await cola.put(('fin', fuente, None))
+    except Exception as error:
+        await cola.put(('error', fuente, error))
+
+async def ingiere(fuentes, limite_filas=LIMITE_FILAS, filas_bloque=FILAS_BLOQUE, hilos=None, procesos=None):
+    '''
+    Lee varias fuentes a la vez y entrega sus bloques a medida que se leen.
+
+    Los CSV y Parquet se leen por bloques en hilos. Las hojas de Excel se leen completas en
+    otros procesos cuando hay más de un núcleo, porque openpyxl interpreta el XML en Python
+    sin liberar el GIL y varias hojas en hilos no tardan menos que leídas una tras otra.
+    Las filas de un bloque se liberan cuando el consumidor pide el siguiente, por lo que no
+    hay más de 'limite_filas' filas leídas esperando ser procesadas (en las lecturas en otro
+    proceso, salvo el error de la estimación de filas de 'estima_filas').
+
+    Ejemplo:
+        async for evento, fuente, bloque in ingiere(lista_fuentes('exportaciones')):
+            if evento == 'bloque':
+                ...
+
+    Parameters:
+        fuentes (list): Las fuentes de 'lista_fuentes' (o un origen para 'lista_fuentes').
+        limite_filas (int or LimiteFilas): La cantidad máxima de filas leídas en memoria (con un
+            'LimiteFilas' se puede consultar luego el máximo alcanzado).
+        filas_bloque (int): La cantidad máxima de filas por bloque.
+        hilos (int, optional): Los hilos de lectura. Por defecto, uno por fuente (hasta 32).
+        procesos (int, optional): Si se indica, todas las fuentes se leen completas en esta cantidad
+            de procesos; con 0 todas se leen en hilos. Por defecto, sólo las hojas de Excel se leen
+            en procesos (uno por núcleo), si hay más de un núcleo.
+
+    Returns:
+        async generator: Tuplas (evento, fuente, datos), donde el evento es 'bloque' (datos es
+        el DataFrame), 'fin' (la fuente terminó) o 'error' (datos es la excepción).
+    '''
+    fuentes = fuentes if isinstance(fuentes, list) and all(isinstance(f, dict) and 'formato' in f for f in fuentes) \
+        else lista_fuentes(fuentes)
+    if not fuentes:
+        return
+    limite = limite_filas if isinstance(limite_filas, LimiteFilas) else LimiteFilas(limite_filas)
+    cola = asyncio.Queue()
+
+    # Se decide qué fuentes se leen en otro proceso
+    if procesos is None:
+        nucleos = os.cpu_count() or 1
+        en_proceso = [fuente['formato'] == 'excel' and nucleos > 1 for fuente in fuentes]
+        procesos = nucleos
+    else:
+        en_proceso = [bool(procesos)] * len(fuentes)
+
+    ejecutores, tareas = [], []
+    if any(en_proceso):
+        ejecutor = ProcessPoolExecutor(max_workers=min(procesos, sum(en_proceso)))
+        ejecutores.append(ejecutor)
+        tareas += [asyncio.create_task(_lee_en_proceso(fuente, cola, limite, ejecutor))
+                   for fuente, proceso in zip(fuentes, en_proceso) if proceso]
+    if not all(en_proceso):
+        ejecutor = ThreadPoolExecutor(max_workers=hilos or min(len(fuentes) - sum(en_proceso), 32))
+        ejecutores.append(ejecutor)
+        tareas += [asyncio.create_task(_lee_en_hilos(fuente, cola, limite, ejecutor, filas_bloque))
+                   for fuente, proceso in zip(fuentes, en_proceso) if not proceso]
+    pendientes = len(fuentes)
+    try:
+        while pendientes:
+            evento, fuente, datos = await cola.get()
+            if evento != 'bloque':
+                pendientes -= 1
+            yield evento, fuente, datos
+            if evento == 'bloque':
+                await limite.libera(len(datos))
+    finally:
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        for ejecutor in ejecutores:
+            ejecutor.shutdown(wait=False, cancel_futures=True)
+
+def _aplica_etapas(bloque, etapas):
+    '''
+    Aplica las etapas a un bloque, en orden.
+    '''
+    return next(etl.ejecuta_etapas([bloque], etapas))
+
+async def ingiere_y_procesa(origen, etapas=None, progreso=reporta_progreso, **opciones):
+    '''
+    Lee varias fuentes a la vez, aplica las etapas del ETL a cada bloque apenas se lee y
+    arma el DataFrame de cada fuente.
+
+    Las etapas se ejecutan en un hilo, de modo que las lecturas siguen mientras se procesa
+    un bloque. El límite de filas acota los bloques leídos que esperan a las etapas (los
+    bloques ya procesados forman parte del resultado).
+
+    Parameters:
+        origen (str or list): El directorio, el archivo o la lista de fuentes (ver 'lista_fuentes').
+        etapas (list, optional): Funciones que reciben y devuelven un DataFrame (ver 'pipeline_etl.ejecuta_etapas').
+        progreso (callable, optional): Se llama con (completados, total, resultado) al terminar cada fuente.
+        **opciones: Otros argumentos para 'ingiere' (limite_filas, filas_bloque, hilos, procesos).
+
+    Returns:
+        tuple: Un diccionario nombre -> DataFrame y el reporte (DataFrame) de cada fuente.
+    '''
+    fuentes = lista_fuentes(origen)
+    bucle = asyncio.get_running_loop()
+    inicio = time.perf_counter()
+    partes = {fuente['nombre']: [] for fuente in fuentes}
+    resultados = {}
+    with ThreadPoolExecutor(max_workers=1) as ejecutor_etapas:
+        async for evento, fuente, datos in ingiere(fuentes, **opciones):
+            nombre = fuente['nombre']
+            if evento == 'bloque':
+                if etapas:
+                    datos = await bucle.run_in_executor(ejecutor_etapas, _aplica_etapas, datos, etapas)
+                partes[nombre].append(datos)
+                continue
+            resultado = {'nombre': nombre, 'ruta': fuente['ruta'], 'segundos': time.perf_counter() - inicio,
+                         'estado': 'ok' if evento == 'fin' else 'error',
+                         'filas': sum(len(parte) for parte in partes[nombre]), 'error': None}
+            if evento == 'error':
+                resultado.update(filas=0, error=f'{type(datos).__name__}: {datos}',
+                                 detalle=''.join(traceback.format_exception(datos)))
+                partes[nombre] = []
+            resultados[nombre] = resultado
+            if progreso is not None:
+                progreso(len(resultados), len(fuentes), resultado)
+
+    marcos = {nombre: pd.concat(bloques, ignore_index=True) for nombre, bloques in partes.items() if bloques}
+    reporte = pd.DataFrame([resultados[fuente['nombre']] for fuente in fuentes],
+                           columns=['nombre', 'ruta', 'estado', 'filas', 'segundos', 'error'])
+    return marcos, reporte
+
+def ejecuta(corrutina):
+    '''
+    Ejecuta una corrutina y devuelve su resultado, también desde un notebook (que ya tiene
+    un bucle de eventos en marcha: en ese caso se ejecuta en un hilo aparte).
+
+    Parameters:
+        corrutina (coroutine): La corrutina, por ejemplo ingiere_y_procesa('../datos').
+
+    Returns:
+        object: El resultado de la corrutina.
+    '''
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(corrutina)
+    with ThreadPoolExecutor(max_workers=1) as ejecutor:
+        return ejecutor.submit(asyncio.run, corrutina).result()
+
+def procesa_fuentes(origen, etapas=None, progreso=reporta_progreso, **opciones):
+    '''
+    Versión sincrónica de 'ingiere_y_procesa', para usar directamente en los notebooks.
+
+    Ejemplo:
+        marcos, reporte = procesa_fuentes('../datos', progreso=None)
+        poblacion = marcos['poblacionCABA']
+
+    Returns:
+        tuple: Un diccionario nombre -> DataFrame y el reporte de cada fuente.
+    '''
+    return ejecuta(ingiere_y_procesa(origen, etapas, progreso, **opciones))
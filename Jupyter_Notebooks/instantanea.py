@@ -0,0 +1,190 @@
+## INSTANTÁNEA BINARIA DEL CONJUNTO LIMPIO CON APERTURA POR MEMORIA MAPEADA
+# Importaciones
+import datetime
+import json
+import os
+
+import pyarrow as pa
+
+import carga_datos
+import esquema
+
+VERSION_FORMATO = 1
+
+# Clave de los metadatos del esquema de Arrow donde se guarda el encabezado de la instantánea
+CLAVE_ENCABEZADO = b'instantanea'
+
+
+def ruta_instantanea(ruta_csv, directorio_cache=None):
+    '''
+    Devuelve la ruta de la instantánea de un CSV limpio.
+
+    Parameters:
+        ruta_csv (str): La ruta del CSV limpio.
+        directorio_cache (str, optional): El directorio de la instantánea. Por defecto es '.cache'
+            dentro del directorio del CSV, el mismo que usa 'carga_datos'.
+
+    Returns:
+        str: La ruta del archivo de la instantánea.
+    '''
+    if directorio_cache is None:
+        directorio_cache = os.path.join(os.path.dirname(os.path.abspath(ruta_csv)), '.cache')
+    nombre = os.path.splitext(os.path.basename(ruta_csv))[0]
+    return os.path.join(directorio_cache, f'{nombre}.instantanea.arrow')
+
+def _a_tabla(df):
+    '''
+    Convierte un DataFrame compacto en una tabla de Arrow con un único bloque por columna.
+
+    Las categóricas quedan como diccionarios (códigos y categorías), 'Hora' como duración y los
+    textos como 'large_string' para que cada columna entre en un solo búfer contiguo aunque
+    supere los 2 GB.
+    '''
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    campos = [campo.with_type(pa.large_string()) if pa.types.is_string(campo.type) else campo
+              for campo in tabla.schema]
+    tabla = tabla.cast(pa.schema(campos, metadata=tabla.schema.metadata))
+    return tabla.combine_chunks()
+
+def escribe_instantanea(df, ruta, ruta_origen=None, compactar=True):
+    '''
+    Guarda el conjunto limpio en una instantánea binaria columnar.
+
+    El archivo es un Arrow IPC sin compresión: cada columna se guarda como un arreglo tipado y
+    contiguo, las categóricas con sus códigos y su diccionario, y el encabezado (versión, filas,
+    columnas y huella del archivo de origen) va en los metadatos del esquema. Así la instantánea
+    se puede abrir con memoria mapeada sin volver a interpretar fechas, horas ni categorías.
+    El archivo se escribe en una ruta temporal y luego se reemplaza, para no dejar nunca una
+    instantánea a medio escribir.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame limpio de homicidios.
+        ruta (str): La ruta del archivo de la instantánea.
+        ruta_origen (str, optional): El CSV del que proviene, para poder invalidar la instantánea
+            si cambia.
+        compactar (bool): Si se convierte antes al esquema compacto con 'esquema.compacta'.
+
+    Returns:
+        dict: El encabezado de la instantánea.
+    '''
+    if compactar:
+        df = esquema.compacta(df)
+    tabla = _a_tabla(df)
+
+    encabezado = {'version': VERSION_FORMATO,
+                  'filas': tabla.num_rows,
+                  'columnas': {campo.name: str(campo.type) for campo in tabla.schema},
+                  'creada': datetime.datetime.now().isoformat(timespec='seconds'),
+                  'origen': None}
+    if ruta_origen is not None:
+        estado = os.stat(ruta_origen)
+        encabezado['origen'] = {'ruta': os.path.abspath(ruta_origen),
+                                'sha256': carga_datos.huella_archivo(ruta_origen),
+                                'mtime_ns': estado.st_mtime_ns,
+                                'tamaño': estado.st_size}
+
+    metadatos = dict(tabla.schema.metadata or {})
+    metadatos[CLAVE_ENCABEZADO] = json.dumps(encabezado, ensure_ascii=False).encode('utf-8')
+    tabla = tabla.replace_schema_metadata(metadatos)
+
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    temporal = f'{ruta}.{os.getpid()}.tmp'
+    with pa.OSFile(temporal, 'wb') as archivo, pa.ipc.new_file(archivo, tabla.schema) as escritor:
+        escritor.write_table(tabla)
+    os.replace(temporal, ruta)
+    return encabezado
+
+def lee_encabezado(ruta):
+    '''
+    Lee el encabezado de una instantánea sin leer sus datos.
+
+    Parameters:
+        ruta (str): La ruta del archivo de la instantánea.
+
+    Returns:
+        dict: El encabezado guardado por 'escribe_instantanea'.
+    '''
+    with pa.memory_map(ruta) as archivo:
+        metadatos = pa.ipc.open_file(archivo).schema.metadata or {}
+    if CLAVE_ENCABEZADO not in metadatos:
+        raise ValueError(f'{ruta} no es una instantánea del conjunto limpio')
+    encabezado = json.loads(metadatos[CLAVE_ENCABEZADO])
+    if encabezado['version'] != VERSION_FORMATO:
+        raise ValueError(f"Versión de instantánea no soportada: {encabezado['version']}")
+    return encabezado
+
+def abre_instantanea(ruta, columnas=None):
+    '''
+    Abre una instantánea con memoria mapeada y la devuelve como DataFrame.
+
+    Los datos no se copian ni se interpretan: las columnas numéricas, de fechas y de horas son
+    vistas sobre el archivo mapeado, las categóricas usan los códigos guardados y los textos
+    quedan respaldados por los búferes de Arrow. El sistema operativo lee del disco sólo las
+    páginas que se usan, por lo que el tiempo de apertura casi no depende de la cantidad de filas.
+    Como el mapeo es de sólo lectura, agregar o reasignar columnas funciona normalmente, pero
+    para modificar valores en el lugar (por ejemplo con 'df.loc') se debe trabajar sobre 'df.copy()'.
+
+    Parameters:
+        ruta (str): La ruta del archivo de la instantánea.
+        columnas (list, optional): Las columnas a abrir. Por defecto se abren todas.
+
+    Returns:
+        pandas.DataFrame: El conjunto limpio con el esquema compacto.
+    '''
+    lee_encabezado(ruta)
+    tabla = pa.ipc.open_file(pa.memory_map(ruta)).read_all()
+    if columnas is not None:
+        faltantes = [c for c in columnas if c not in tabla.column_names]
+        if faltantes:
+            raise KeyError(f'Columnas inexistentes en la instantánea: {faltantes}')
+        tabla = tabla.select(columnas)
+    # Se convierte cada columna por separado para no consolidar bloques (lo que copiaría los datos)
+    return tabla.to_pandas(split_blocks=True)
+
+def instantanea_vigente(ruta, ruta_origen):
+    '''
+    Indica si una instantánea sigue correspondiendo a su CSV de origen.
+
+    Como en la caché de 'carga_datos', si el tamaño y la fecha de modificación coinciden no se
+    vuelve a leer el CSV; sólo si cambiaron se compara el hash del contenido.
+
+    Parameters:
+        ruta (str): La ruta del archivo de la instantánea.
+        ruta_origen (str): La ruta del CSV limpio.
+
+    Returns:
+        bool: True si la instantánea existe y corresponde al CSV.
+    '''
+    if not os.path.exists(ruta):
+        return False
+    try:
+        origen = lee_encabezado(ruta)['origen']
+    except (ValueError, pa.ArrowInvalid):
+        return False
+    if origen is None:
+        return False
+
+    estado = os.stat(ruta_origen)
+    if origen['mtime_ns'] == estado.st_mtime_ns and origen['tamaño'] == estado.st_size:
+        return True
+    return origen['sha256'] == carga_datos.huella_archivo(ruta_origen)
+
+def carga_limpio(ruta_csv, columnas=None, directorio_cache=None):
+    '''
+    Carga el CSV limpio a través de su instantánea binaria.
+
+    La primera vez (o cuando el CSV cambió) se lee el CSV con 'esquema.carga_compacta' y se
+    escribe la instantánea; las cargas siguientes sólo abren la instantánea con memoria mapeada.
+
+    Parameters:
+        ruta_csv (str): La ruta del CSV limpio (por ejemplo, 'homicidios_limpio.csv').
+        columnas (list, optional): Las columnas a abrir. Por defecto se abren todas.
+        directorio_cache (str, optional): El directorio de la instantánea.
+
+    Returns:
+        pandas.DataFrame: El conjunto limpio con el esquema compacto.
+    '''
+    ruta = ruta_instantanea(ruta_csv, directorio_cache)
+    if not instantanea_vigente(ruta, ruta_csv):
+        escribe_instantanea(esquema.carga_compacta(ruta_csv), ruta, ruta_origen=ruta_csv, compactar=False)
+    return abre_instantanea(ruta, columnas)
@@ -0,0 +1,355 @@
+## INSTRUMENTACIÓN DE LAS FUNCIONES DEL ETL Y DEL EDA
+# Importaciones
+import functools
+import importlib
+import inspect
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+# Módulos cuyas funciones públicas se instrumentan con 'instrumenta_todo'
+MODULOS = ['utils', 'calculos_eda', 'graficos_eda', 'carga_datos', 'pipeline_etl', 'etl_incremental']
+
+# Funciones que se aplican por elemento (con 'apply'): sólo se acumulan llamadas y tiempos,
+# sin un registro por llamada. Su tiempo se descuenta del tiempo propio de la etapa que las llama
+FUNCIONES_POR_ELEMENTO = {'utils.convertir_a_time', 'utils.crea_categoria_momento_dia'}
+
+# Estado global de la instrumentación
+ESTADO = {'activo': False, 'memoria': False, 'origen': 0.0, 'registros': [], 'acumulados': {}}
+
+# Pila de llamadas en curso de cada hilo, para calcular el tiempo propio de cada etapa
+_LOCAL = threading.local()
+
+
+def _pila():
+    if not hasattr(_LOCAL, 'pila'):
+        _LOCAL.pila = []
+    return _LOCAL.pila
+
+def _filas(valor):
+    '''
+    Devuelve la cantidad de filas de un DataFrame, una serie, un arreglo o una lista (o None).
+    '''
+    if isinstance(valor, (pd.DataFrame, pd.Series, np.ndarray, list)):
+        return len(valor)
+    return None
+
+def activa(memoria=False):
+    '''
+    Activa el registro de las funciones instrumentadas y descarta los registros anteriores.
+
+    Parameters:
+        memoria (bool): Si se mide el pico de memoria de cada llamada con 'tracemalloc'
+            (hace más lentas las llamadas instrumentadas).
+    '''
+    limpia()
+    ESTADO['memoria'] = memoria
+    if memoria and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    ESTADO['origen'] = time.perf_counter()
+    ESTADO['activo'] = True
+
+def desactiva():
+    '''
+    Desactiva el registro. Las funciones instrumentadas pasan a llamar directamente a la original.
+    '''
+    ESTADO['activo'] = False
+    if ESTADO['memoria'] and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def limpia():
+    '''
+    Descarta los registros y los acumulados.
+    '''
+    ESTADO['registros'] = []
+    ESTADO['acumulados'] = {}
+
+@contextmanager
+def traza(memoria=False):
+    '''
+    Activa la instrumentación dentro de un bloque 'with' y devuelve la lista de registros.
+
+    Ejemplo:
+        with instrumentacion.traza(memoria=True) as registros:
+            df = utils.imputa_edad_media_segun_sexo(df)
+        instrumentacion.resumen()
+
+    Parameters:
+        memoria (bool): Si se mide el pico de memoria de cada llamada.
+    '''
+    activa(memoria)
+    try:
+        yield ESTADO['registros']
+    finally:
+        desactiva()
+
+def _inicia(etapa, argumentos):
+    '''
+    Abre el marco de una llamada y lo apila.
+    '''
+    pila = _pila()
+    marco = {'etapa': etapa, 'hijos': 0.0, 'pico': 0, 'memoria_inicial': 0,
+             'filas_entrada': _filas(argumentos[0]) if argumentos else None}
+    if ESTADO['memoria'] and tracemalloc.is_tracing():
+        actual, pico = tracemalloc.get_traced_memory()
+        # Se guarda el pico alcanzado por la llamada que la contiene antes de reiniciarlo
+        if pila:
+            pila[-1]['pico'] = max(pila[-1]['pico'], pico)
+        tracemalloc.reset_peak()
+        marco['memoria_inicial'] = actual
+    pila.append(marco)
+    marco['cpu'] = time.process_time()
+    marco['inicio'] = time.perf_counter()
+    return marco
+
+def _termina(marco, resultado=None, error=None, paso=None):
+    '''
+    Cierra el marco de una llamada y guarda su registro.
+    '''
+    fin = time.perf_counter()
+    cpu = time.process_time() - marco['cpu']
+    pila = _pila()
+    pila.pop()
+    duracion = fin - marco['inicio']
+    if pila:
+        pila[-1]['hijos'] += duracion
+
+    pico = None
+    if ESTADO['memoria'] and tracemalloc.is_tracing():
+        pico = max(tracemalloc.get_traced_memory()[1], marco['pico']) - marco['memoria_inicial']
+    ESTADO['registros'].append({
+        'etapa': marco['etapa'], 'paso': paso, 'inicio': marco['inicio'] - ESTADO['origen'],
+        'segundos': duracion, 'segundos_propios': duracion - marco['hijos'], 'segundos_cpu': cpu,
+        'pico_memoria': pico, 'filas_entrada': marco['filas_entrada'], 'filas_salida': _filas(resultado),
+        'profundidad': len(pila), 'hilo': threading.get_ident(), 'error': error})
+
+def _recorre(etapa, generador, argumentos):
+    '''
+    Recorre un generador instrumentado, registrando cada paso (por ejemplo, cada bloque leído).
+    '''
+    paso = 0
+    while True:
+        marco = _inicia(etapa, argumentos if paso == 0 else ())
+        try:
+            valor = next(generador)
+        except StopIteration:
+            _termina(marco, paso=paso)
+            return
+        except BaseException as excepcion:
+            _termina(marco, error=type(excepcion).__name__, paso=paso)
+            raise
+        _termina(marco, valor, paso=paso)
+        paso += 1
+        yield valor
+
+def instrumenta(funcion, etapa=None):
+    '''
+    Envuelve una función para registrar cada llamada mientras la instrumentación está activa.
+
+    Cada registro tiene el tiempo real, el tiempo propio (sin las etapas instrumentadas que
+    llama), el tiempo de CPU, el pico de memoria y las filas de entrada (del primer argumento)
+    y de salida. En los generadores se registra cada paso. Con la instrumentación
+    desactivada, la envoltura sólo consulta un valor del estado antes de llamar a la función.
+
+    Parameters:
+        funcion (callable): La función a instrumentar.
+        etapa (str, optional): El nombre de la etapa. Por defecto, 'módulo.función'.
+
+    Returns:
+        callable: La función instrumentada.
+    '''
+    if getattr(funcion, '__instrumentada__', False):
+        return funcion
+    etapa = etapa or f'{funcion.__module__}.{funcion.__qualname__}'
+
+    if etapa in FUNCIONES_POR_ELEMENTO:
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not ESTADO['activo']:
+                return funcion(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                duracion = time.perf_counter() - inicio
+                acumulado = ESTADO['acumulados'].setdefault(etapa, [0, 0.0])
+                acumulado[0] += 1
+                acumulado[1] += duracion
+                pila = _pila()
+                if pila:
+                    pila[-1]['hijos'] += duracion
+
+    elif inspect.isgeneratorfunction(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not ESTADO['activo']:
+                return funcion(*args, **kwargs)
+            return _recorre(etapa, funcion(*args, **kwargs), args)
+
+    else:
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not ESTADO['activo']:
+                return funcion(*args, **kwargs)
+            marco = _inicia(etapa, args)
+            try:
+                resultado = funcion(*args, **kwargs)
+            except BaseException as excepcion:
+                _termina(marco, error=type(excepcion).__name__)
+                raise
+            _termina(marco, resultado)
+            return resultado
+
+    envoltura.__instrumentada__ = True
+    return envoltura
+
+def instrumenta_modulo(modulo):
+    '''
+    Reemplaza las funciones públicas de un módulo por sus versiones instrumentadas.
+
+    Se instrumentan las funciones definidas en el módulo y las importadas de otro módulo
+    de 'MODULOS' (por ejemplo, las de 'calculos_eda' que expone 'utils'). Las llamadas entre
+    funciones del mismo módulo también quedan registradas.
+
+    Parameters:
+        modulo (module or str): El módulo o su nombre.
+
+    Returns:
+        list: Los nombres de las funciones instrumentadas.
+    '''
+    modulo = importlib.import_module(modulo) if isinstance(modulo, str) else modulo
+    instrumentadas = []
+    for nombre, funcion in list(vars(modulo).items()):
+        if nombre.startswith('_') or not inspect.isfunction(funcion):
+            continue
+        if funcion.__module__ != modulo.__name__ and funcion.__module__ not in MODULOS:
+            continue
+        setattr(modulo, nombre, instrumenta(funcion))
+        instrumentadas.append(nombre)
+    return instrumentadas
+
+def desinstrumenta_modulo(modulo):
+    '''
+    Restaura las funciones originales de un módulo instrumentado.
+
+    Parameters:
+        modulo (module or str): El módulo o su nombre.
+    '''
+    modulo = importlib.import_module(modulo) if isinstance(modulo, str) else modulo
+    for nombre, funcion in list(vars(modulo).items()):
+        if getattr(funcion, '__instrumentada__', False):
+            setattr(modulo, nombre, funcion.__wrapped__)
+
+def instrumenta_todo(modulos=MODULOS):
+    '''
+    Instrumenta las funciones públicas de todos los módulos del ETL y del EDA.
+
+    Parameters:
+        modulos (list): Los nombres de los módulos.
+
+    Returns:
+        dict: Las funciones instrumentadas de cada módulo.
+    '''
+    return {modulo: instrumenta_modulo(modulo) for modulo in modulos}
+
+@contextmanager
+def etapa(nombre, filas=None):
+    '''
+    Registra un bloque de código como una etapa, por ejemplo el dibujo de un gráfico en el notebook.
+
+    Parameters:
+        nombre (str): El nombre de la etapa.
+        filas (int, optional): La cantidad de filas procesadas.
+    '''
+    if not ESTADO['activo']:
+        yield
+        return
+    marco = _inicia(nombre, ())
+    marco['filas_entrada'] = filas
+    try:
+        yield
+    except BaseException as excepcion:
+        _termina(marco, error=type(excepcion).__name__)
+        raise
+    _termina(marco)
+
+def registros():
+    '''
+    Devuelve los registros de las llamadas como DataFrame, en orden de inicio.
+
+    Returns:
+        pandas.DataFrame: Un registro por llamada (o por paso de un generador).
+    '''
+    columnas = ['etapa', 'paso', 'inicio', 'segundos', 'segundos_propios', 'segundos_cpu', 'pico_memoria',
+                'filas_entrada', 'filas_salida', 'profundidad', 'hilo', 'error']
+    return pd.DataFrame(ESTADO['registros'], columns=columnas).sort_values('inicio', ignore_index=True)
+
+def resumen(top=None):
+    '''
+    Resume los registros por etapa, ordenados por tiempo propio (las etapas más costosas primero).
+
+    Parameters:
+        top (int, optional): La cantidad de etapas a mostrar.
+
+    Returns:
+        pandas.DataFrame: Las llamadas, los tiempos totales, el pico de memoria máximo y las filas de cada etapa.
+    '''
+    df = registros()
+    # Las etapas que no reciben un DataFrame (por ejemplo, las lecturas) cuentan las filas que devuelven
+    df['filas_entrada'] = df['filas_entrada'].fillna(df['filas_salida'])
+    tabla = df.groupby('etapa').agg(llamadas=('etapa', 'size'), segundos=('segundos', 'sum'),
+                                    segundos_propios=('segundos_propios', 'sum'),
+                                    segundos_cpu=('segundos_cpu', 'sum'),
+                                    pico_memoria=('pico_memoria', 'max'),
+                                    filas=('filas_entrada', 'sum'), errores=('error', 'count'))
+    # Las llamadas de una generadora se cuentan una vez, no por paso
+    pasos = df[df['paso'].notna() & (df['paso'] > 0)].groupby('etapa').size()
+    tabla['llamadas'] = tabla['llamadas'].sub(pasos, fill_value=0).astype(int)
+
+    for nombre, (llamadas, segundos) in ESTADO['acumulados'].items():
+        tabla.loc[nombre, ['llamadas', 'segundos', 'segundos_propios', 'filas', 'errores']] = \
+            [llamadas, segundos, segundos, llamadas, 0]
+    # El tiempo de las funciones por elemento ya se descontó del tiempo propio de la etapa que
+    # las llamó, por lo que los porcentajes suman 100
+    tabla[['llamadas', 'filas', 'errores']] = tabla[['llamadas', 'filas', 'errores']].fillna(0).astype(np.int64)
+    tabla['porcentaje'] = (100 * tabla['segundos_propios'] / tabla['segundos_propios'].sum()).round(1)
+    tabla['filas_por_segundo'] = (tabla['filas'] / tabla['segundos']).round(0)
+    tabla = tabla.sort_values('segundos_propios', ascending=False)
+    return tabla if top is None else tabla.head(top)
+
+def exporta_json(ruta):
+    '''
+    Guarda los registros y los acumulados en un JSON.
+
+    Parameters:
+        ruta (str): La ruta del archivo.
+    '''
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump({'registros': ESTADO['registros'],
+                   'acumulados': {etapa: {'llamadas': llamadas, 'segundos': segundos}
+                                  for etapa, (llamadas, segundos) in ESTADO['acumulados'].items()}},
+                  archivo, ensure_ascii=False, indent=1)
+
+def exporta_chrome(ruta):
+    '''
+    Guarda los registros en el formato de trazas de Chrome, que se abre en chrome://tracing o en Perfetto.
+
+    Parameters:
+        ruta (str): La ruta del archivo.
+    '''
+    proceso = os.getpid()
+    eventos = [{'name': registro['etapa'], 'cat': registro['etapa'].split('.')[0], 'ph': 'X',
+                'ts': round(registro['inicio'] * 1e6, 3), 'dur': round(registro['segundos'] * 1e6, 3),
+                'pid': proceso, 'tid': registro['hilo'],
+                'args': {clave: registro[clave] for clave in ('paso', 'segundos_cpu', 'pico_memoria',
+                                                              'filas_entrada', 'filas_salida', 'error')
+                         if registro[clave] is not None}}
+               for registro in ESTADO['registros']]
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump({'traceEvents': eventos, 'displayTimeUnit': 'ms'}, archivo, ensure_ascii=False)
@@ -0,0 +1,294 @@
+## FUNCIONES PARA EL PERFILADO DE LOS DATOS EN UNA SOLA PASADA
+# Importaciones
+import numpy as np
+import pandas as pd
+
+# Cantidad de hashes mínimos que se guardan para estimar la cardinalidad (sketch KMV)
+K_CARDINALIDAD = 1024
+
+# Valor z para los intervalos de confianza del 95% cuando se muestrea
+Z_95 = 1.96
+
+
+def _tipos_de_valores(valores):
+    '''
+    Devuelve el tipo de Python de cada valor, tal como lo haría 'Series.apply(type)'.
+    '''
+    if isinstance(valores, np.ndarray) and valores.dtype != object:
+        valores = valores.tolist()
+    return [type(v) for v in valores]
+
+def _hash_valores(uniques):
+    '''
+    Calcula un hash de 64 bits para cada valor único (para el sketch de cardinalidad).
+    '''
+    uniques = np.asarray(uniques)
+    if uniques.dtype == object:
+        uniques = uniques.astype(str).astype(object)
+    return pd.util.hash_array(uniques)
+
+def _rango_por_tipo(valores, tipos):
+    '''
+    Calcula el mínimo y el máximo de los valores agrupados por tipo de Python.
+
+    Los valores de tipos distintos no son comparables entre sí (por ejemplo 'SD' y 35 en
+    'Edad'), por lo que se guarda un rango por cada tipo.
+    '''
+    rangos = {}
+    por_tipo = {}
+    for valor, tipo in zip(valores, tipos):
+        por_tipo.setdefault(tipo, []).append(valor)
+    for tipo, grupo in por_tipo.items():
+        try:
+            rangos[tipo] = [min(grupo), max(grupo)]
+        except TypeError:
+            continue
+    return rangos
+
+def perfil_columna(serie, desplazamiento=0):
+    '''
+    Calcula las estadísticas suficientes de una columna en una sola pasada.
+
+    La columna se factoriza una única vez y, a partir de los códigos y de los valores
+    únicos, se obtienen la cantidad de nulos, los tipos de datos presentes (con su
+    cantidad y la posición de su primera aparición), el rango por tipo y un sketch
+    de la cardinalidad que se puede combinar con el de otros bloques.
+
+    Parameters:
+        serie (pandas.Series): La columna a perfilar.
+        desplazamiento (int): La posición de la primera fila de la columna dentro del conjunto
+            completo, para combinar bloques respetando el orden de aparición.
+
+    Returns:
+        dict: Las estadísticas suficientes de la columna.
+    '''
+    codigos, uniques = pd.factorize(serie, use_na_sentinel=True)
+    nulos = codigos == -1
+    cantidad_nulos = int(nulos.sum())
+
+    # Cantidad y primera aparición de cada valor único. Los códigos se asignan en orden
+    # de aparición, así que un valor aparece por primera vez cuando su código supera
+    # al máximo acumulado hasta la fila anterior.
+    conteos = np.bincount(codigos[~nulos], minlength=len(uniques))
+    maximo_previo = np.maximum.accumulate(np.concatenate(([-1], codigos[:-1])))
+    primeras = np.flatnonzero(codigos > maximo_previo)
+
+    tipos = {}
+    if serie.dtype == object:
+        # 'factorize' considera iguales a 1, 1.0 y True, así que los tipos se toman de los
+        # valores originales y se factorizan los pares (valor, tipo) de las filas no nulas
+        posiciones = np.flatnonzero(~nulos)
+        valores = serie.to_numpy()[posiciones]
+        codigos_tipo, tipos_presentes = pd.factorize(np.array(_tipos_de_valores(valores), dtype=object))
+        codigos_par, _ = pd.factorize(codigos[posiciones].astype(np.int64) * len(tipos_presentes) + codigos_tipo)
+        primeras_par = np.flatnonzero(codigos_par > np.maximum.accumulate(
+            np.concatenate(([-1], codigos_par[:-1]))))
+        tipos_par = tipos_presentes[codigos_tipo[primeras_par]]
+        for tipo, conteo, primera in zip(tipos_par, np.bincount(codigos_par), posiciones[primeras_par]):
+            actual = tipos.setdefault(tipo, [0, int(primera)])
+            actual[0] += int(conteo)
+            actual[1] = min(actual[1], int(primera))
+        rangos = _rango_por_tipo(valores[primeras_par], tipos_par)
+    else:
+        # Para columnas tipadas, todos los valores no nulos son del mismo tipo
+        rangos = {}
+        if len(uniques):
+            tipo = _tipos_de_valores(uniques[:1])[0]
+            tipos[tipo] = [int(conteos.sum()), int(primeras.min())]
+            if pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_datetime64_any_dtype(serie):
+                minimo, maximo = uniques.min(), uniques.max()
+            else:
+                ordenados = np.sort(np.asarray(uniques, dtype=object))
+                minimo, maximo = ordenados[0], ordenados[-1]
+            rangos[tipo] = [minimo, maximo]
+
+    # Los nulos también se registran con su tipo (NaN, None o NaT)
+    if cantidad_nulos:
+        posiciones_nulas = np.flatnonzero(nulos)
+        valores_nulos = serie.iloc[posiciones_nulas].to_numpy(dtype=object)
+        for tipo, posicion in zip(_tipos_de_valores(valores_nulos), posiciones_nulas):
+            actual = tipos.setdefault(tipo, [0, int(posicion)])
+            actual[0] += 1
+            actual[1] = min(actual[1], int(posicion))
+
+    for actual in tipos.values():
+        actual[1] += desplazamiento
+
+    return {'filas': len(serie),
+            'nulos': cantidad_nulos,
+            'tipos': tipos,
+            'rangos': rangos,
+            'sketch': np.unique(_hash_valores(uniques))[:K_CARDINALIDAD]}
+
+def perfil_parcial(df, desplazamiento=0):
+    '''
+    Calcula el perfil de todas las columnas de un DataFrame (o de un bloque de él).
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame (o bloque) a perfilar.
+        desplazamiento (int): La posición de la primera fila del bloque en el conjunto completo.
+
+    Returns:
+        dict: Un diccionario con la cantidad de filas y el perfil de cada columna.
+    '''
+    return {'filas': len(df),
+            'filas_totales': len(df),
+            'columnas': {columna: perfil_columna(df[columna], desplazamiento) for columna in df.columns}}
+
+def _combina_columnas(a, b):
+    '''
+    Combina las estadísticas suficientes de una misma columna de dos perfiles.
+    '''
+    tipos = {tipo: list(valor) for tipo, valor in a['tipos'].items()}
+    for tipo, (conteo, primera) in b['tipos'].items():
+        actual = tipos.setdefault(tipo, [0, primera])
+        actual[0] += conteo
+        actual[1] = min(actual[1], primera)
+
+    rangos = {tipo: list(valor) for tipo, valor in a['rangos'].items()}
+    for tipo, (minimo, maximo) in b['rangos'].items():
+        if tipo in rangos:
+            rangos[tipo] = [min(rangos[tipo][0], minimo), max(rangos[tipo][1], maximo)]
+        else:
+            rangos[tipo] = [minimo, maximo]
+
+    return {'filas': a['filas'] + b['filas'],
+            'nulos': a['nulos'] + b['nulos'],
+            'tipos': tipos,
+            'rangos': rangos,
+            'sketch': np.union1d(a['sketch'], b['sketch'])[:K_CARDINALIDAD]}
+
+def combina_perfiles(perfiles):
+    '''
+    Combina perfiles parciales calculados sobre distintos bloques o archivos.
+
+    Las columnas que sólo aparecen en algunos perfiles se combinan con las que existen.
+
+    Parameters:
+        perfiles (iterable): Los perfiles generados con 'perfil_parcial' o 'perfila'.
+
+    Returns:
+        dict: El perfil combinado.
+    '''
+    combinado = None
+    for perfil in perfiles:
+        if combinado is None:
+            combinado = {'filas': perfil['filas'],
+                         'filas_totales': perfil['filas_totales'],
+                         'columnas': dict(perfil['columnas'])}
+            continue
+        combinado['filas'] += perfil['filas']
+        combinado['filas_totales'] += perfil['filas_totales']
+        for columna, estadisticas in perfil['columnas'].items():
+            if columna in combinado['columnas']:
+                combinado['columnas'][columna] = _combina_columnas(combinado['columnas'][columna], estadisticas)
+            else:
+                combinado['columnas'][columna] = estadisticas
+    if combinado is None:
+        raise ValueError('No hay perfiles para combinar')
+    return combinado
+
+def _bloques(fuente, tamaño_chunk):
+    '''
+    Devuelve los bloques a perfilar a partir de un DataFrame, un archivo CSV o un iterable.
+    '''
+    if isinstance(fuente, pd.DataFrame):
+        if tamaño_chunk is None:
+            yield fuente
+        else:
+            for inicio in range(0, len(fuente), tamaño_chunk):
+                yield fuente.iloc[inicio:inicio + tamaño_chunk]
+    elif isinstance(fuente, str):
+        yield from pd.read_csv(fuente, chunksize=tamaño_chunk or 100_000)
+    else:
+        yield from fuente
+
+def perfila(fuente, tamaño_chunk=None, fraccion_muestra=None, semilla=0):
+    '''
+    Perfila una fuente de datos recorriéndola bloque por bloque.
+
+    Parameters:
+        fuente (pandas.DataFrame, str o iterable): Un DataFrame, la ruta de un CSV o un
+            iterable de DataFrames (por ejemplo, los bloques de varios archivos).
+        tamaño_chunk (int, optional): La cantidad de filas de cada bloque.
+        fraccion_muestra (float, optional): Si se indica, se perfila sólo una muestra aleatoria
+            de esa fracción de las filas de cada bloque.
+        semilla (int): La semilla para el muestreo.
+
+    Returns:
+        dict: El perfil combinado de todos los bloques.
+    '''
+    generador = np.random.default_rng(semilla)
+    perfiles = []
+    desplazamiento = 0
+    for bloque in _bloques(fuente, tamaño_chunk):
+        filas_bloque = len(bloque)
+        if fraccion_muestra is not None and fraccion_muestra < 1:
+            bloque = bloque[generador.random(filas_bloque) < fraccion_muestra]
+        perfil = perfil_parcial(bloque, desplazamiento)
+        perfil['filas_totales'] = filas_bloque
+        perfiles.append(perfil)
+        desplazamiento += filas_bloque
+    return combina_perfiles(perfiles)
+
+def _estima_cardinalidad(sketch):
+    '''
+    Estima la cantidad de valores distintos a partir de los K hashes mínimos.
+    '''
+    if len(sketch) < K_CARDINALIDAD:
+        return len(sketch)
+    return int(round((K_CARDINALIDAD - 1) / (float(sketch[K_CARDINALIDAD - 1]) / 2.0**64)))
+
+def resumen_perfil(perfil):
+    '''
+    Convierte un perfil en una tabla resumen con una fila por columna.
+
+    Si el perfil se calculó sobre una muestra, las cantidades de nulos se escalan a la
+    cantidad total de filas y se agrega el margen de error (95%) del porcentaje de nulos.
+
+    Parameters:
+        perfil (dict): El perfil generado con 'perfila', 'perfil_parcial' o 'combina_perfiles'.
+
+    Returns:
+        pandas.DataFrame: Un DataFrame con el resumen de cada columna, incluyendo:
+        - 'nombre_campo': Nombre de cada columna.
+        - 'tipo_datos': Tipos de datos únicos presentes en cada columna.
+        - 'no_nulos_%': Porcentaje de valores no nulos en cada columna.
+        - 'nulos_%': Porcentaje de valores nulos en cada columna.
+        - 'nulos': Cantidad de valores nulos en cada columna.
+        - 'cardinalidad': Cantidad (estimada si es grande) de valores distintos.
+        - 'minimo' y 'maximo': Rango de los valores del tipo predominante.
+        - 'error_nulos_%': Margen de error del porcentaje de nulos (sólo con muestreo).
+    '''
+    muestreado = perfil['filas'] < perfil['filas_totales']
+    mi_dict = {"nombre_campo": [], "tipo_datos": [], "no_nulos_%": [], "nulos_%": [], "nulos": [],
+               "cardinalidad": [], "minimo": [], "maximo": []}
+    if muestreado:
+        mi_dict["error_nulos_%"] = []
+
+    for columna, estadisticas in perfil['columnas'].items():
+        filas = estadisticas['filas']
+        proporcion_nulos = estadisticas['nulos'] / filas if filas else 0
+        porcentaje_no_nulos = (filas - estadisticas['nulos']) / filas * 100 if filas else 0
+        tipos = sorted(estadisticas['tipos'].items(), key=lambda item: item[1][1])
+
+        # Se toma el rango del tipo no nulo con más valores
+        rangos = estadisticas['rangos']
+        minimo = maximo = None
+        if rangos:
+            predominante = max(rangos, key=lambda tipo: estadisticas['tipos'][tipo][0])
+            minimo, maximo = rangos[predominante]
+
+        mi_dict["nombre_campo"].append(columna)
+        mi_dict["tipo_datos"].append(np.array([tipo for tipo, _ in tipos], dtype=object))
+        mi_dict["no_nulos_%"].append(round(porcentaje_no_nulos, 2))
+        mi_dict["nulos_%"].append(round(100 - porcentaje_no_nulos, 2))
+        mi_dict["nulos"].append(int(round(proporcion_nulos * perfil['filas_totales'])) if muestreado else estadisticas['nulos'])
+        mi_dict["cardinalidad"].append(_estima_cardinalidad(estadisticas['sketch']))
+        mi_dict["minimo"].append(minimo)
+        mi_dict["maximo"].append(maximo)
+        if muestreado:
+            error = Z_95 * np.sqrt(proporcion_nulos * (1 - proporcion_nulos) / filas) if filas else np.nan
+            mi_dict["error_nulos_%"].append(round(error * 100, 2))
+
+    return pd.DataFrame(mi_dict)
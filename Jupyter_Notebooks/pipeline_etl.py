@@ -0,0 +1,426 @@
+## PIPELINE ETL POR BLOQUES PARA LOS DATOS DE HOMICIDIOS
+# Importaciones
+import glob
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+import horas
+import utils
+
+# Renombres de columnas aplicados en el notebook de ETL
+RENOMBRES_HECHOS = {'N victimas': 'Cantidad víctimas',
+                    'Aaaa': 'Año',
+                    'Mm': 'Mes',
+                    'Dd': 'Día',
+                    'Hh': 'Hora entera',
+                    'Xy (caba)': 'XY (CABA)',
+                    'Victima': 'Víctima'}
+
+RENOMBRES_VICTIMAS = {'Id hecho': 'Id',
+                      'Aaaa': 'Año',
+                      'Mm': 'Mes',
+                      'Dd': 'Día',
+                      'Victima': 'Víctima'}
+
+# Columnas que se eliminan de cada hoja (las de VICTIMAS ya están en HECHOS)
+COLUMNAS_ELIMINADAS_HECHOS = ['Altura']
+COLUMNAS_ELIMINADAS_VICTIMAS = ['Fecha fallecimiento', 'Fecha', 'Año', 'Mes', 'Día', 'Víctima']
+
+DIAS_SEMANA = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+
+
+def lee_hoja_por_bloques(ruta_excel, hoja, tamaño_bloque=50_000):
+    '''
+    Lee una hoja de Excel en bloques de filas sin cargar la hoja completa en memoria.
+
+    Se utiliza openpyxl en modo de sólo lectura, que recorre las filas de la hoja a
+    medida que se descomprimen. Las filas completamente vacías se descartan.
+
+    Parameters:
+        ruta_excel (str): La ruta del libro de Excel.
+        hoja (str): El nombre de la hoja.
+        tamaño_bloque (int): La cantidad máxima de filas de cada bloque.
+
+    Returns:
+        generator: Un generador de DataFrames con las columnas originales de la hoja.
+    '''
+    libro = load_workbook(ruta_excel, read_only=True, data_only=True)
+    try:
+        filas = libro[hoja].iter_rows(values_only=True)
+        encabezado = list(next(filas))
+        bloque = []
+        for fila in filas:
+            if all(valor is None for valor in fila):
+                continue
+            bloque.append(fila)
+            if len(bloque) == tamaño_bloque:
+                yield pd.DataFrame(bloque, columns=encabezado)
+                bloque = []
+        if bloque:
+            yield pd.DataFrame(bloque, columns=encabezado)
+    finally:
+        libro.close()
+
+def ejecuta_etapas(bloques, etapas):
+    '''
+    Aplica una secuencia de etapas a cada bloque de un flujo de datos.
+
+    Cada etapa es una función que recibe un DataFrame y devuelve otro DataFrame, por lo que
+    las etapas se pueden combinar libremente (con 'functools.partial' para fijar parámetros).
+
+    Parameters:
+        bloques (iterable): Los bloques (DataFrames) de entrada.
+        etapas (list): Las funciones a aplicar, en orden.
+
+    Returns:
+        generator: Un generador con los bloques transformados.
+    '''
+    for bloque in bloques:
+        for etapa in etapas:
+            bloque = etapa(bloque)
+        yield bloque
+
+def normaliza_columnas(bloque, renombres):
+    '''
+    Estandariza los nombres de las columnas: primera letra en mayúscula, guiones bajos
+    reemplazados por espacios y renombres puntuales.
+
+    Parameters:
+        bloque (pandas.DataFrame): El bloque a transformar.
+        renombres (dict): Los renombres a aplicar luego de la estandarización.
+
+    Returns:
+        pandas.DataFrame: El bloque con las columnas renombradas.
+    '''
+    bloque = bloque.copy()
+    bloque.columns = [str(x).capitalize().replace('_', ' ') for x in bloque.columns]
+    return bloque.rename(columns=renombres)
+
+def _moda(conteos):
+    '''
+    Devuelve el valor más frecuente de un conteo, con el mismo desempate que 'Series.mode'
+    (el menor de los valores empatados).
+    '''
+    return conteos[conteos == conteos.max()].index.min()
+
+def _suma_conteos(acumulado, nuevo):
+    '''
+    Suma dos conteos de valores (Series indexadas por valor).
+    '''
+    if acumulado is None:
+        return nuevo
+    return acumulado.add(nuevo, fill_value=0)
+
+def acumula_conteos_imputacion(bloques_hechos, bloques_victimas):
+    '''
+    Recorre ambas hojas por bloques y acumula los conteos y sumas que necesitan las imputaciones.
+
+    Los conteos son aditivos, por lo que se pueden sumar entre bloques o archivos y también
+    restar cuando se quitan registros (ver 'etl_incremental').
+
+    Parameters:
+        bloques_hechos (iterable): Los bloques de HECHOS con las columnas ya normalizadas.
+        bloques_victimas (iterable): Los bloques de VICTIMAS con las columnas ya normalizadas.
+
+    Returns:
+        dict: Los conteos de 'horas', 'Sexo' y 'Rol' y la suma y cantidad de 'edad' por sexo.
+    '''
+    conteos = {'horas': None, 'Sexo': None, 'Rol': None, 'edad': None}
+    for bloque in bloques_hechos:
+        segundos, fallidos = horas.parsea_horas(bloque['Hora'])
+        conteo = pd.Series(segundos[~fallidos]).value_counts()
+        # Los conteos se indexan por objetos time, uno por hora distinta
+        conteo.index = horas.segundos_a_time(conteo.index.to_numpy())
+        conteos['horas'] = _suma_conteos(conteos['horas'], conteo)
+
+    for bloque in bloques_victimas:
+        for columna in ['Sexo', 'Rol']:
+            validos = bloque[columna][bloque[columna] != 'SD'].dropna()
+            conteos[columna] = _suma_conteos(conteos[columna], validos.value_counts())
+        # La edad se acumula según el sexo original; los 'SD' se asignan luego a la moda
+        edad = pd.to_numeric(bloque['Edad'].replace('SD', np.nan))
+        parcial = edad.groupby(bloque['Sexo'].astype(object).fillna('SD')).agg(['sum', 'count'])
+        conteos['edad'] = _suma_conteos(conteos['edad'], parcial)
+
+    for clave in ['horas', 'Sexo', 'Rol']:
+        if conteos[clave] is None:
+            conteos[clave] = pd.Series(dtype='float64')
+    if conteos['edad'] is None:
+        conteos['edad'] = pd.DataFrame(columns=['sum', 'count'], dtype='float64')
+    return conteos
+
+def finaliza_estadisticas_imputacion(conteos):
+    '''
+    Obtiene las estadísticas de imputación a partir de los conteos acumulados.
+
+    Parameters:
+        conteos (dict): Los conteos de 'acumula_conteos_imputacion'.
+
+    Returns:
+        dict: Las estadísticas 'hora_moda', 'moda_Sexo', 'moda_Rol' y 'edad_media_sexo'.
+    '''
+    estadisticas = {'hora_moda': _moda(conteos['horas'])}
+    for columna in ['Sexo', 'Rol']:
+        estadisticas[f'moda_{columna}'] = _moda(conteos[columna])
+
+    # Se agregan los registros de sexo 'SD' (o nulo) al sexo imputado
+    sumas_edad = conteos['edad'].rename(index={'SD': estadisticas['moda_Sexo']})
+    sumas_edad = sumas_edad.groupby(level=0).sum()
+    estadisticas['edad_media_sexo'] = (sumas_edad['sum'] / sumas_edad['count']).to_dict()
+    return estadisticas
+
+def calcula_estadisticas_imputacion(bloques_hechos, bloques_victimas):
+    '''
+    Recorre ambas hojas por bloques y calcula las estadísticas globales de imputación.
+
+    Las imputaciones del notebook dependen de todo el conjunto (la hora más frecuente, el
+    valor más frecuente de 'Sexo' y 'Rol' y la edad promedio por sexo), por lo que se
+    calculan en una primera pasada acumulando sólo conteos y sumas por bloque.
+
+    Parameters:
+        bloques_hechos (iterable): Los bloques de HECHOS con las columnas ya normalizadas.
+        bloques_victimas (iterable): Los bloques de VICTIMAS con las columnas ya normalizadas.
+
+    Returns:
+        dict: Las estadísticas 'hora_moda', 'moda_Sexo', 'moda_Rol' y 'edad_media_sexo'.
+    '''
+    return finaliza_estadisticas_imputacion(acumula_conteos_imputacion(bloques_hechos, bloques_victimas))
+
+def limpia_bloque_hechos(bloque, estadisticas):
+    '''
+    Aplica a un bloque de HECHOS las transformaciones del notebook de ETL.
+
+    Se elimina 'Altura', 'Cruce' pasa a SI/NO, se completan con 'SD' 'Dirección normalizada'
+    y 'Calle', se convierte 'Hora' imputando la hora más frecuente (también en 'Hora entera'),
+    se agrupan las víctimas 'OBJETO FIJO' y 'PEATON_MOTO' en 'OTRO' y las coordenadas
+    faltantes se reemplazan por 0.
+
+    Parameters:
+        bloque (pandas.DataFrame): El bloque de HECHOS con las columnas normalizadas.
+        estadisticas (dict): Las estadísticas de 'calcula_estadisticas_imputacion'.
+
+    Returns:
+        pandas.DataFrame: El bloque limpio.
+    '''
+    hora_moda = estadisticas['hora_moda']
+    bloque = bloque.drop(columns=COLUMNAS_ELIMINADAS_HECHOS)
+    bloque['Cruce'] = np.where(bloque['Cruce'].notnull(), 'SI', 'NO')
+    bloque['Dirección normalizada'] = bloque['Dirección normalizada'].fillna('SD')
+    segundos, fallidos = horas.parsea_horas(bloque['Hora'])
+    bloque['Hora'] = pd.Series(horas.segundos_a_time(segundos, fallidos), index=bloque.index).fillna(hora_moda)
+    bloque['Hora entera'] = bloque['Hora entera'].astype(object).mask(bloque['Hora entera'] == 'SD', int(hora_moda.hour))
+    bloque['Calle'] = bloque['Calle'].fillna('SD')
+    bloque['Víctima'] = bloque['Víctima'].replace({'OBJETO FIJO': 'OTRO', 'PEATON_MOTO': 'OTRO'})
+    bloque['Pos x'] = bloque['Pos x'].replace('.', 0)
+    bloque['Pos y'] = bloque['Pos y'].replace('.', 0)
+    bloque['XY (CABA)'] = bloque['XY (CABA)'].replace('Point (. .)', 0)
+    return bloque
+
+def limpia_bloque_victimas(bloque, estadisticas):
+    '''
+    Aplica a un bloque de VICTIMAS las imputaciones del notebook de ETL.
+
+    'Sexo' y 'Rol' se completan con su valor más frecuente y 'Edad' con la edad promedio
+    del sexo de la víctima. Luego se eliminan las columnas que se repiten en HECHOS.
+
+    Parameters:
+        bloque (pandas.DataFrame): El bloque de VICTIMAS con las columnas normalizadas.
+        estadisticas (dict): Las estadísticas de 'calcula_estadisticas_imputacion'.
+
+    Returns:
+        pandas.DataFrame: El bloque limpio.
+    '''
+    bloque = bloque.copy()
+    for columna in ['Sexo', 'Rol']:
+        bloque[columna] = bloque[columna].replace('SD', np.nan).fillna(estadisticas[f'moda_{columna}'])
+    edad = pd.to_numeric(bloque['Edad'].replace('SD', np.nan))
+    bloque['Edad'] = edad.fillna(bloque['Sexo'].map(estadisticas['edad_media_sexo'])).astype(int)
+    return bloque.drop(columns=COLUMNAS_ELIMINADAS_VICTIMAS)
+
+def agrega_columnas_derivadas(bloque):
+    '''
+    Agrega las columnas que el EDA incorpora al archivo limpio ('Día semana', 'Nombre día',
+    'Categoria tiempo', 'Hora del día', 'Dia semana' y 'Tipo de día').
+
+    Parameters:
+        bloque (pandas.DataFrame): El bloque ya unido de víctimas y hechos.
+
+    Returns:
+        pandas.DataFrame: El bloque con las columnas derivadas.
+    '''
+    bloque = bloque.copy()
+    dia_semana = pd.to_datetime(bloque['Fecha']).dt.dayofweek
+    columnas_hora = horas.columnas_de_hora(*horas.parsea_horas(bloque['Hora']))
+    bloque['Día semana'] = dia_semana
+    bloque['Nombre día'] = dia_semana.map(dict(enumerate(DIAS_SEMANA)))
+    bloque['Categoria tiempo'] = columnas_hora['Categoria tiempo']
+    bloque['Hora del día'] = columnas_hora['Hora del día']
+    bloque['Dia semana'] = dia_semana
+    bloque['Tipo de día'] = utils.categoriza_tipo_dia(dia_semana)
+    return bloque
+
+def _particion(ids, particiones):
+    '''
+    Asigna a cada 'Id' una partición a partir de su hash.
+    '''
+    return pd.util.hash_array(np.asarray(ids, dtype=object).astype(str).astype(object)) % particiones
+
+def particiona_en_disco(bloques, directorio, particiones=16, columna='Id'):
+    '''
+    Escribe los bloques en disco repartiendo las filas en particiones según el hash de una columna.
+
+    Cada bloque genera a lo sumo un archivo por partición, de modo que nunca se mantiene en
+    memoria más de un bloque a la vez.
+
+    Parameters:
+        bloques (iterable): Los bloques a particionar.
+        directorio (str): El directorio donde se escriben las particiones.
+        particiones (int): La cantidad de particiones.
+        columna (str): La columna por la que se particiona.
+
+    Returns:
+        int: La cantidad de filas escritas.
+    '''
+    os.makedirs(directorio, exist_ok=True)
+    filas = 0
+    for numero, bloque in enumerate(bloques):
+        asignacion = _particion(bloque[columna], particiones)
+        for particion, grupo in bloque.groupby(asignacion, sort=False):
+            grupo.to_pickle(os.path.join(directorio, f'particion_{particion:04d}_{numero:06d}.pkl'))
+        filas += len(bloque)
+    return filas
+
+def _lee_particion(directorio, particion):
+    '''
+    Lee todos los archivos de una partición en un único DataFrame.
+    '''
+    archivos = sorted(glob.glob(os.path.join(directorio, f'particion_{particion:04d}_*.pkl')))
+    if not archivos:
+        return None
+    return pd.concat([pd.read_pickle(archivo) for archivo in archivos])
+
+def _esquema_particiones(directorio):
+    '''
+    Devuelve un DataFrame vacío con las columnas y los tipos de las particiones de un directorio.
+    '''
+    archivos = sorted(glob.glob(os.path.join(directorio, 'particion_*.pkl')))
+    if not archivos:
+        return None
+    return pd.read_pickle(archivos[0]).iloc[:0]
+
+def une_por_id(bloques_izquierda, directorio_derecha, particiones=16, columna='Id', particiones_en_memoria=4):
+    '''
+    Une cada bloque con las filas particionadas en disco, como un 'merge' con how='left'.
+
+    Para cada bloque se leen sólo las particiones que contienen sus claves, manteniendo en
+    memoria las más recientes. El orden de las filas de la izquierda se conserva, por lo que
+    el resultado es el mismo que unir los DataFrames completos.
+
+    Parameters:
+        bloques_izquierda (iterable): Los bloques de la tabla izquierda (VICTIMAS).
+        directorio_derecha (str): El directorio con las particiones de la tabla derecha (HECHOS).
+        particiones (int): La cantidad de particiones con las que se escribió la tabla derecha.
+        columna (str): La columna de unión.
+        particiones_en_memoria (int): Cuántas particiones se conservan leídas entre bloques.
+
+    Returns:
+        generator: Un generador con los bloques unidos.
+    '''
+    leidas = OrderedDict()
+    # Las columnas de la derecha se toman de las particiones antes de empezar, para que los
+    # bloques sin coincidencias (aunque sea el primero) tengan las mismas columnas que los demás
+    vacia = _esquema_particiones(directorio_derecha)
+    if vacia is None:
+        vacia = pd.DataFrame(columns=[columna])
+    for bloque in bloques_izquierda:
+        necesarias = np.unique(_particion(bloque[columna], particiones))
+        partes = []
+        for particion in necesarias:
+            if particion in leidas:
+                leidas.move_to_end(particion)
+            else:
+                leidas[particion] = _lee_particion(directorio_derecha, particion)
+                if len(leidas) > particiones_en_memoria:
+                    leidas.popitem(last=False)
+            if leidas[particion] is not None:
+                partes.append(leidas[particion])
+
+        if partes:
+            derecha = pd.concat(partes)
+            derecha = derecha[derecha[columna].isin(bloque[columna])]
+        else:
+            derecha = vacia
+        yield bloque.merge(derecha, on=columna, how='left')
+
+def escribe_csv(bloques, ruta_salida):
+    '''
+    Escribe los bloques en un único archivo CSV, con el encabezado sólo en el primero.
+
+    Parameters:
+        bloques (iterable): Los bloques a escribir.
+        ruta_salida (str): La ruta del archivo CSV.
+
+    Returns:
+        int: La cantidad de filas escritas.
+    '''
+    filas = 0
+    for numero, bloque in enumerate(bloques):
+        bloque.to_csv(ruta_salida, mode='w' if numero == 0 else 'a', header=numero == 0,
+                      index=False, encoding='utf-8')
+        filas += len(bloque)
+    return filas
+
+def procesa_homicidios(ruta_excel, ruta_salida, tamaño_bloque=50_000, particiones=16,
+                       directorio_temporal=None, columnas_derivadas=True):
+    '''
+    Ejecuta el ETL completo de HECHOS y VICTIMAS por bloques y genera el archivo limpio.
+
+    El flujo es el mismo que el del notebook: normalización de columnas, limpieza e
+    imputación de cada hoja, unión por 'Id' y (opcionalmente) las columnas que agrega el
+    EDA. Ninguna etapa necesita tener la hoja completa en memoria: HECHOS se particiona
+    en disco por 'Id' y VICTIMAS se recorre por bloques uniendo cada uno con las
+    particiones que le corresponden.
+
+    Parameters:
+        ruta_excel (str): La ruta del libro de Excel con las hojas HECHOS y VICTIMAS.
+        ruta_salida (str): La ruta del CSV limpio a generar.
+        tamaño_bloque (int): La cantidad máxima de filas por bloque.
+        particiones (int): La cantidad de particiones en disco para la unión.
+        directorio_temporal (str, optional): El directorio para las particiones.
+        columnas_derivadas (bool): Si se agregan las columnas derivadas del EDA.
+
+    Returns:
+        int: La cantidad de filas escritas.
+    '''
+    def hechos():
+        return ejecuta_etapas(lee_hoja_por_bloques(ruta_excel, 'HECHOS', tamaño_bloque),
+                              [partial(normaliza_columnas, renombres=RENOMBRES_HECHOS)])
+
+    def victimas():
+        return ejecuta_etapas(lee_hoja_por_bloques(ruta_excel, 'VICTIMAS', tamaño_bloque),
+                              [partial(normaliza_columnas, renombres=RENOMBRES_VICTIMAS)])
+
+    # Primera pasada: estadísticas globales de imputación
+    estadisticas = calcula_estadisticas_imputacion(hechos(), victimas())
+
+    directorio = tempfile.mkdtemp(prefix='particiones_hechos_', dir=directorio_temporal)
+    try:
+        # Segunda pasada: HECHOS limpios particionados en disco por 'Id'
+        particiona_en_disco(ejecuta_etapas(hechos(), [partial(limpia_bloque_hechos, estadisticas=estadisticas)]),
+                            directorio, particiones)
+
+        # Tercera pasada: VICTIMAS limpias unidas por bloques con HECHOS
+        bloques = une_por_id(ejecuta_etapas(victimas(), [partial(limpia_bloque_victimas, estadisticas=estadisticas)]),
+                             directorio, particiones)
+        if columnas_derivadas:
+            bloques = ejecuta_etapas(bloques, [agrega_columnas_derivadas])
+        return escribe_csv(bloques, ruta_salida)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
@@ -0,0 +1,267 @@
+## TABLA DE RIESGO POR INTERSECCIÓN Y TRAMO CON CONSULTAS TOP-K
+# Importaciones
+import heapq
+
+import numpy as np
+import pandas as pd
+
+import direcciones
+
+# Dimensiones por las que se puede filtrar el ranking
+DIMENSIONES = ('Año', 'Víctima', 'Categoria tiempo')
+
+# Años para que el peso de una víctima en la severidad se reduzca a la mitad
+VIDA_MEDIA_AÑOS = 2.0
+
+# Largo de los tramos de calle (en altura) en los que se agrupan las direcciones sin cruce
+LARGO_TRAMO = 100
+
+# Criterios de ordenamiento del ranking
+CRITERIOS = ['victimas', 'severidad', 'tendencia']
+
+
+def claves_lugar(catalogo, df):
+    '''
+    Obtiene la intersección o el tramo de calle de cada registro.
+
+    Se usa la 'Dirección normalizada' y, si no se pudo normalizar, el 'Lugar del hecho'.
+    Las direcciones con altura se agrupan en tramos ('CALLE 1200-1299'). Los lugares que
+    no se encuentran en el catálogo conservan su texto normalizado, para no perder registros.
+
+    Parameters:
+        catalogo (dict): El catálogo de 'direcciones.construye_catalogo'.
+        df (pandas.DataFrame): Los registros.
+
+    Returns:
+        pandas.DataFrame: El 'Lugar' y su 'Tipo' ('Intersección', 'Tramo', 'Calle' o 'Sin normalizar').
+    '''
+    lugares = direcciones.normaliza_lugares(catalogo['indice'], df['Dirección normalizada'])
+    faltantes = lugares['direccion'].isna()
+    if faltantes.any():
+        lugares.loc[faltantes] = direcciones.normaliza_lugares(catalogo['indice'],
+                                                               df.loc[faltantes, 'Lugar del hecho'])
+
+    cruce = (lugares['id_calle_2'] >= 0).to_numpy()
+    calle = (lugares['id_calle_1'] >= 0).to_numpy() & ~cruce
+    tramo = calle & lugares['altura'].notna().to_numpy()
+    inicio = (lugares['altura'].fillna(0).to_numpy() // LARGO_TRAMO * LARGO_TRAMO).astype(np.int64)
+
+    lugar = lugares['direccion'].to_numpy(dtype=object).copy()
+    lugar[tramo] = (pd.Series(lugares['calle_1'].to_numpy(dtype=object)[tramo], dtype=str) + ' '
+                    + pd.Series(inicio[tramo]).astype(str) + '-'
+                    + pd.Series(inicio[tramo] + LARGO_TRAMO - 1).astype(str)).to_numpy(dtype=object)
+    sin_normalizar = ~cruce & ~calle
+    lugar[sin_normalizar] = direcciones.normaliza_texto(df.loc[sin_normalizar, 'Lugar del hecho']).to_numpy(dtype=object)
+    lugar[pd.isna(lugar)] = 'SD'
+    tipo = np.select([cruce, tramo, calle], ['Intersección', 'Tramo', 'Calle'], 'Sin normalizar')
+    return pd.DataFrame({'Lugar': lugar, 'Tipo': tipo}, index=df.index)
+
+def _codifica(valores, categorias):
+    '''
+    Convierte valores en códigos enteros, agregando a 'categorias' (dict valor -> código) los nuevos.
+    '''
+    codigos = np.empty(len(valores), dtype=np.int64)
+    for posicion, valor in enumerate(valores):
+        codigo = categorias.get(valor)
+        if codigo is None:
+            codigo = categorias[valor] = len(categorias)
+        codigos[posicion] = codigo
+    return codigos
+
+def crea_tabla_riesgo(catalogo, dimensiones=DIMENSIONES):
+    '''
+    Crea una tabla de riesgo vacía.
+
+    La tabla guarda celdas (lugar, dimensiones) con la cantidad de víctimas, como arreglos
+    de códigos enteros. Las celdas son aditivas: agregar incidentes sólo agrega celdas, y
+    cada ranking suma las celdas que cumplen los filtros.
+
+    Parameters:
+        catalogo (dict): El catálogo de 'direcciones.construye_catalogo'.
+        dimensiones (tuple): Las columnas por las que se puede filtrar (deben incluir 'Año').
+
+    Returns:
+        dict: La tabla vacía.
+    '''
+    if 'Año' not in dimensiones:
+        raise ValueError("Las dimensiones deben incluir 'Año' para calcular la severidad y la tendencia")
+    return {'catalogo': catalogo, 'dimensiones': tuple(dimensiones), 'lugares': {}, 'tipos': [],
+            'categorias': {dimension: {} for dimension in dimensiones},
+            'celdas': {'lugar': np.empty(0, dtype=np.int64), 'victimas': np.empty(0, dtype=np.int64),
+                       **{dimension: np.empty(0, dtype=np.int64) for dimension in dimensiones}},
+            'consultas': {}}
+
+def _compacta(tabla):
+    '''
+    Suma las celdas repetidas, que se acumulan al agregar incidentes.
+    '''
+    celdas = pd.DataFrame(tabla['celdas'])
+    claves = ['lugar'] + list(tabla['dimensiones'])
+    celdas = celdas.groupby(claves, sort=False)['victimas'].sum().reset_index()
+    tabla['celdas'] = {columna: celdas[columna].to_numpy(dtype=np.int64) for columna in celdas.columns}
+
+def agrega_incidentes(tabla, df):
+    '''
+    Agrega incidentes a la tabla de riesgo y descarta los rankings guardados.
+
+    Parameters:
+        tabla (dict): La tabla de 'crea_tabla_riesgo'.
+        df (pandas.DataFrame): Los registros nuevos (una fila por víctima).
+
+    Returns:
+        dict: La misma tabla, actualizada.
+    '''
+    if len(df) == 0:
+        return tabla
+    claves = claves_lugar(tabla['catalogo'], df)
+    # Se codifican los valores únicos y luego se reparten a las filas
+    codigos, unicos = pd.factorize(claves['Lugar'], use_na_sentinel=False)
+    tipos = claves.groupby(codigos)['Tipo'].first().to_numpy()
+    codigos_unicos = _codifica(list(unicos), tabla['lugares'])
+    # Los lugares nuevos reciben códigos consecutivos; se registra su tipo
+    for codigo, tipo in zip(codigos_unicos, tipos):
+        if codigo == len(tabla['tipos']):
+            tabla['tipos'].append(tipo)
+
+    nuevas = {'lugar': codigos_unicos[codigos], 'victimas': np.ones(len(df), dtype=np.int64)}
+    for dimension in tabla['dimensiones']:
+        codigos_dimension, valores = pd.factorize(df[dimension], use_na_sentinel=False)
+        nuevas[dimension] = _codifica(list(valores), tabla['categorias'][dimension])[codigos_dimension]
+
+    tamaño_anterior = len(tabla['celdas']['lugar'])
+    tabla['celdas'] = {columna: np.concatenate([tabla['celdas'][columna], nuevas[columna]])
+                       for columna in tabla['celdas']}
+    # Se compacta cuando las celdas sin sumar duplican a las anteriores
+    if len(tabla['celdas']['lugar']) > 2 * max(tamaño_anterior, 1024):
+        _compacta(tabla)
+    tabla['consultas'].clear()
+    return tabla
+
+def construye_tabla_riesgo(df, catalogo=None, dimensiones=DIMENSIONES):
+    '''
+    Construye la tabla de riesgo por intersección y tramo con todos los registros.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame limpio de homicidios.
+        catalogo (dict, optional): El catálogo de direcciones. Por defecto, se construye con 'df'.
+        dimensiones (tuple): Las columnas por las que se puede filtrar.
+
+    Returns:
+        dict: La tabla de riesgo.
+    '''
+    catalogo = direcciones.construye_catalogo(df) if catalogo is None else catalogo
+    tabla = agrega_incidentes(crea_tabla_riesgo(catalogo, dimensiones), df)
+    _compacta(tabla)
+    return tabla
+
+def _normaliza_filtros(filtros):
+    '''
+    Convierte los filtros a una clave ordenada y hasheable.
+    '''
+    return tuple(sorted((dimension, tuple(valores) if isinstance(valores, (list, tuple, set)) else (valores,))
+                        for dimension, valores in filtros.items()))
+
+def victimas_por_año(tabla, **filtros):
+    '''
+    Suma las víctimas de cada lugar y año de las celdas que cumplen los filtros.
+
+    El resultado se guarda por combinación de filtros hasta que se agregan incidentes, por
+    lo que las consultas repetidas no vuelven a recorrer las celdas.
+
+    Parameters:
+        tabla (dict): La tabla de riesgo.
+        **filtros: Un valor o una lista de valores por dimensión, por ejemplo Año=[2020, 2021].
+
+    Returns:
+        tuple: La matriz (lugares x años) de víctimas y los años de sus columnas.
+    '''
+    clave = _normaliza_filtros(filtros)
+    if clave in tabla['consultas']:
+        return tabla['consultas'][clave]
+
+    celdas = tabla['celdas']
+    mascara = np.ones(len(celdas['lugar']), dtype=bool)
+    for dimension, valores in clave:
+        if dimension not in tabla['dimensiones']:
+            raise KeyError(f'La dimensión {dimension} no está en la tabla. Opciones: {tabla["dimensiones"]}')
+        codigos = [tabla['categorias'][dimension][valor] for valor in valores if valor in tabla['categorias'][dimension]]
+        mascara &= np.isin(celdas[dimension], codigos)
+
+    años = np.array(list(tabla['categorias']['Año']), dtype=np.int64)
+    orden_años = np.argsort(años)
+    # Posición de cada código de año en la lista ordenada de años
+    columna_año = np.empty(len(años), dtype=np.int64)
+    columna_año[orden_años] = np.arange(len(años))
+
+    lugares = len(tabla['lugares'])
+    indice = celdas['lugar'][mascara] * len(años) + columna_año[celdas['Año'][mascara]]
+    matriz = np.bincount(indice, celdas['victimas'][mascara], minlength=lugares * len(años))
+    resultado = (matriz.reshape(lugares, len(años)).astype(np.int64), años[orden_años])
+    tabla['consultas'][clave] = resultado
+    return resultado
+
+def indicadores(tabla, **filtros):
+    '''
+    Calcula las víctimas, la severidad y la tendencia de cada lugar con los filtros indicados.
+
+    La severidad pondera cada víctima según su antigüedad: el peso se reduce a la mitad cada
+    'VIDA_MEDIA_AÑOS' años antes del último año de los datos. La tendencia es la pendiente
+    (víctimas por año) de la recta de mínimos cuadrados sobre los años del filtro.
+
+    Parameters:
+        tabla (dict): La tabla de riesgo.
+        **filtros: Un valor o una lista de valores por dimensión.
+
+    Returns:
+        dict: Los arreglos 'victimas', 'severidad' y 'tendencia', uno por lugar.
+    '''
+    matriz, años = victimas_por_año(tabla, **filtros)
+    if len(años) == 0:
+        vacio = np.zeros(len(tabla['lugares']))
+        return {'victimas': vacio, 'severidad': vacio, 'tendencia': vacio}
+    pesos = 0.5 ** ((años.max() - años) / VIDA_MEDIA_AÑOS)
+
+    # Sólo los años del filtro (o todos) intervienen en la tendencia
+    filtro_años = dict(_normaliza_filtros(filtros)).get('Año')
+    columnas = np.isin(años, filtro_años) if filtro_años is not None else np.ones(len(años), dtype=bool)
+    x = años[columnas] - años[columnas].mean()
+    denominador = (x ** 2).sum()
+    tendencia = matriz[:, columnas] @ x / denominador if denominador > 0 else np.zeros(len(matriz))
+    return {'victimas': matriz.sum(axis=1), 'severidad': matriz @ pesos, 'tendencia': tendencia}
+
+def top_k(tabla, k=10, por='severidad', tipos=None, **filtros):
+    '''
+    Devuelve los k lugares con mayor riesgo según el criterio, con cualquier combinación de filtros.
+
+    Los k mayores se eligen con un montículo (heap) de tamaño k, sin ordenar todos los lugares.
+
+    Parameters:
+        tabla (dict): La tabla de riesgo.
+        k (int): La cantidad de lugares.
+        por (str): 'victimas', 'severidad' o 'tendencia'.
+        tipos (list, optional): Los tipos de lugar a incluir, por ejemplo ['Intersección'].
+        **filtros: Un valor o una lista de valores por dimensión, por ejemplo
+            Año=2021, **{'Víctima': 'MOTO', 'Categoria tiempo': ['Noche', 'Madrugada']}.
+
+    Returns:
+        pandas.DataFrame: El ranking con el lugar, su tipo, las víctimas, la severidad y la tendencia.
+    '''
+    if por not in CRITERIOS:
+        raise ValueError(f'Criterio no soportado: {por}. Opciones: {CRITERIOS}')
+    valores = indicadores(tabla, **filtros)
+    puntajes = valores[por]
+    candidatos = np.flatnonzero(valores['victimas'] > 0)
+    if tipos is not None:
+        tipos_lugar = np.asarray(tabla['tipos'], dtype=object)
+        candidatos = candidatos[np.isin(tipos_lugar[candidatos], list(tipos))]
+    # Se desempata por víctimas y luego por el orden de aparición del lugar
+    mejores = heapq.nlargest(k, candidatos.tolist(),
+                             key=lambda lugar: (puntajes[lugar], valores['victimas'][lugar], -lugar))
+
+    nombres = list(tabla['lugares'])
+    return pd.DataFrame({'Lugar': [nombres[lugar] for lugar in mejores],
+                         'Tipo': [tabla['tipos'][lugar] for lugar in mejores],
+                         'Víctimas': valores['victimas'][mejores].astype(np.int64),
+                         'Severidad': valores['severidad'][mejores].round(3),
+                         'Tendencia': valores['tendencia'][mejores].round(3)},
+                        index=pd.RangeIndex(1, len(mejores) + 1, name='Puesto'))
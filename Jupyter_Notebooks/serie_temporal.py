@@ -0,0 +1,325 @@
+## ALMACÉN DE SERIES TEMPORALES DE VÍCTIMAS CON SUMAS ACUMULADAS Y VENTANAS MÓVILES
+# Importaciones
+import numpy as np
+import pandas as pd
+
+from calculos_eda import extrae_hora_entera
+
+# Ventanas móviles (en días) que se mantienen actualizadas al agregar datos
+VENTANAS = (7, 30, 365)
+
+# Clave de la serie con el total de todos los grupos
+TOTAL = 'Total'
+
+# Capacidad inicial (en días) de los arreglos del almacén
+CAPACIDAD_INICIAL = 1024
+
+
+def crea_almacen(por='Comuna', medida='Cantidad víctimas', ventanas=VENTANAS):
+    '''
+    Crea un almacén de series temporales vacío.
+
+    El almacén guarda, para el total y para cada valor de la columna 'por', un arreglo
+    contiguo con la medida de cada día y otro con la de cada hora, sus sumas acumuladas
+    (para responder la suma de cualquier rango en O(1)) y las sumas de las ventanas
+    móviles. Los arreglos tienen capacidad de sobra, por lo que agregar días nuevos sólo
+    calcula los valores de esos días.
+
+    Parameters:
+        por (str, optional): La columna que define las series por grupo (por ejemplo 'Comuna').
+            Con None sólo se guarda el total.
+        medida (str, optional): La columna entera que se suma. Con None se cuentan las filas.
+        ventanas (tuple): Las ventanas móviles, en días, que se mantienen.
+
+    Returns:
+        dict: El almacén vacío.
+    '''
+    return {'por': por, 'medida': medida, 'ventanas': tuple(ventanas), 'inicio': None, 'dias': 0,
+            'capacidad': 0, 'diario': {}, 'horario': {}, 'acumulado': {}, 'acumulado_horario': {},
+            'moviles': {ventana: {} for ventana in ventanas}}
+
+def _arreglos_serie(capacidad, ventanas):
+    '''
+    Crea los arreglos vacíos de una serie para la capacidad indicada.
+    '''
+    return {'diario': np.zeros(capacidad, dtype=np.int64),
+            'horario': np.zeros(capacidad * 24, dtype=np.int64),
+            'acumulado': np.zeros(capacidad + 1, dtype=np.int64),
+            'acumulado_horario': np.zeros(capacidad * 24 + 1, dtype=np.int64),
+            'moviles': {ventana: np.zeros(capacidad, dtype=np.int64) for ventana in ventanas}}
+
+def _agrega_serie(almacen, clave):
+    '''
+    Agrega una serie nueva (en cero) al almacén.
+    '''
+    arreglos = _arreglos_serie(almacen['capacidad'], almacen['ventanas'])
+    for nombre in ('diario', 'horario', 'acumulado', 'acumulado_horario'):
+        almacen[nombre][clave] = arreglos[nombre]
+    for ventana in almacen['ventanas']:
+        almacen['moviles'][ventana][clave] = arreglos['moviles'][ventana]
+
+def _reubica(almacen, inicio, dias):
+    '''
+    Cambia el primer día o agranda la capacidad de todas las series, copiando los datos.
+
+    La capacidad se duplica para que agregar días de a uno tenga un costo amortizado constante.
+    '''
+    desplazamiento = 0 if almacen['inicio'] is None else int((almacen['inicio'] - inicio).astype(np.int64))
+    capacidad = max(CAPACIDAD_INICIAL, almacen['capacidad'])
+    while capacidad < dias:
+        capacidad *= 2
+
+    usados = almacen['dias']
+    for clave in list(almacen['diario']):
+        nuevos = _arreglos_serie(capacidad, almacen['ventanas'])
+        nuevos['diario'][desplazamiento:desplazamiento + usados] = almacen['diario'][clave][:usados]
+        nuevos['horario'][desplazamiento * 24:(desplazamiento + usados) * 24] = almacen['horario'][clave][:usados * 24]
+        nuevos['acumulado'][:usados + 1] = almacen['acumulado'][clave][:usados + 1]
+        nuevos['acumulado_horario'][:usados * 24 + 1] = almacen['acumulado_horario'][clave][:usados * 24 + 1]
+        for ventana in almacen['ventanas']:
+            nuevos['moviles'][ventana][:usados] = almacen['moviles'][ventana][clave][:usados]
+        for nombre in ('diario', 'horario', 'acumulado', 'acumulado_horario'):
+            almacen[nombre][clave] = nuevos[nombre]
+        for ventana in almacen['ventanas']:
+            almacen['moviles'][ventana][clave] = nuevos['moviles'][ventana]
+    almacen.update(inicio=inicio, capacidad=capacidad)
+    # Si cambió el primer día, las sumas se recalculan desde el principio
+    return 0 if desplazamiento else usados
+
+def _recalcula_desde(almacen, clave, dia):
+    '''
+    Recalcula las sumas acumuladas y las ventanas móviles de una serie desde un día en adelante.
+    '''
+    dias = almacen['dias']
+    diario, acumulado = almacen['diario'][clave], almacen['acumulado'][clave]
+    np.cumsum(diario[dia:dias], out=acumulado[dia + 1:dias + 1])
+    acumulado[dia + 1:dias + 1] += acumulado[dia]
+
+    horario, acumulado_horario = almacen['horario'][clave], almacen['acumulado_horario'][clave]
+    np.cumsum(horario[dia * 24:dias * 24], out=acumulado_horario[dia * 24 + 1:dias * 24 + 1])
+    acumulado_horario[dia * 24 + 1:dias * 24 + 1] += acumulado_horario[dia * 24]
+
+    # La ventana que termina en el día d es acumulado[d + 1] - acumulado[d + 1 - ventana]
+    fin = np.arange(dia + 1, dias + 1)
+    for ventana, moviles in almacen['moviles'].items():
+        moviles[clave][dia:dias] = acumulado[fin] - acumulado[np.maximum(fin - ventana, 0)]
+
+def agrega_registros(almacen, df):
+    '''
+    Agrega registros al almacén y actualiza las sumas y las ventanas móviles.
+
+    Sólo se recalculan los valores desde el día más antiguo de los registros nuevos, por
+    lo que agregar los datos de los últimos días cuesta lo proporcional a esos días.
+    Agregar registros de días anteriores (correcciones) también está permitido.
+
+    Parameters:
+        almacen (dict): El almacén de 'crea_almacen'.
+        df (pandas.DataFrame): Los registros, con 'Fecha', 'Hora', la medida y la columna 'por'.
+
+    Returns:
+        dict: El mismo almacén, actualizado.
+    '''
+    if len(df) == 0:
+        return almacen
+    fechas = pd.to_datetime(df['Fecha']).to_numpy().astype('datetime64[D]')
+    horas = extrae_hora_entera(df['Hora']).fillna(0).to_numpy(dtype=np.int64)
+    if almacen['medida'] is None:
+        valores = np.ones(len(df), dtype=np.int64)
+    else:
+        valores = pd.to_numeric(df[almacen['medida']], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+
+    # Se amplía el rango de días si los registros caen fuera de él
+    primero, ultimo = fechas.min(), fechas.max()
+    if almacen['inicio'] is not None:
+        primero = min(primero, almacen['inicio'])
+        ultimo = max(ultimo, almacen['inicio'] + almacen['dias'] - 1)
+    inicio, dias = primero, int((ultimo - primero).astype(np.int64)) + 1
+    if not almacen['diario']:
+        _agrega_serie(almacen, TOTAL)
+    if inicio != almacen['inicio'] or dias > almacen['capacidad']:
+        recalcular_desde = _reubica(almacen, inicio, dias)
+    else:
+        recalcular_desde = almacen['dias']
+    almacen['dias'] = dias
+
+    indice = (fechas - inicio).astype(np.int64)
+    desde = min(recalcular_desde, int(indice.min()))
+    largo = dias - desde
+    dia, hora = indice - desde, (indice - desde) * 24 + horas
+
+    # Se suma el total y luego todos los grupos a la vez, con un código por grupo
+    claves = [TOTAL]
+    por_dia = [np.bincount(dia, valores, minlength=largo)]
+    por_hora = [np.bincount(hora, valores, minlength=largo * 24)]
+    if almacen['por'] is not None:
+        codigos, grupos = pd.factorize(df[almacen['por']])
+        validos = codigos >= 0
+        codigos, valores_grupo = codigos[validos], valores[validos]
+        claves += list(grupos)
+        por_dia += list(np.bincount(codigos * largo + dia[validos], valores_grupo,
+                                    minlength=len(grupos) * largo).reshape(len(grupos), largo))
+        por_hora += list(np.bincount(codigos * largo * 24 + hora[validos], valores_grupo,
+                                     minlength=len(grupos) * largo * 24).reshape(len(grupos), largo * 24))
+
+    for posicion, clave in enumerate(claves):
+        if clave not in almacen['diario']:
+            _agrega_serie(almacen, clave)
+        almacen['diario'][clave][desde:dias] += por_dia[posicion].astype(np.int64)
+        almacen['horario'][clave][desde * 24:dias * 24] += por_hora[posicion].astype(np.int64)
+
+    # Las series que no recibieron registros también necesitan sumas para los días nuevos
+    for clave in almacen['diario']:
+        _recalcula_desde(almacen, clave, desde)
+    return almacen
+
+def construye_almacen(df, por='Comuna', medida='Cantidad víctimas', ventanas=VENTANAS):
+    '''
+    Crea un almacén de series temporales con los registros de un DataFrame.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame limpio de homicidios.
+        por (str, optional): La columna que define las series por grupo.
+        medida (str, optional): La columna entera que se suma. Con None se cuentan las filas.
+        ventanas (tuple): Las ventanas móviles, en días, que se mantienen.
+
+    Returns:
+        dict: El almacén.
+    '''
+    return agrega_registros(crea_almacen(por, medida, ventanas), df)
+
+def _posicion(almacen, fecha):
+    '''
+    Convierte una fecha en la posición de su día en las series del almacén.
+    '''
+    return int((np.datetime64(pd.Timestamp(fecha).date(), 'D') - almacen['inicio']).astype(np.int64))
+
+def suma_rango(almacen, desde, hasta, serie=TOTAL):
+    '''
+    Suma la medida entre dos fechas (inclusive) en O(1) con las sumas acumuladas.
+
+    Parameters:
+        almacen (dict): El almacén.
+        desde (str or datetime): La primera fecha.
+        hasta (str or datetime): La última fecha.
+        serie: El grupo (por ejemplo, una comuna) o 'TOTAL'.
+
+    Returns:
+        int: La suma de la medida en el rango.
+    '''
+    inicio = min(max(_posicion(almacen, desde), 0), almacen['dias'])
+    fin = min(max(_posicion(almacen, hasta) + 1, 0), almacen['dias'])
+    acumulado = almacen['acumulado'][serie]
+    return int(acumulado[fin] - acumulado[inicio]) if fin > inicio else 0
+
+def suma_rango_horas(almacen, desde, hasta, serie=TOTAL):
+    '''
+    Suma la medida entre dos momentos, por horas completas (inclusive), en O(1).
+
+    Parameters:
+        almacen (dict): El almacén.
+        desde (str or datetime): El primer momento (se toma su hora).
+        hasta (str or datetime): El último momento (se incluye toda su hora).
+        serie: El grupo o 'TOTAL'.
+
+    Returns:
+        int: La suma de la medida en el rango de horas.
+    '''
+    def hora(momento):
+        momento = pd.Timestamp(momento)
+        return _posicion(almacen, momento) * 24 + momento.hour
+
+    horas = almacen['dias'] * 24
+    inicio = min(max(hora(desde), 0), horas)
+    fin = min(max(hora(hasta) + 1, 0), horas)
+    acumulado = almacen['acumulado_horario'][serie]
+    return int(acumulado[fin] - acumulado[inicio]) if fin > inicio else 0
+
+def fechas(almacen):
+    '''
+    Devuelve las fechas de los días guardados en el almacén.
+
+    Returns:
+        pandas.DatetimeIndex: Un día por posición de las series.
+    '''
+    return pd.date_range(pd.Timestamp(almacen['inicio']), periods=almacen['dias'], freq='D', name='Fecha')
+
+def serie_diaria(almacen, serie=TOTAL):
+    '''
+    Devuelve la medida de cada día de una serie.
+
+    Returns:
+        pandas.Series: La medida, indexada por fecha.
+    '''
+    return pd.Series(almacen['diario'][serie][:almacen['dias']].copy(), index=fechas(almacen), name=serie)
+
+def ventana_movil(almacen, dias, serie=TOTAL):
+    '''
+    Devuelve la suma móvil de los últimos 'dias' días (incluido cada día) de una serie.
+
+    Las ventanas de 'VENTANAS' ya están calculadas; las demás se calculan en una pasada
+    con las sumas acumuladas.
+
+    Parameters:
+        almacen (dict): El almacén.
+        dias (int): El largo de la ventana, en días.
+        serie: El grupo o 'TOTAL'.
+
+    Returns:
+        pandas.Series: La suma móvil, indexada por la fecha en que termina cada ventana.
+    '''
+    if dias in almacen['moviles']:
+        valores = almacen['moviles'][dias][serie][:almacen['dias']].copy()
+    else:
+        acumulado = almacen['acumulado'][serie]
+        fin = np.arange(1, almacen['dias'] + 1)
+        valores = acumulado[fin] - acumulado[np.maximum(fin - dias, 0)]
+    return pd.Series(valores, index=fechas(almacen), name=f'{serie} {dias} días')
+
+def serie_mensual(almacen, serie=TOTAL):
+    '''
+    Suma la medida de cada mes a partir de las sumas acumuladas.
+
+    Parameters:
+        almacen (dict): El almacén.
+        serie: El grupo o 'TOTAL'.
+
+    Returns:
+        pandas.Series: La medida, indexada por 'Año' y 'Mes'.
+    '''
+    dias = fechas(almacen)
+    meses = pd.period_range(dias[0], dias[-1], freq='M')
+    # Posición del primer día de cada mes y del día siguiente al último guardado
+    limites = np.clip((meses.to_timestamp() - dias[0]).days.to_numpy(), 0, None)
+    limites = np.append(limites, almacen['dias'])
+    acumulado = almacen['acumulado'][serie]
+    indice = pd.MultiIndex.from_arrays([meses.year, meses.month], names=['Año', 'Mes'])
+    return pd.Series(np.diff(acumulado[limites]), index=indice, name=serie)
+
+def variacion_interanual(almacen, serie=TOTAL, frecuencia='mes'):
+    '''
+    Compara cada mes (o año) con el mismo mes del año anterior.
+
+    Parameters:
+        almacen (dict): El almacén.
+        serie: El grupo o 'TOTAL'.
+        frecuencia (str): 'mes' o 'año'.
+
+    Returns:
+        pandas.DataFrame: El valor actual, el del año anterior, la diferencia y la variación
+        porcentual (NaN si no hay año anterior o si fue cero).
+    '''
+    mensual = serie_mensual(almacen, serie)
+    if frecuencia == 'año':
+        actual = mensual.groupby(level='Año').sum()
+        anterior = actual.reindex(actual.index - 1).to_numpy()
+    elif frecuencia == 'mes':
+        actual = mensual
+        anterior = mensual.reindex(pd.MultiIndex.from_arrays([mensual.index.get_level_values('Año') - 1,
+                                                              mensual.index.get_level_values('Mes')])).to_numpy()
+    else:
+        raise ValueError("La frecuencia debe ser 'mes' o 'año'")
+
+    tabla = pd.DataFrame({'actual': actual.to_numpy(), 'año_anterior': anterior}, index=actual.index)
+    tabla['diferencia'] = tabla['actual'] - tabla['año_anterior']
+    tabla['variacion_%'] = (tabla['diferencia'] / tabla['año_anterior'].replace(0, np.nan) * 100).round(2)
+    return tabla
@@ -0,0 +1,331 @@
+## TASAS DE VÍCTIMAS CADA 100.000 HABITANTES POR AÑO CON LA POBLACIÓN INTERPOLADA
+# Importaciones
+import os
+
+import numpy as np
+import pandas as pd
+
+import serie_temporal
+
+RUTA_POBLACION = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'datos', 'poblacionCABA.csv')
+
+# Cantidad de habitantes a la que se refieren las tasas
+POR_HABITANTES = 100_000
+
+# Días de un año medio, para expresar los períodos en años de exposición
+DIAS_AÑO = 365.25
+
+# Años posteriores al último censo para los que se extrapola la población
+AÑOS_EXTRAPOLACION = 30
+
+# Columnas con cantidades en los resultados del EDA
+COLUMNAS_CONTEO = ['Cantidad víctimas', 'Cantidad accidentes', 'Cantidad de accidentes', 'count']
+
+# Resultados del EDA que no son conteos (distribuciones y estadísticos) y no tienen tasa
+CALCULOS_SIN_TASA = ['distribucion_edad', 'distribucion_edad_por_anio', 'accidentes_por_anio_y_sexo',
+                     'cohen_por_año', 'edad_y_rol_victimas', 'distribucion_edad_por_victima']
+
+# Poblaciones diarias ya calculadas: (censos, método) -> primer día y sumas acumuladas
+_DENOMINADORES = {}
+
+
+def carga_poblacion(ruta=RUTA_POBLACION):
+    '''
+    Carga la población de los censos.
+
+    Parameters:
+        ruta (str): La ruta del CSV con las columnas 'Año' y 'Población'.
+
+    Returns:
+        pandas.Series: La población, indexada por el año del censo.
+    '''
+    return pd.read_csv(ruta).set_index('Año')['Población'].sort_index()
+
+def interpola_poblacion(poblacion, fechas, metodo='geometrica'):
+    '''
+    Interpola la población de los censos a cualquier fecha.
+
+    Cada censo se toma como la población al 1 de julio de su año. Entre censos la población
+    crece a tasa constante ('geometrica') o en forma lineal ('lineal'); después del último
+    censo se extrapola con el crecimiento del último período intercensal.
+
+    Parameters:
+        poblacion (pandas.Series): La población de los censos, indexada por año.
+        fechas (array-like): Las fechas.
+        metodo (str): 'geometrica' o 'lineal'.
+
+    Returns:
+        numpy.ndarray: La población en cada fecha.
+    '''
+    fechas = pd.DatetimeIndex(np.atleast_1d(pd.to_datetime(fechas)))
+    años = (fechas.year + (fechas.dayofyear - 1) / np.where(fechas.is_leap_year, 366, 365)).to_numpy(dtype=float)
+    años_censo = poblacion.index.to_numpy(dtype=float) + 0.5
+    valores = poblacion.to_numpy(dtype=float)
+    if metodo == 'geometrica':
+        valores = np.log(valores)
+    elif metodo != 'lineal':
+        raise ValueError("El método debe ser 'geometrica' o 'lineal'")
+
+    resultado = np.interp(años, años_censo, valores)
+    # Después del último censo se continúa la pendiente del último período
+    pendiente = (valores[-1] - valores[-2]) / (años_censo[-1] - años_censo[-2])
+    posteriores = años > años_censo[-1]
+    resultado[posteriores] = valores[-1] + pendiente * (años[posteriores] - años_censo[-1])
+    return np.exp(resultado) if metodo == 'geometrica' else resultado
+
+def denominadores(poblacion=None, metodo='geometrica'):
+    '''
+    Devuelve la población de cada día, ya interpolada, como sumas acumuladas.
+
+    Se calcula una única vez por conjunto de censos y método, de modo que la población
+    media de cualquier período se obtiene en O(1) y las tasas cuestan lo mismo que los conteos.
+
+    Parameters:
+        poblacion (pandas.Series, optional): La población de los censos. Por defecto, la de CABA.
+        metodo (str): 'geometrica' o 'lineal'.
+
+    Returns:
+        dict: El primer día ('inicio'), la cantidad de días y las sumas acumuladas de la población diaria.
+    '''
+    if poblacion is None:
+        if RUTA_POBLACION not in _DENOMINADORES:
+            _DENOMINADORES[RUTA_POBLACION] = carga_poblacion()
+        poblacion = _DENOMINADORES[RUTA_POBLACION]
+
+    clave = (tuple(poblacion.index), tuple(poblacion.to_numpy()), metodo)
+    if clave not in _DENOMINADORES:
+        dias = pd.date_range(f'{poblacion.index.min()}-01-01', f'{poblacion.index.max() + AÑOS_EXTRAPOLACION}-12-31')
+        acumulado = np.concatenate([[0.0], np.cumsum(interpola_poblacion(poblacion, dias, metodo))])
+        _DENOMINADORES[clave] = {'inicio': dias[0].to_datetime64().astype('datetime64[D]'),
+                                 'dias': len(dias), 'acumulado': acumulado}
+    return _DENOMINADORES[clave]
+
+def poblacion_media(desde, hasta, poblacion=None, metodo='geometrica'):
+    '''
+    Calcula la población media entre dos fechas (inclusive), para una o varias fechas a la vez.
+
+    Parameters:
+        desde (fecha o array-like): El primer día de cada período.
+        hasta (fecha o array-like): El último día de cada período.
+        poblacion (pandas.Series, optional): La población de los censos. Por defecto, la de CABA.
+        metodo (str): 'geometrica' o 'lineal'.
+
+    Returns:
+        numpy.ndarray: La población media de cada período.
+    '''
+    tabla = denominadores(poblacion, metodo)
+    def posicion(fechas):
+        posiciones = (_a_dias(fechas) - tabla['inicio']).astype(np.int64)
+        if posiciones.min() < 0 or posiciones.max() >= tabla['dias']:
+            raise ValueError('Hay fechas fuera del rango de la población interpolada')
+        return posiciones
+
+    inicio, fin = posicion(desde), posicion(hasta) + 1
+    acumulado = tabla['acumulado']
+    return (acumulado[fin] - acumulado[inicio]) / (fin - inicio)
+
+def _a_dias(fechas):
+    '''
+    Convierte una o varias fechas a días (datetime64[D]).
+    '''
+    try:
+        return np.atleast_1d(np.asarray(fechas, dtype='datetime64[D]'))
+    except (TypeError, ValueError):
+        return pd.to_datetime(np.atleast_1d(fechas)).to_numpy().astype('datetime64[D]')
+
+def años_periodo(desde, hasta):
+    '''
+    Calcula la duración en años (de 365,25 días) de períodos entre dos fechas, inclusive.
+
+    Parameters:
+        desde (fecha o array-like): El primer día de cada período.
+        hasta (fecha o array-like): El último día de cada período.
+
+    Returns:
+        numpy.ndarray: Los años de cada período.
+    '''
+    return ((_a_dias(hasta) - _a_dias(desde)).astype(np.int64) + 1) / DIAS_AÑO
+
+def _denominador(desde, hasta, poblacion, metodo, anualizar):
+    '''
+    Devuelve la población media de cada período o, si se anualiza, las personas-año de exposición.
+    '''
+    media = poblacion_media(desde, hasta, poblacion, metodo)
+    return media * años_periodo(desde, hasta) if anualizar else media
+
+def tasa(conteos, desde, hasta, poblacion=None, metodo='geometrica', por=POR_HABITANTES, anualizar=True):
+    '''
+    Calcula la tasa cada 100.000 habitantes por año de uno o varios conteos.
+
+    Con 'anualizar' el denominador son las personas-año del período (la población media por
+    los años del período), de modo que la tasa es anual y se puede comparar entre períodos
+    de distinto largo; si no, es la población media del período y la tasa es la del período
+    completo. Se aplica con las reglas de broadcasting de NumPy: un período para todos los
+    conteos o uno por conteo.
+
+    Parameters:
+        conteos (number or array-like): Los conteos.
+        desde (fecha o array-like): El primer día del período.
+        hasta (fecha o array-like): El último día del período.
+        poblacion (pandas.Series, optional): La población de los censos. Por defecto, la de CABA.
+        metodo (str): 'geometrica' o 'lineal'.
+        por (int): La cantidad de habitantes a la que se refiere la tasa.
+        anualizar (bool): Si la tasa es por año (cada 100.000 personas-año) o por el período completo.
+
+    Returns:
+        numpy.ndarray: Las tasas.
+    '''
+    media = _denominador(desde, hasta, poblacion, metodo, anualizar)
+    if np.ndim(desde) == 0 and np.ndim(hasta) == 0:
+        media = media[0]
+    return np.asarray(conteos, dtype=float) / media * por
+
+def limites_periodo(indice):
+    '''
+    Obtiene el primer y el último día del período de cada elemento de un índice.
+
+    Un 'DatetimeIndex' es diario, un índice con los niveles 'Año' y 'Mes' es mensual y
+    uno con el nivel 'Año' es anual. Los demás niveles (por ejemplo 'Sexo') se ignoran.
+
+    Parameters:
+        indice (pandas.Index): El índice del agregado.
+
+    Returns:
+        tuple: Los arreglos de primeros y últimos días, o None si el índice no tiene tiempo.
+    '''
+    if isinstance(indice, pd.DatetimeIndex):
+        dias = indice.normalize()
+        return dias, dias
+    niveles = [nombre for nombre in indice.names if nombre is not None]
+    if 'Año' not in niveles:
+        return None
+    años = np.asarray(indice.get_level_values('Año'), dtype=np.int64)
+    if 'Mes' in niveles:
+        meses = np.asarray(indice.get_level_values('Mes'), dtype=np.int64)
+        desde = pd.to_datetime(pd.DataFrame({'year': años, 'month': meses, 'day': 1}))
+        return desde, desde + pd.offsets.MonthEnd(0)
+    return (pd.to_datetime(pd.DataFrame({'year': años, 'month': 1, 'day': 1})),
+            pd.to_datetime(pd.DataFrame({'year': años, 'month': 12, 'day': 31})))
+
+def tasas_por_periodo(conteos, desde=None, hasta=None, poblacion=None, metodo='geometrica', por=POR_HABITANTES,
+                      anualizar=True):
+    '''
+    Convierte un agregado de conteos en tasas cada 100.000 habitantes por año.
+
+    Si el índice tiene tiempo (ver 'limites_periodo'), cada fila se divide por el denominador
+    de su período. Si no (por ejemplo, conteos por 'Sexo' o 'Comuna' de todo el período,
+    como los de 'cubo_olap.consulta'), todas se dividen por el del período entre 'desde' y
+    'hasta'. El denominador son las personas-año del período (ver 'tasa').
+
+    Parameters:
+        conteos (pandas.Series or pandas.DataFrame): El agregado (todas sus columnas son conteos).
+        desde (fecha, optional): El primer día, para los agregados sin tiempo.
+        hasta (fecha, optional): El último día, para los agregados sin tiempo.
+        poblacion (pandas.Series, optional): La población de los censos. Por defecto, la de CABA.
+        metodo (str): 'geometrica' o 'lineal'.
+        por (int): La cantidad de habitantes a la que se refiere la tasa.
+        anualizar (bool): Si la tasa es por año (cada 100.000 personas-año) o por el período completo.
+
+    Returns:
+        pandas.Series or pandas.DataFrame: Las tasas, con el mismo índice.
+    '''
+    limites = limites_periodo(conteos.index)
+    if limites is None:
+        if desde is None or hasta is None:
+            raise ValueError("El agregado no tiene 'Año' ni fechas: se deben indicar 'desde' y 'hasta'")
+        media = _denominador(desde, hasta, poblacion, metodo, anualizar)[0]
+    else:
+        media = _denominador(limites[0], limites[1], poblacion, metodo, anualizar)
+        if conteos.ndim == 2:
+            media = media[:, np.newaxis]
+    return conteos.astype(float) / media * por
+
+def periodo_datos(df):
+    '''
+    Devuelve el primer y el último día con datos.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame con la columna 'Fecha'.
+
+    Returns:
+        tuple: Las fechas mínima y máxima.
+    '''
+    fechas = pd.to_datetime(df['Fecha'])
+    return fechas.min(), fechas.max()
+
+def _tasas_tabla(tabla, desde, hasta, poblacion, metodo, por, anualizar):
+    '''
+    Reemplaza las columnas de conteo de una tabla del EDA por sus tasas.
+    '''
+    columnas = [c for c in tabla.columns if c in COLUMNAS_CONTEO]
+    if not columnas:
+        # Tablas cruzadas (por ejemplo, 'Rol' por 'Sexo'): todas las columnas son conteos
+        columnas = list(tabla.select_dtypes('number').columns)
+    tabla = tabla.copy()
+    tabla[columnas] = tasas_por_periodo(tabla[columnas], desde, hasta, poblacion, metodo, por, anualizar)
+    return tabla
+
+def tasas_resultado(resultado, desde, hasta, poblacion=None, metodo='geometrica', por=POR_HABITANTES,
+                    anualizar=True):
+    '''
+    Convierte los conteos de un resultado del EDA ('calculos_eda') en tasas cada 100.000 habitantes por año.
+
+    Los conteos acumulados de varios años (por mes, día de la semana, hora, rol, etc.) se
+    dividen por las personas-año de todo el período (la población media por los años entre
+    'desde' y 'hasta'), de modo que son tasas anuales comparables entre conjuntos de datos
+    que abarcan distinta cantidad de años; los de 'accidentes_mensuales', por las de cada
+    mes de cada año. Con 'anualizar=False' se dividen sólo por la población media, y la tasa
+    es la acumulada en todo el período.
+
+    Parameters:
+        resultado (ResultadoEDA): El resultado, por ejemplo de 'cache_resultados.calcula'.
+        desde (fecha): El primer día de los datos (ver 'periodo_datos').
+        hasta (fecha): El último día de los datos.
+        poblacion (pandas.Series, optional): La población de los censos. Por defecto, la de CABA.
+        metodo (str): 'geometrica' o 'lineal'.
+        por (int): La cantidad de habitantes a la que se refiere la tasa.
+        anualizar (bool): Si la tasa es por año (cada 100.000 personas-año) o por el período completo.
+
+    Returns:
+        pandas.DataFrame or dict: Las tablas del resultado con las tasas en lugar de los conteos.
+    '''
+    if resultado.nombre in CALCULOS_SIN_TASA:
+        raise ValueError(f"'{resultado.nombre}' no es un conteo y no tiene tasa")
+
+    if resultado.nombre == 'accidentes_mensuales':
+        return {año: tasas_por_periodo(tabla.set_index(pd.MultiIndex.from_arrays(
+                    [np.full(len(tabla), año), tabla.index], names=['Año', 'Mes'])), poblacion=poblacion,
+                    metodo=metodo, por=por, anualizar=anualizar).droplevel('Año')
+                for año, tabla in resultado.datos.items()}
+    if isinstance(resultado.datos, dict):
+        return {clave: _tasas_tabla(tabla, desde, hasta, poblacion, metodo, por, anualizar)
+                for clave, tabla in resultado.datos.items()}
+    return _tasas_tabla(resultado.datos, desde, hasta, poblacion, metodo, por, anualizar)
+
+def tasas_serie(almacen, serie='Total', dias=None, poblacion=None, metodo='geometrica', por=POR_HABITANTES,
+                anualizar=True):
+    '''
+    Calcula las tasas diarias o de una ventana móvil de un almacén de 'serie_temporal'.
+
+    Con 'anualizar' las tasas de cada día o ventana se expresan por año (cada 100.000
+    personas-año), por lo que ventanas de distinto largo son comparables.
+
+    Parameters:
+        almacen (dict): El almacén de 'serie_temporal.construye_almacen'.
+        serie: El grupo o 'Total'.
+        dias (int, optional): El largo de la ventana móvil. Por defecto, la tasa de cada día.
+        poblacion (pandas.Series, optional): La población de los censos. Por defecto, la de CABA.
+        metodo (str): 'geometrica' o 'lineal'.
+        por (int): La cantidad de habitantes a la que se refiere la tasa.
+        anualizar (bool): Si la tasa es por año (cada 100.000 personas-año) o por el período completo.
+
+    Returns:
+        pandas.Series: Las tasas, indexadas por el último día de cada período.
+    '''
+    if dias is None:
+        conteos = serie_temporal.serie_diaria(almacen, serie)
+        return tasas_por_periodo(conteos, poblacion=poblacion, metodo=metodo, por=por, anualizar=anualizar)
+    conteos = serie_temporal.ventana_movil(almacen, dias, serie)
+    # La ventana que termina en cada día empieza 'dias' - 1 días antes, sin pasar del primer día
+    desde = np.maximum(conteos.index - pd.Timedelta(days=dias - 1), conteos.index[0])
+    return conteos.astype(float) / _denominador(desde, conteos.index, poblacion, metodo, anualizar) * por
@@ -4,7 +4,12 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import matplotlib.pyplot as plt
-import seaborn as sns
+
+from perfilado import perfil_parcial, resumen_perfil
+import cache_resultados
+import calculos_eda
+import graficos_eda
+from calculos_eda import extrae_hora_entera, categoriza_momento_dia, categoriza_tipo_dia, cohen
 
 
 def verifica_duplicados_por_columna(df, columna):
@@ -48,12 +53,8 @@ def verificar_tipo_variable(df):
         - 'tipo_datos': Tipos de datos únicos presentes en cada columna.
     '''
 
-    mi_dict = {"nombre_campo": [], "tipo_datos": []}
-
-    for columna in df.columns:
-        mi_dict["nombre_campo"].append(columna)
-        mi_dict["tipo_datos"].append(df[columna].apply(type).unique())
-    df_info = pd.DataFrame(mi_dict)
+    # Se calcula el perfil de todas las columnas en una sola pasada
+    df_info = resumen_perfil(perfil_parcial(df))[["nombre_campo", "tipo_datos"]]
         
     return df_info
 
@@ -80,6 +81,35 @@ def convertir_a_time(x):
         return x.time()
     return x
 
+def convertir_columna_a_time(serie):
+    '''
+    Convierte una columna completa a objetos de tiempo (time) de Python de forma vectorizada.
+
+    Es equivalente a aplicar 'convertir_a_time' fila por fila. Se obtiene el tipo de Python de
+    cada valor una sola vez: los valores que no son textos ni datetime se devuelven sin cambios,
+    como en la función original, y los textos y datetime se factorizan para aplicar
+    'convertir_a_time' sólo a los valores distintos (las horas "%H:%M:%S" válidas son a lo sumo
+    86.400), repartiendo luego el resultado a las filas con los códigos.
+
+    Parameters:
+        serie (pandas.Series): La columna con valores de tipo str, datetime o time.
+
+    Returns:
+        pandas.Series: Una serie de tipo object con objetos de tiempo (time) o None.
+    '''
+    valores = serie.to_numpy(dtype=object, copy=True)
+    codigos_tipo, tipos = pd.factorize(np.fromiter(map(type, valores), dtype=object, count=len(valores)))
+
+    for codigo, tipo in enumerate(tipos):
+        if not issubclass(tipo, (str, datetime)):
+            continue
+        # Se convierte cada valor distinto de este tipo una única vez
+        posiciones = np.flatnonzero(codigos_tipo == codigo)
+        codigos, unicos = pd.factorize(pd.Series(valores[posiciones], dtype=object))
+        convertidos = np.array([convertir_a_time(x) for x in np.asarray(unicos, dtype=object)] + [None], dtype=object)
+        valores[posiciones] = convertidos[codigos]
+    return pd.Series(valores, index=serie.index, dtype=object)
+
 def imputa_valor_frecuente(df, columna):
     '''
     Imputa los valores faltantes en una columna de un DataFrame con el valor más frecuente.
@@ -124,12 +154,14 @@ def imputa_edad_media_segun_sexo(df):
     # Se reemplaza "SD" con NaN en la columna 'edad'
     df['Edad'] = df['Edad'].replace('SD', pd.NA)
 
+    df['Edad'] = pd.to_numeric(df['Edad'])
+
     # Se calcula el promedio de edad para cada grupo de género
     promedio_por_genero = df.groupby('Sexo')['Edad'].mean()
     print(f'La edad promedio de Femenino es {round(promedio_por_genero["FEMENINO"])} y de Masculino es {round(promedio_por_genero["MASCULINO"])}')
 
     # Se llenan los valores NaN en la columna 'edad' utilizando el promedio correspondiente al género
-    df['Edad'] = df.apply(lambda row: promedio_por_genero[row['Sexo']] if pd.isna(row['Edad']) else row['Edad'], axis=1)
+    df['Edad'] = df['Edad'].fillna(df.groupby('Sexo')['Edad'].transform('mean'))
     # Lo convierte a entero
     df['Edad'] = df['Edad'].astype(int)
     
@@ -153,17 +185,8 @@ def verificar_tipo_datos_y_nulos(df):
         - 'nulos': Cantidad de valores nulos en cada columna.
     '''
 
-    mi_dict = {"nombre_campo": [], "tipo_datos": [], "no_nulos_%": [], "nulos_%": [], "nulos": []}
-
-    for columna in df.columns:
-        porcentaje_no_nulos = (df[columna].count() / len(df)) * 100
-        mi_dict["nombre_campo"].append(columna)
-        mi_dict["tipo_datos"].append(df[columna].apply(type).unique())
-        mi_dict["no_nulos_%"].append(round(porcentaje_no_nulos, 2))
-        mi_dict["nulos_%"].append(round(100-porcentaje_no_nulos, 2))
-        mi_dict["nulos"].append(df[columna].isnull().sum())
-
-    df_info = pd.DataFrame(mi_dict)
+    # Se calcula el perfil de todas las columnas en una sola pasada
+    df_info = resumen_perfil(perfil_parcial(df))[["nombre_campo", "tipo_datos", "no_nulos_%", "nulos_%", "nulos"]]
         
     return df_info
 
@@ -181,34 +204,11 @@ def accidentes_mensuales(df):
     Returns:
         None
     '''
-    # Se obtiene una lista de años únicos
-    años = df['Año'].unique()
-
-    # Se define el número de filas y columnas para la cuadrícula de subgráficos
-    n_filas = 3
-    n_columnas = 2
+    # Se calcula la cantidad de víctimas por mes de cada año y se grafica
+    resultado = cache_resultados.calcula('accidentes_mensuales', df)
+    graficos_eda.dibuja_accidentes_mensuales(resultado)
 
-    # Se crea una figura con subgráficos en una cuadrícula de 2x3
-    fig, axes = plt.subplots(n_filas, n_columnas, figsize=(14, 8))
-
-    # Se itera a través de los años y crea un gráfico por año
-    for i, year in enumerate(años):
-        fila = i // n_columnas
-        columna = i % n_columnas
-        
-        # Se filtran los datos para el año actual y agrupa por mes
-        data_mensual = (df[df['Año'] == year]
-                        .groupby('Mes')
-                        .agg({'Cantidad víctimas':'sum'}))
-        
-        # Se configura el subgráfico actual
-        ax = axes[fila, columna]
-        data_mensual.plot(ax=ax, kind='line')
-        ax.set_title('Año ' + str(year)) ; ax.set_xlabel('Mes') ; ax.set_ylabel('Cantidad de Víctimas')
-        ax.legend_ = None
-        
-    # Se muestra y acomoda el gráfico
-    plt.tight_layout()
+    # Se muestra el gráfico
     plt.show()
 
 def cantidad_victimas_mensuales(df):
@@ -225,18 +225,13 @@ def cantidad_victimas_mensuales(df):
     Returns:
         None
     '''
-    # Se agrupa por la cantidad de víctimas por mes
-    data = df.groupby('Mes').agg({'Cantidad víctimas':'sum'}).reset_index()
-    
-    # Se grafica
-    plt.figure(figsize=(6,4))
-    ax = sns.barplot(x='Mes', y='Cantidad víctimas', data=data)
-    ax.set_title('Cantidad de víctimas por Mes')
-    ax.set_xlabel('Mes') ; ax.set_ylabel('Cantidad de Accidentes')
+    # Se agrupa por la cantidad de víctimas por mes y se grafica
+    resultado = cache_resultados.calcula('victimas_mensuales', df)
+    graficos_eda.dibuja_victimas_mensuales(resultado)
     
     # Se imprime resumen
-    print(f'El mes con menor cantidad de víctimas tiene {data.min()[1]} víctimas')
-    print(f'El mes con mayor cantidad de víctimas tiene {data.max()[1]} víctimas')
+    print(f'El mes con menor cantidad de víctimas tiene {resultado.resumen["minimo"]} víctimas')
+    print(f'El mes con mayor cantidad de víctimas tiene {resultado.resumen["maximo"]} víctimas')
     
     # Se muestra el gráfico
     plt.show()
@@ -263,23 +258,16 @@ def cantidad_victimas_por_dia_semana(df):
     df['Día semana'] = df['Fecha'].dt.dayofweek
     
     # Se mapea el número del día de la semana a su nombre
-    dias_semana = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
-    df['Nombre día'] = df['Día semana'].map(lambda x: dias_semana[x])
+    df['Nombre día'] = np.array(calculos_eda.DIAS_SEMANA, dtype=object)[df['Día semana'].to_numpy()]
     
-    # Se cuenta la cantidad de accidentes por día de la semana
-    data = df.groupby('Nombre día').agg({'Cantidad víctimas':'sum'}).reset_index()
-      
-    # Se crea el gráfico de barras
-    plt.figure(figsize=(6, 3))
-    ax = sns.barplot(x='Nombre día', y='Cantidad víctimas', data=data, order=dias_semana)
-    
-    ax.set_title('Cantidad de Accidentes por Día de la Semana') ; ax.set_xlabel('Día de la Semana') ; ax.set_ylabel('Cantidad de Accidentes')
-    plt.xticks(rotation=45)
+    # Se cuenta la cantidad de accidentes por día de la semana y se grafica
+    resultado = cache_resultados.calcula('victimas_por_dia_semana', df)
+    graficos_eda.dibuja_victimas_por_dia_semana(resultado)
     
     # Se muestran datos resumen
-    print(f'El día de la semana con menor cantidad de víctimas tiene {data.min()[1]} víctimas')
-    print(f'El día de la semana con mayor cantidad de víctimas tiene {data.max()[1]} víctimas')
-    print(f'La diferencia porcentual es de {round((data.max()[1] - data.min()[1]) / data.min()[1] * 100,2)}')
+    print(f'El día de la semana con menor cantidad de víctimas tiene {resultado.resumen["minimo"]} víctimas')
+    print(f'El día de la semana con mayor cantidad de víctimas tiene {resultado.resumen["maximo"]} víctimas')
+    print(f'La diferencia porcentual es de {resultado.resumen["diferencia_%"]}')
     
     # Se muestra el gráfico
     plt.show()
@@ -310,7 +298,7 @@ def cantidad_accidentes_por_categoria_tiempo(df):
     Calcula la cantidad de accidentes por categoría de tiempo y muestra un gráfico de barras.
 
     Esta función toma un DataFrame que contiene una columna 'Hora' y utiliza la función
-    'crea_categoria_momento_dia' para crear la columna 'Categoria tiempo'. Luego, cuenta
+    'categoriza_momento_dia' para crear la columna 'Categoria tiempo'. Luego, cuenta
     la cantidad de accidentes por cada categoría de tiempo, calcula los porcentajes y
     genera un gráfico de barras que muestra la distribución de accidentes por categoría de tiempo.
 
@@ -320,26 +308,12 @@ def cantidad_accidentes_por_categoria_tiempo(df):
     Returns:
         None
     '''
-    # Se aplica la función crea_categoria_momento_dia para crear la columna 'categoria_tiempo'
-    df['Categoria tiempo'] = df['Hora'].apply(crea_categoria_momento_dia)
-
-    # Se cuenta la cantidad de accidentes por categoría de tiempo
-    data = df['Categoria tiempo'].value_counts().reset_index()
-    data.columns = ['Categoria tiempo', 'Cantidad accidentes']
+    # Se aplica la función categoriza_momento_dia para crear la columna 'categoria_tiempo'
+    df['Categoria tiempo'] = categoriza_momento_dia(extrae_hora_entera(df['Hora']))
 
-    # Se calculan los porcentajes
-    total_accidentes = data['Cantidad accidentes'].sum()
-    data['Porcentaje'] = (data['Cantidad accidentes'] / total_accidentes) * 100
-    
-    # Se crea el gráfico de barras
-    plt.figure(figsize=(6, 4))
-    ax = sns.barplot(x='Categoria tiempo', y='Cantidad accidentes', data=data)
-
-    ax.set_title('Cantidad de Accidentes por Categoría de Tiempo') ; ax.set_xlabel('Categoría de Tiempo') ; ax.set_ylabel('Cantidad de Accidentes')
-
-    # Se agrega las cantidades en las barras
-    for index, row in data.iterrows():
-        ax.annotate(f'{row["Cantidad accidentes"]}', (index, row["Cantidad accidentes"]), ha='center', va='bottom')
+    # Se cuentan los accidentes y sus porcentajes por categoría de tiempo y se grafica
+    resultado = cache_resultados.calcula('accidentes_por_categoria_tiempo', df)
+    graficos_eda.dibuja_accidentes_por_categoria_tiempo(resultado)
 
     # Se muestra el gráfico
     plt.show()
@@ -355,24 +329,11 @@ def cantidad_accidentes_por_horas_del_dia(df):
         Un gráfico de barras.
     '''
     # Se extrae la hora del día de la columna 'hora'
-    df['Hora del día'] = df['Hora'].apply(lambda x: x.hour)
-
-    # Se cuenta la cantidad de accidentes por hora del día
-    data = df['Hora del día'].value_counts().reset_index()
-    data.columns = ['Hora del día', 'Cantidad de accidentes']
-
-    # Se ordena los datos por hora del día
-    data = data.sort_values(by='Hora del día')
+    df['Hora del día'] = extrae_hora_entera(df['Hora'])
 
-    # Se crea el gráfico de barras
-    plt.figure(figsize=(12, 4))
-    ax = sns.barplot(x='Hora del día', y='Cantidad de accidentes', data=data)
-
-    ax.set_title('Cantidad de Accidentes por Hora del Día') ; ax.set_xlabel('Hora del día') ; ax.set_ylabel('Cantidad de accidentes')
-
-    # Se agrega las cantidades en las barras
-    for index, row in data.iterrows():
-        ax.annotate(f'{row["Cantidad de accidentes"]}', (row["Hora del día"], row["Cantidad de accidentes"]), ha='center', va='bottom')
+    # Se cuenta la cantidad de accidentes por hora del día y se grafica
+    resultado = cache_resultados.calcula('accidentes_por_horas_del_dia', df)
+    graficos_eda.dibuja_accidentes_por_horas_del_dia(resultado)
 
     # Se muestra el gráfico
     plt.show()
@@ -394,21 +355,11 @@ def cantidad_accidentes_semana_fin_de_semana(df):
     df['Dia semana'] = df['Fecha'].dt.dayofweek
     
     # Se crea una columna 'tipo_dia' para diferenciar entre semana y fin de semana
-    df['Tipo de día'] = df['Dia semana'].apply(lambda x: 'Fin de Semana' if x >= 5 else 'Semana')
-    
-    # Se cuenta la cantidad de accidentes por tipo de día
-    data = df['Tipo de día'].value_counts().reset_index()
-    data.columns = ['Tipo de día', 'Cantidad de accidentes']
+    df['Tipo de día'] = categoriza_tipo_dia(df['Dia semana'])
     
-    # Se crea el gráfico de barras
-    plt.figure(figsize=(6, 4))
-    ax = sns.barplot(x='Tipo de día', y='Cantidad de accidentes', data=data)
-    
-    ax.set_title('Cantidad de accidentes por tipo de día') ; ax.set_xlabel('Tipo de día') ; ax.set_ylabel('Cantidad de accidentes')
-    
-    # Se agrega las cantidades en las barras
-    for index, row in data.iterrows():
-        ax.annotate(f'{row["Cantidad de accidentes"]}', (index, row["Cantidad de accidentes"]), ha='center', va='bottom')
+    # Se cuenta la cantidad de accidentes por tipo de día y se grafica
+    resultado = cache_resultados.calcula('accidentes_semana_fin_de_semana', df)
+    graficos_eda.dibuja_accidentes_semana_fin_de_semana(resultado)
     
     # Se muestra el gráfico
     plt.show()
@@ -423,21 +374,13 @@ def distribucion_edad(df):
     Returns:
         Un gráfico con un histograma y un boxplot.
     '''
-    # Se crea una figura con un solo eje x compartido
-    fig, ax = plt.subplots(2, 1, figsize=(12, 6), sharex=True)
-    
-    # Se grafica el histograma de la edad
-    sns.histplot(df['Edad'], kde=True, ax=ax[0])
-    ax[0].set_title('Histograma de Edad') ; ax[0].set_ylabel('Frecuencia')
-    
-    # Se grafica el boxplot de la edad
-    sns.boxplot(x=df['Edad'], ax=ax[1])
-    ax[1].set_title('Boxplot de Edad') ; ax[1].set_xlabel('Edad')
+    # Se grafica el histograma y el boxplot de la edad
+    graficos_eda.dibuja_distribucion_edad(cache_resultados.calcula('distribucion_edad', df))
     
-    # Se ajusta y muestra el gráfico
-    plt.tight_layout()
+    # Se muestra el gráfico
     plt.show()
     
+
 def distribucion_edad_por_anio(df):
     '''
     Genera un gráfico de boxplot que muestra la distribución de la edad de las víctimas de accidentes por año.
@@ -449,10 +392,7 @@ def distribucion_edad_por_anio(df):
         Un gráfico de boxplot.
     '''
     # Se crea el gráfico de boxplot
-    plt.figure(figsize=(12, 6))
-    sns.boxplot(x='Año', y='Edad', data=df)
-    
-    plt.title('Boxplot de Edades de Víctimas por Año') ; plt.xlabel('Año') ; plt.ylabel('Edad de las Víctimas')
+    graficos_eda.dibuja_distribucion_edad_por_anio(cache_resultados.calcula('distribucion_edad_por_anio', df))
      
     # Se muestra el gráfico
     plt.show()
@@ -468,32 +408,11 @@ def cantidades_accidentes_por_anio_y_sexo(df):
         Un gráfico de barras.
     '''
     # Se crea el gráfico de barras
-    plt.figure(figsize=(12, 4))
-    sns.barplot(x='Año', y='Edad', hue='Sexo', data=df,)
-    
-    plt.title('Cantidad de Accidentes por Año y Sexo')
-    plt.xlabel('Año') ; plt.ylabel('Edad de las víctimas') ; plt.legend(title='Sexo')
+    graficos_eda.dibuja_accidentes_por_anio_y_sexo(cache_resultados.calcula('accidentes_por_anio_y_sexo', df))
     
     # Se muestra el gráfico
     plt.show()
     
-def cohen(group1, group2):
-    '''
-    Calcula el tamaño del efecto de Cohen d para dos grupos.
-
-    Parameters:
-        grupo1: El primer grupo.
-        grupo2: El segundo grupo.
-
-    Returns:
-        El tamaño del efecto de Cohen d.
-    '''
-    diff = group1.mean() - group2.mean()
-    var1, var2 = group1.var(), group2.var()
-    n1, n2 = len(group1), len(group2)
-    pooled_var = (n1 * var1 + n2 * var2) / (n1 + n2)
-    d = diff / np.sqrt(pooled_var)
-    return d
 
 def cohen_por_año(df):
     '''
@@ -505,28 +424,9 @@ def cohen_por_año(df):
     Returns:
         El tamaño del efecto de Cohen d.
     '''
-    # Se obtienen los años del conjunto de datos
-    años_unicos = df['Año'].unique()
-    # Se crea una lista vacía para guardar los valores de Cohen
-    cohen_lista = []
-    # Se itera por los años y se guarda Cohen para cada grupo
-    for a in años_unicos:
-        grupo1 = df[((df['Sexo'] == 'MASCULINO') & (df['Año'] == a))]['Edad']
-        grupo2 = df[((df['Sexo'] == 'FEMENINO')& (df['Año'] == a))]['Edad']
-        d = cohen(grupo1, grupo2)
-        cohen_lista.append(d)
-
-    # Se crea un Dataframe
-    cohen_df = pd.DataFrame()
-    cohen_df['Año'] = años_unicos
-    cohen_df['Estadistico de Cohen'] = cohen_lista
-    cohen_df
-    
-    # Se grafica los valores de Cohen para los años
-    plt.figure(figsize=(8, 4))
-    plt.bar(cohen_df['Año'], cohen_df['Estadistico de Cohen'], color='skyblue')
-    plt.xlabel('Año') ; plt.ylabel('Estadístico de Cohen') ; plt.title('Estadístico de Cohen por Año')
-    plt.xticks(años_unicos)
+    # Se calcula Cohen para cada año y se grafica
+    resultado = cache_resultados.calcula('cohen_por_año', df)
+    graficos_eda.dibuja_cohen_por_año(resultado)
     plt.show()
 
 def edad_y_rol_victimas(df):
@@ -539,11 +439,10 @@ def edad_y_rol_victimas(df):
     Returns:
         None
     '''
-    plt.figure(figsize=(8, 4))
-    sns.boxplot(y='Rol', x='Edad',data=df)
-    plt.title('Edades por Condición')
+    graficos_eda.dibuja_edad_y_rol_victimas(cache_resultados.calcula('edad_y_rol_victimas', df))
     plt.show()
     
+
 def distribucion_edad_por_victima(df):
     '''
     Genera un gráfico de la distribución de la edad de las víctimas por tipo de vehículo.
@@ -555,13 +454,11 @@ def distribucion_edad_por_victima(df):
         None
     '''
     # Se crea el gráfico de boxplot
-    plt.figure(figsize=(14, 6))
-    sns.boxplot(x='Víctima', y='Edad', data=df)
-    
-    plt.title('Boxplot de Edades de Víctimas por tipo de vehículo que usaba') ; plt.xlabel('Tipo de vehiculo') ; plt.ylabel('Edad de las Víctimas')
+    graficos_eda.dibuja_distribucion_edad_por_victima(cache_resultados.calcula('distribucion_edad_por_victima', df))
      
     plt.show()
     
+
 def cantidad_accidentes_sexo(df):
     '''
     Genera un resumen de la cantidad de accidentes por sexo de los conductores.
@@ -584,21 +481,11 @@ def cantidad_accidentes_sexo(df):
     df['Dia semana'] = df['Fecha'].dt.dayofweek
     
     # Se crea una columna 'tipo_dia' para diferenciar entre semana y fin de semana
-    df['Tipo de día'] = df['Dia semana'].apply(lambda x: 'Fin de Semana' if x >= 5 else 'Semana')
-    
-    # Se cuenta la cantidad de accidentes por tipo de día
-    data = df['Tipo de día'].value_counts().reset_index()
-    data.columns = ['Tipo de día', 'Cantidad de accidentes']
-    
-    # Se crea el gráfico de barras
-    plt.figure(figsize=(6, 4))
-    ax = sns.barplot(x='Tipo de día', y='Cantidad de accidentes', data=data)
+    df['Tipo de día'] = categoriza_tipo_dia(df['Dia semana'])
     
-    ax.set_title('Cantidad de accidentes por tipo de día') ; ax.set_xlabel('Tipo de día') ; ax.set_ylabel('Cantidad de accidentes')
-    
-    # Se agrega las cantidades en las barras
-    for index, row in data.iterrows():
-        ax.annotate(f'{row["Cantidad de accidentes"]}', (index, row["Cantidad de accidentes"]), ha='center', va='bottom')
+    # Se cuenta la cantidad de accidentes por tipo de día y se grafica
+    resultado = cache_resultados.calcula('accidentes_semana_fin_de_semana', df)
+    graficos_eda.dibuja_accidentes_semana_fin_de_semana(resultado)
     
     # Se muestra el gráfico
     plt.show()
@@ -618,28 +505,9 @@ def cantidad_victimas_sexo_rol_victima(df):
     Returns:
         None
     '''
-    # Se crea el gráfico
-    fig, axes = plt.subplots(1, 3, figsize=(15, 4))
-
-    # Gráfico 1: Sexo
-    sns.countplot(data=df, x='Sexo', ax=axes[0])
-    axes[0].set_title('Cantidad de víctimas por sexo') ; axes[0].set_ylabel('Cantidad de víctimas')
-
-    # Se define una paleta de colores personalizada (invierte los colores)
-    colores_por_defecto = sns.color_palette()
-    colores_invertidos = [colores_por_defecto[1], colores_por_defecto[0]]
-    
-    # Gráfico 2: Rol
-    df_rol = df.groupby(['Rol', 'Sexo']).size().unstack(fill_value=0)
-    df_rol.plot(kind='bar', stacked=True, ax=axes[1], color=colores_invertidos)
-    axes[1].set_title('Cantidad de víctimas por rol') ; axes[1].set_ylabel('Cantidad de víctimas') ; axes[1].tick_params(axis='x', rotation=45)
-    axes[1].legend().set_visible(False)
-    
-    # Gráfico 3: Tipo de vehículo
-    df_victima = df.groupby(['Víctima', 'Sexo']).size().unstack(fill_value=0)
-    df_victima.plot(kind='bar', stacked=True, ax=axes[2], color=colores_invertidos)
-    axes[2].set_title('Cantidad de víctimas por tipo de vehículo') ; axes[2].set_ylabel('Cantidad de víctimas') ; axes[2].tick_params(axis='x', rotation=45)
-    axes[2].legend().set_visible(False)
+    # Se calculan las cantidades por sexo, rol y tipo de vehículo y se grafican
+    resultado = cache_resultados.calcula('victimas_sexo_rol_victima', df)
+    graficos_eda.dibuja_victimas_sexo_rol_victima(resultado)
 
     # Se muestran los gráficos
     plt.show()
@@ -716,19 +584,9 @@ def cantidad_victimas_participantes(df):
     Returns:
         None
     '''
-    # Se ordenan los datos por 'Participantes' en orden descendente por cantidad
-    ordenado = df['Participantes'].value_counts().reset_index()
-    ordenado = ordenado.rename(columns={'Cantidad': 'participantes'})
-    ordenado = ordenado.sort_values(by='count', ascending=False)
-    
-    plt.figure(figsize=(15, 4))
-    
-    # Se crea el gráfico de barras
-    ax = sns.barplot(data=ordenado, x='Participantes', y='count', order=ordenado['Participantes'])
-    ax.set_title('Cantidad de víctimas por participantes')
-    ax.set_ylabel('Cantidad de víctimas')
-    # Rotar las etiquetas del eje x a 45 grados
-    ax.set_xticklabels(ax.get_xticklabels(), rotation=45, horizontalalignment='right')
+    # Se ordenan los datos por 'Participantes' en orden descendente por cantidad y se grafica
+    resultado = cache_resultados.calcula('victimas_participantes', df)
+    graficos_eda.dibuja_victimas_participantes(resultado)
 
     # Se muestra el gráfico
     plt.show()
@@ -763,17 +621,9 @@ def cantidad_acusados(df):
     Returns:
         None
     '''
-    # Se ordenan los datos por 'Participantes' en orden descendente por cantidad
-    ordenado = df['Acusado'].value_counts().reset_index()
-    ordenado = ordenado.rename(columns={'Cantidad': 'Acusado'})
-    ordenado = ordenado.sort_values(by='count', ascending=False)
-    
-    plt.figure(figsize=(15, 4))
-    
-    # Crear el gráfico de barras
-    ax = sns.barplot(data=ordenado, x='Acusado', y='count', order=ordenado['Acusado'])
-    ax.set_title('Cantidad de acusados en los hechos') ; ax.set_ylabel('Cantidad de acusados') 
-    ax.set_xticklabels(ax.get_xticklabels(), rotation=45, horizontalalignment='right')
+    # Se ordenan los datos por 'Acusado' en orden descendente por cantidad y se grafica
+    resultado = cache_resultados.calcula('acusados', df)
+    graficos_eda.dibuja_acusados(resultado)
 
     # Se muestra el gráfico
     plt.show()
@@ -809,14 +659,9 @@ def accidentes_tipo_de_calle(df):
     Returns:
         None
     '''
-    # Se crea el gráfico
-    fig, axes = plt.subplots(1, 2, figsize=(10, 4))
-
-    sns.countplot(data=df, x='Tipo de calle', ax=axes[0])
-    axes[0].set_title('Cantidad de víctimas por tipo de calle') ; axes[0].set_ylabel('Cantidad de víctimas')
-
-    sns.countplot(data=df, x='Cruce', ax=axes[1])
-    axes[1].set_title('Cantidad de víctimas en cruces') ; axes[1].set_ylabel('Cantidad de víctimas')
+    # Se cuentan las víctimas por tipo de calle y en cruces y se grafica
+    resultado = cache_resultados.calcula('accidentes_tipo_de_calle', df)
+    graficos_eda.dibuja_accidentes_tipo_de_calle(resultado)
     
     # Mostramos los gráficos
     plt.show()
@@ -843,4 +688,4 @@ def accidentes_tipo_de_calle(df):
     # print("Resumen por Tipo de Calle:")
     # print(df_tipo_calle)
     # print("\nResumen por Cruce:")
-    # print(df_cruce)
\ No newline at end of file
+    # print(df_cruce)
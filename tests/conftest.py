@@ -0,0 +1,32 @@
+## CONFIGURACIÓN DE LAS PRUEBAS
+# Importaciones
+import os
+import sys
+
+import matplotlib
+import pytest
+
+# Los módulos del proyecto están en 'Jupyter_Notebooks' y se importan sin paquete
+DIRECTORIO_MODULOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Jupyter_Notebooks')
+sys.path.insert(0, DIRECTORIO_MODULOS)
+
+DIRECTORIO_DATOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'datos')
+RUTA_EXCEL = os.path.join(DIRECTORIO_DATOS, 'homicidios.xlsx')
+RUTA_LIMPIO = os.path.join(DIRECTORIO_DATOS, 'homicidios_limpio.csv')
+
+
+@pytest.fixture(scope='session')
+def limpio():
+    '''
+    El conjunto limpio de homicidios, tal como se lee del CSV.
+    '''
+    import pandas as pd
+    return pd.read_csv(RUTA_LIMPIO)
+
+@pytest.fixture(scope='session')
+def hechos():
+    '''
+    La hoja HECHOS del Excel original, con la columna 'HORA' de tipos mezclados.
+    '''
+    import pandas as pd
+    return pd.read_excel(RUTA_EXCEL, sheet_name='HECHOS')
@@ -0,0 +1,25 @@
+## PRUEBAS DE LA COMPARACIÓN CONTRA LA LÍNEA DE BASE
+# Importaciones
+import pandas as pd
+
+import benchmark
+
+
+def _mediciones(filas):
+    return pd.DataFrame(filas, columns=['funcion', 'n', 'segundos', 'pico_bytes'])
+
+def test_memoria_chica_no_es_regresion():
+    base = _mediciones([('a', 10, 1.0, 200), ('b', 10, 1.0, 4 << 20)])
+    actual = _mediciones([('a', 10, 1.0, 600), ('b', 10, 1.0, 8 << 20)])
+    comparacion = benchmark.compara_con_base(actual, base).set_index('funcion')
+    assert not comparacion.loc['a', 'regresion_memoria']
+    assert comparacion.loc['b', 'regresion_memoria']
+    assert comparacion.loc['b', 'estado'] == 'regresion'
+
+def test_medicion_sin_base_se_informa():
+    base = _mediciones([('a', 10, 1.0, 200)])
+    actual = _mediciones([('a', 10, 1.0, 200), ('nueva', 10, 1.0, 200)])
+    comparacion = benchmark.compara_con_base(actual, base).set_index('funcion')
+    assert comparacion.loc['nueva', 'sin_base']
+    assert comparacion.loc['nueva', 'estado'] == 'sin base'
+    assert comparacion.loc['a', 'estado'] == 'ok'
@@ -0,0 +1,77 @@
+## PRUEBAS DE LA CACHÉ DE RESULTADOS DEL EDA
+# Importaciones
+import time
+
+import numpy as np
+import pandas as pd
+
+import cache_resultados
+import calculos_eda
+
+
+def _mejor_tiempo(funcion, repeticiones=5):
+    '''
+    Devuelve el menor tiempo de varias ejecuciones de una función.
+    '''
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+def _grande(limpio, filas=500_000):
+    '''
+    Remuestrea el conjunto limpio hasta la cantidad de filas pedida.
+    '''
+    posiciones = np.random.default_rng(0).integers(0, len(limpio), filas)
+    return limpio.iloc[posiciones].reset_index(drop=True)
+
+def test_acierto_mas_rapido_que_recalcular(limpio):
+    df = _grande(limpio)
+    cache = cache_resultados.CacheResultados()
+    for nombre in ['victimas_participantes', 'acusados', 'accidentes_por_categoria_tiempo']:
+        cache_resultados.calcula(nombre, df, cache)
+        acierto = _mejor_tiempo(lambda: cache_resultados.calcula(nombre, df, cache))
+        recalculo = _mejor_tiempo(lambda: calculos_eda.CALCULOS[nombre](df))
+        assert acierto < recalculo, nombre
+
+def test_acierto_con_columnas_de_objetos(limpio):
+    df = _grande(limpio).astype({'Participantes': object, 'Acusado': object})
+    cache = cache_resultados.CacheResultados()
+    cache_resultados.calcula('acusados', df, cache)
+    acierto = _mejor_tiempo(lambda: cache_resultados.calcula('acusados', df, cache))
+    recalculo = _mejor_tiempo(lambda: calculos_eda.CALCULOS['acusados'](df))
+    assert acierto < recalculo
+    assert cache.metricas['aciertos_memoria'] == 5
+
+def test_cambio_de_otra_columna_no_invalida(limpio):
+    df = limpio.copy()
+    cache = cache_resultados.CacheResultados()
+    primero = cache_resultados.calcula('acusados', df, cache)
+    df['Edad'] = 0
+    assert cache_resultados.calcula('acusados', df, cache) is primero
+    assert cache.metricas['fallos'] == 1
+
+def test_cambio_en_el_lugar_invalida(limpio):
+    df = limpio.astype({'Acusado': object})
+    cache = cache_resultados.CacheResultados()
+    antes = cache_resultados.calcula('acusados', df, cache)
+    df.loc[0, 'Acusado'] = 'NUEVO'
+    despues = cache_resultados.calcula('acusados', df, cache)
+    assert cache.metricas['fallos'] == 2
+    assert 'NUEVO' in set(despues.datos['Acusado']) and 'NUEVO' not in set(antes.datos['Acusado'])
+
+def test_resultado_igual_al_calculo_directo(limpio):
+    cache = cache_resultados.CacheResultados()
+    for nombre, calculo in calculos_eda.CALCULOS.items():
+        esperado = calculo(limpio)
+        obtenido = cache_resultados.calcula(nombre, limpio, cache)
+        if isinstance(esperado.datos, dict):
+            for clave, valor in esperado.datos.items():
+                pd.testing.assert_frame_equal(obtenido.datos[clave], valor)
+        elif isinstance(esperado.datos, pd.DataFrame):
+            pd.testing.assert_frame_equal(obtenido.datos, esperado.datos)
+        else:
+            pd.testing.assert_series_equal(obtenido.datos, esperado.datos)
+        assert obtenido.resumen == esperado.resumen
@@ -0,0 +1,26 @@
+## PRUEBAS DE LAS CONSULTAS DIFERIDAS
+# Importaciones
+import pandas as pd
+
+from conftest import RUTA_LIMPIO
+from consultas import Consulta
+
+
+def test_misma_agregacion_con_dos_nombres(limpio):
+    agrupada = Consulta(RUTA_LIMPIO).agrupa('Año').agrega(a=('Edad', 'mean'), b=('Edad', 'mean')).ordena('Año').ejecuta()
+    esperado = limpio.groupby('Año')['Edad'].mean().to_numpy()
+    assert list(agrupada.columns) == ['Año', 'a', 'b']
+    assert (agrupada['a'].to_numpy() == esperado).all() and (agrupada['b'].to_numpy() == esperado).all()
+
+    total = Consulta(RUTA_LIMPIO).agrega(a=('Edad', 'mean'), b=('Edad', 'mean')).ejecuta()
+    assert list(total.columns) == ['a', 'b'] and total['a'][0] == total['b'][0]
+
+def test_desvio_y_varianza_muestrales(limpio):
+    agrupada = Consulta(RUTA_LIMPIO).agrupa('Año').agrega(s=('Edad', 'stddev'), v=('Edad', 'variance')).ordena('Año').ejecuta()
+    esperado = limpio.groupby('Año')['Edad'].agg(['std', 'var'])
+    pd.testing.assert_series_equal(agrupada.set_index('Año')['s'], esperado['std'], check_names=False)
+    pd.testing.assert_series_equal(agrupada.set_index('Año')['v'], esperado['var'], check_names=False)
+
+def test_filtro_de_hora_en_texto(limpio):
+    resultado = Consulta(RUTA_LIMPIO).donde('Hora', '>', '20:00:00').selecciona('Id').ejecuta()
+    assert sorted(resultado['Id']) == sorted(limpio.loc[limpio['Hora'] > '20:00:00', 'Id'])
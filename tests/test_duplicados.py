@@ -0,0 +1,33 @@
+## PRUEBAS DE LA BÚSQUEDA DE DUPLICADOS
+# Importaciones
+import pandas as pd
+
+import duplicados
+
+
+def _par(limpio, lugar_2, pos_2):
+    '''
+    Arma dos hechos con distinto 'Id', la misma 'Fecha' y 'Hora' y el lugar y posición indicados.
+    '''
+    base = limpio.iloc[[0, 0]].copy()
+    base['Id'] = ['A-1', 'A-2']
+    base['Lugar del hecho'] = ['AV PIEDRA BUENA Y AV FERNANDEZ DE LA CRUZ', lugar_2]
+    base['Pos x'] = ['-58.47533969', pos_2[0]]
+    base['Pos y'] = ['-34.68757022', pos_2[1]]
+    return base
+
+def _grupos(df):
+    return pd.concat(list(duplicados.casi_duplicados([df])) or [pd.DataFrame(columns=['Grupo'])])
+
+def test_texto_parecido_con_coordenadas_lejanas_no_es_duplicado(limpio):
+    # Unos 4,6 km al norte, con el mismo lugar salvo un carácter
+    df = _par(limpio, 'AV PIEDRA BUENA Y AV FERNANDEZ DE LA CRUZ.', ('-58.47533969', '-34.64600000'))
+    assert _grupos(df).empty
+
+def test_texto_parecido_sin_coordenadas_es_duplicado(limpio):
+    df = _par(limpio, 'AV PIEDRA BUENA Y AV FERNANDEZ DE LA CRUZ.', ('.', '.'))
+    assert sorted(_grupos(df)['Id']) == ['A-1', 'A-2']
+
+def test_coordenadas_cercanas_son_duplicado(limpio):
+    df = _par(limpio, 'OTRO LUGAR', ('-58.47540000', '-34.68760000'))
+    assert sorted(_grupos(df)['Id']) == ['A-1', 'A-2']
@@ -0,0 +1,26 @@
+## PRUEBAS DEL ETL INCREMENTAL
+# Importaciones
+import pandas as pd
+import pytest
+
+import etl_incremental
+from conftest import RUTA_EXCEL
+
+
+@pytest.fixture(scope='module')
+def victimas():
+    return pd.read_excel(RUTA_EXCEL, sheet_name='VICTIMAS')
+
+def test_id_en_una_sola_hoja_no_se_reprocesa(hechos, victimas, tmp_path):
+    # El primer 'Id' queda sólo en VICTIMAS
+    hechos = hechos[hechos['ID'] != hechos['ID'].iloc[0]]
+    etl_incremental.actualiza_incremental(hechos, victimas, str(tmp_path))
+    for _ in range(2):
+        cambios = etl_incremental.actualiza_incremental(hechos, victimas, str(tmp_path))
+        assert cambios == {'nuevos': 0, 'modificados': 0, 'eliminados': 0, 'reimputados': 0}
+
+def test_cambio_en_un_id_se_detecta(hechos, victimas, tmp_path):
+    etl_incremental.actualiza_incremental(hechos, victimas, str(tmp_path))
+    modificados = hechos.copy()
+    modificados.loc[modificados.index[0], 'COMUNA'] = 99
+    assert etl_incremental.actualiza_incremental(modificados, victimas, str(tmp_path))['modificados'] == 1
@@ -0,0 +1,24 @@
+## PRUEBAS DEL DIBUJO DE LOS GRÁFICOS DEL EDA
+# Importaciones
+import os
+
+import matplotlib
+import matplotlib.pyplot as plt
+
+import graficos_eda
+
+
+def test_dibujo_en_serie_no_cambia_el_backend(limpio, tmp_path):
+    anterior = matplotlib.get_backend()
+    plt.switch_backend('svg')
+    try:
+        abierta = plt.figure()
+        rutas = graficos_eda.renderiza_graficos(limpio, str(tmp_path), procesos=1,
+                                                nombres=['victimas_mensuales', 'acusados'])
+        assert matplotlib.get_backend() == 'svg'
+        # Las figuras de la sesión siguen abiertas y las de los gráficos se cerraron
+        assert plt.get_fignums() == [abierta.number]
+        assert all(os.path.exists(ruta) for lista in rutas.values() for ruta in lista)
+    finally:
+        plt.close('all')
+        plt.switch_backend(anterior)
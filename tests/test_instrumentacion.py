@@ -0,0 +1,24 @@
+## PRUEBAS DE LA INSTRUMENTACIÓN
+# Importaciones
+import time
+
+import instrumentacion
+
+
+def test_funciones_por_elemento_no_se_cuentan_dos_veces():
+    por_elemento = instrumentacion.instrumenta(lambda x: time.sleep(0.01) or x,
+                                               etapa=next(iter(instrumentacion.FUNCIONES_POR_ELEMENTO)))
+
+    def etapa(valores):
+        return [por_elemento(v) for v in valores]
+
+    etapa = instrumentacion.instrumenta(etapa, etapa='prueba.etapa')
+    instrumentacion.activa()
+    try:
+        etapa(range(5))
+        tabla = instrumentacion.resumen()
+    finally:
+        instrumentacion.desactiva()
+        instrumentacion.limpia()
+    assert tabla.loc['prueba.etapa', 'segundos_propios'] < 0.01
+    assert abs(tabla['porcentaje'].sum() - 100) < 0.5
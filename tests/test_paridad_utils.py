@@ -0,0 +1,94 @@
+## PRUEBAS DE PARIDAD ENTRE LAS FUNCIONES VECTORIZADAS Y LAS ORIGINALES FILA POR FILA
+# Importaciones
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import esquema
+import utils
+from calculos_eda import categoriza_momento_dia, categoriza_tipo_dia, extrae_hora_entera
+
+
+def _imputa_edad_fila_por_fila(df):
+    '''
+    Imputación original de 'Edad' con 'apply' por fila, usada como referencia.
+    '''
+    df['Edad'] = df['Edad'].replace('SD', pd.NA)
+    df['Edad'] = pd.to_numeric(df['Edad'])
+    promedio_por_genero = df.groupby('Sexo')['Edad'].mean()
+    df['Edad'] = df.apply(lambda row: promedio_por_genero[row['Sexo']] if pd.isna(row['Edad']) else row['Edad'], axis=1)
+    df['Edad'] = df['Edad'].astype(int)
+
+def _iguales(esperado, obtenido):
+    '''
+    Compara dos columnas de objetos valor por valor, incluido el tipo de cada valor.
+    '''
+    assert len(esperado) == len(obtenido)
+    assert list(map(repr, esperado)) == list(map(repr, obtenido))
+
+
+@pytest.fixture(scope='module')
+def horas_hechos(hechos):
+    # La columna 'HORA' real mezcla objetos time, textos y datetime
+    horas = hechos['HORA']
+    assert {datetime.time, str, datetime.datetime} <= set(horas.map(type))
+    return horas
+
+def test_convertir_columna_a_time_hora_real(horas_hechos):
+    _iguales(horas_hechos.apply(utils.convertir_a_time), utils.convertir_columna_a_time(horas_hechos))
+
+def test_convertir_columna_a_time_casos_borde():
+    serie = pd.Series(['10:20:30', '7:05:00', 'SD', '25:00:00', '', None, np.nan, 5, 0.25,
+                       datetime.time(1, 2, 3), datetime.datetime(2020, 1, 1, 4, 5, 6, 7),
+                       pd.Timestamp('2021-03-04 08:09:10'), '10:20:30'], index=range(10, 23), dtype=object)
+    obtenido = utils.convertir_columna_a_time(serie)
+    _iguales(serie.apply(utils.convertir_a_time), obtenido)
+    assert obtenido.index.equals(serie.index)
+
+def test_convertir_columna_a_time_limpio(limpio):
+    _iguales(limpio['Hora'].apply(utils.convertir_a_time), utils.convertir_columna_a_time(limpio['Hora']))
+
+def test_extrae_hora_entera(horas_hechos, limpio):
+    tiempos = utils.convertir_columna_a_time(horas_hechos).dropna()
+    esperado = tiempos.apply(lambda x: x.hour)
+    assert extrae_hora_entera(tiempos).tolist() == esperado.tolist()
+
+    # Los textos del archivo limpio y el timedelta del esquema compacto dan las mismas horas
+    esperado = utils.convertir_columna_a_time(limpio['Hora']).apply(lambda x: x.hour)
+    assert extrae_hora_entera(limpio['Hora']).tolist() == esperado.tolist()
+    assert extrae_hora_entera(esquema.compacta(limpio)['Hora']).tolist() == esperado.tolist()
+
+def test_categoriza_momento_dia(horas_hechos, limpio):
+    for horas in [horas_hechos, limpio['Hora']]:
+        tiempos = utils.convertir_columna_a_time(horas).dropna()
+        esperado = tiempos.apply(utils.crea_categoria_momento_dia)
+        assert categoriza_momento_dia(extrae_hora_entera(tiempos)).tolist() == esperado.tolist()
+
+def test_categoriza_momento_dia_todas_las_horas():
+    tiempos = pd.Series([datetime.time(hora, 30) for hora in range(24)])
+    esperado = tiempos.apply(utils.crea_categoria_momento_dia)
+    assert categoriza_momento_dia(extrae_hora_entera(tiempos)).tolist() == esperado.tolist()
+
+def test_categoriza_tipo_dia(limpio):
+    esperado = limpio['Dia semana'].apply(lambda x: 'Fin de Semana' if x >= 5 else 'Semana')
+    assert categoriza_tipo_dia(limpio['Dia semana']).tolist() == esperado.tolist()
+
+def test_imputa_edad_media_segun_sexo(limpio, capsys):
+    df = limpio[['Sexo', 'Edad']].copy()
+    # Se quitan edades para que haya valores a imputar en ambos sexos
+    df['Edad'] = df['Edad'].astype(object)
+    df.loc[df.index[::7], 'Edad'] = 'SD'
+
+    esperado, obtenido = df.copy(), df.copy()
+    _imputa_edad_fila_por_fila(esperado)
+    utils.imputa_edad_media_segun_sexo(obtenido)
+    pd.testing.assert_series_equal(obtenido['Edad'], esperado['Edad'])
+
+def test_verificar_tipo_variable_tipos_mezclados(hechos):
+    df = pd.DataFrame({'mezcla': pd.Series([1, 1.0, True, 'SD', None, np.nan, 2, False], dtype=object),
+                       'HORA': hechos['HORA']})
+    obtenido = utils.verificar_tipo_variable(df)
+    for columna, tipos in zip(obtenido['nombre_campo'], obtenido['tipo_datos']):
+        assert list(tipos) == list(df[columna].apply(type).unique())
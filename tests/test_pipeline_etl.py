@@ -0,0 +1,22 @@
+## PRUEBAS DEL PIPELINE ETL POR BLOQUES
+# Importaciones
+import io
+
+import pandas as pd
+
+import pipeline_etl as etl
+
+
+def test_une_por_id_primer_bloque_sin_coincidencias(tmp_path):
+    derecha = pd.DataFrame({'Id': ['2016-0002', '2016-0003'], 'Comuna': [1, 2], 'Calle': ['A', 'B']})
+    etl.particiona_en_disco([derecha], str(tmp_path), particiones=16)
+    izquierda = pd.DataFrame({'Id': ['2016-9999', '2016-0002', '2016-0003'], 'Edad': [30, 40, 50]})
+    bloques = [izquierda.iloc[[0]], izquierda.iloc[1:]]
+
+    unidos = list(etl.une_por_id(bloques, str(tmp_path), particiones=16))
+    assert all(list(bloque.columns) == ['Id', 'Edad', 'Comuna', 'Calle'] for bloque in unidos)
+
+    esperado = izquierda.merge(derecha, on='Id', how='left')
+    ruta = tmp_path / 'unido.csv'
+    etl.escribe_csv(unidos, str(ruta))
+    pd.testing.assert_frame_equal(pd.read_csv(ruta), pd.read_csv(io.StringIO(esperado.to_csv(index=False))))
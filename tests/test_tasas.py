@@ -0,0 +1,21 @@
+## PRUEBAS DE LAS TASAS CADA 100.000 HABITANTES
+# Importaciones
+import numpy as np
+
+import calculos_eda
+import tasas
+
+
+def test_tasa_anual_no_depende_del_largo_del_periodo():
+    un_año = tasas.tasa(100, '2016-01-01', '2016-12-31')
+    dos_años = tasas.tasa(200, '2016-01-01', '2017-12-31')
+    assert abs(dos_años / un_año - 1) < 0.01
+
+def test_tasas_resultado_por_personas_año(limpio):
+    desde, hasta = tasas.periodo_datos(limpio)
+    resultado = calculos_eda.CALCULOS['victimas_mensuales'](limpio)
+    anual = tasas.tasas_resultado(resultado, desde, hasta)['Cantidad víctimas']
+    periodo = tasas.tasas_resultado(resultado, desde, hasta, anualizar=False)['Cantidad víctimas']
+    np.testing.assert_allclose(periodo / anual, tasas.años_periodo(desde, hasta)[0])
+    np.testing.assert_allclose(periodo, resultado.datos['Cantidad víctimas']
+                               / tasas.poblacion_media(desde, hasta)[0] * tasas.POR_HABITANTES)